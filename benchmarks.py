@@ -0,0 +1,1279 @@
+"""
+Benchmarks for AI Call Assistant hot paths
+
+Runs headless on any platform. Usage:
+    python benchmarks.py contacts
+    python benchmarks.py phones
+    python benchmarks.py dialer
+    python benchmarks.py history
+    python benchmarks.py sync
+    python benchmarks.py inventory
+    python benchmarks.py resolver
+    python benchmarks.py supervisor
+    python benchmarks.py import
+    python benchmarks.py instance
+    python benchmarks.py hotpaths [--profile typical] [--output FILE] [--baseline FILE]
+    python benchmarks.py service [--profile typical] [--clients 100]
+
+The hotpaths suite drives the application's own code paths against fake PowerShell
+and URI launcher backends, writes the results as JSON and compares them with a
+stored baseline, exiting with status 1 if any operation regressed. The service
+suite load-tests the headless dial API with many concurrent keep-alive clients.
+"""
+
+import argparse
+import asyncio
+import contextlib
+import csv
+import heapq
+import json
+import os
+import random
+import sqlite3
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import tracemalloc
+from pathlib import Path
+from typing import Callable, Dict, Iterator, List, NamedTuple, Optional, Sequence, Tuple
+
+from call_history import CallHistory
+from call_resolver import ALIASES, CallResolver
+from contact_import import ContactImport, ImportProgress
+from contact_store import ContactStore, Phone, normalize_name
+from contact_sync import PHONE_LINK_SCHEMA, ContactSync, SqliteContactSource, VCardContactSource
+from device_inventory import DeviceRegistry, parse_inventory
+from dialer import Dialer, FakeLauncher
+from log_pipeline import LogPipeline
+from metrics import MetricsRegistry
+from phone_link_supervisor import FakePhoneLinkHost, PhoneLinkSupervisor
+from phone_numbers import PhoneNumberNormalizer
+from powershell_host import FakeCommandRunner
+from single_instance import InstanceLock, InstanceServer, dial_target, endpoint_path, forward_args
+from status_cache import StatusCache
+
+BASELINE_PATH = Path(__file__).resolve().parent / "benchmark_baseline.json"
+
+FIRST_NAMES = [
+    "James", "Mary", "John", "Patricia", "Robert", "Jennifer", "Michael", "Linda", "William",
+    "Elizabeth", "David", "Barbara", "Richard", "Susan", "Joseph", "Jessica", "Thomas", "Sarah",
+    "Carlos", "Maria", "Jose", "Ana", "Wei", "Li", "Hiroshi", "Yuki", "Olga", "Ivan", "Fatima",
+    "Omar", "Priya", "Arjun", "Chloe", "Lucas", "Emma", "Noah", "Sofia", "Mateo", "Zoe", "Jon",
+]
+LAST_NAMES = [
+    "Smith", "Johnson", "Williams", "Brown", "Jones", "Garcia", "Miller", "Davis", "Rodriguez",
+    "Martinez", "Hernandez", "Lopez", "Gonzalez", "Wilson", "Anderson", "Thomas", "Taylor",
+    "Moore", "Jackson", "Martin", "Lee", "Perez", "Thompson", "White", "Harris", "Sanchez",
+    "Clark", "Ramirez", "Lewis", "Robinson", "Walker", "Young", "Allen", "King", "Wright",
+    "Scott", "Torres", "Nguyen", "Hill", "Flores", "Kowalski", "Novak", "Smyth", "Muller",
+]
+PHONE_LABELS = ["mobile", "home", "work"]
+
+
+def percentile(samples: Sequence[float], pct: float) -> float:
+    """Nearest-rank percentile of a non-empty sample"""
+    ordered = sorted(samples)
+    index = min(len(ordered) - 1, max(0, int(round(pct / 100.0 * len(ordered))) - 1))
+    return ordered[index]
+
+
+def summarize(samples_ms: Sequence[float]) -> Dict[str, float]:
+    return {
+        "p50_ms": percentile(samples_ms, 50),
+        "p95_ms": percentile(samples_ms, 95),
+        "p99_ms": percentile(samples_ms, 99),
+    }
+
+
+def time_calls(fn: Callable[[], object], repeat: int) -> List[float]:
+    """Latency of each call in milliseconds"""
+    samples = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        fn()
+        samples.append((time.perf_counter() - started) * 1000.0)
+    return samples
+
+
+def synthetic_contacts(count: int, seed: int = 1) -> List[Tuple[str, List[Phone]]]:
+    """Deterministic fake address book with one to three numbers per contact"""
+    rng = random.Random(seed)
+    contacts = []
+    for i in range(count):
+        name = f"{rng.choice(FIRST_NAMES)} {rng.choice(LAST_NAMES)}"
+        if rng.random() < 0.3:
+            name += f" {i}"  # Keep large books from being all duplicates
+        phones = [
+            (label, f"+1 ({rng.randint(200, 999)}) {rng.randint(200, 999)}-{rng.randint(0, 9999):04d}")
+            for label in rng.sample(PHONE_LABELS, rng.randint(1, 3))
+        ]
+        contacts.append((name, phones))
+    return contacts
+
+
+def bench_contact_store(sizes: Sequence[int] = (1000, 10000, 100000), repeat: int = 500) -> List[Dict]:
+    """Build time, memory and query latency of ContactStore at several sizes"""
+    results = []
+    rng = random.Random(7)
+    for size in sizes:
+        records = synthetic_contacts(size)
+
+        started = time.perf_counter()
+        store = ContactStore()
+        store.add_many(records)
+        build_ms = (time.perf_counter() - started) * 1000.0
+
+        # Memory is measured on a second build; tracemalloc distorts timings
+        del store
+        tracemalloc.start()
+        store = ContactStore()
+        store.add_many(records)
+        memory_bytes = tracemalloc.get_traced_memory()[0]
+        tracemalloc.stop()
+
+        # Search-as-you-type: every prefix of a few names, as a user would type them
+        queries = []
+        for name, _ in rng.sample(records, 20):
+            queries.extend(name[:n] for n in range(1, min(len(name), 8) + 1))
+        query_iter = iter(queries * (repeat // len(queries) + 1))
+        search = time_calls(lambda: store.search(next(query_iter), limit=50), repeat)
+
+        numbers = [phones[0][1] for _, phones in rng.sample(records, 100)]
+        number_iter = iter(numbers * (repeat // len(numbers) + 1))
+        lookup = time_calls(lambda: store.lookup_number(next(number_iter)), repeat)
+
+        new_records = synthetic_contacts(repeat, seed=size)
+        record_iter = iter(new_records)
+        add = time_calls(lambda: store.add(*next(record_iter)), repeat)
+        ids = iter(rng.sample(store.ids_by_name(), repeat))
+        update = time_calls(lambda: store.update(next(ids), name="Renamed Contact"), repeat)
+        ids = iter(rng.sample(store.ids_by_name(), repeat))
+        delete = time_calls(lambda: store.delete(next(ids)), repeat)
+
+        results.append({
+            "contacts": size,
+            "build_ms": build_ms,
+            "memory_mb": memory_bytes / (1024 * 1024),
+            "search": summarize(search),
+            "lookup_number": summarize(lookup),
+            "add": summarize(add),
+            "update": summarize(update),
+            "delete": summarize(delete),
+        })
+    return results
+
+
+def print_contact_results(results: List[Dict]):
+    print(f"{'contacts':>9} {'build ms':>9} {'mem MB':>7}  operation       p50 ms   p95 ms   p99 ms")
+    for row in results:
+        first = True
+        for op in ("search", "lookup_number", "add", "update", "delete"):
+            stats = row[op]
+            prefix = (f"{row['contacts']:>9} {row['build_ms']:>9.1f} {row['memory_mb']:>7.1f}"
+                      if first else " " * 27)
+            print(f"{prefix}  {op:<14} {stats['p50_ms']:>7.3f}  {stats['p95_ms']:>7.3f}  {stats['p99_ms']:>7.3f}")
+            first = False
+
+
+def bench_phone_numbers(count: int = 100000, repeat: int = 5000) -> Dict:
+    """Uncached vs cached normalization, and batch normalization of an address book"""
+    records = synthetic_contacts(count // 2)
+    numbers = [number for _, phones in records for _, number in phones]
+    rng = random.Random(11)
+    sample = rng.sample(numbers, repeat)
+
+    normalizer = PhoneNumberNormalizer("US")
+    sample_iter = iter(sample)
+    uncached = time_calls(lambda: normalizer._parse(next(sample_iter)), repeat)
+    for number in sample:
+        normalizer.normalize(number)
+    sample_iter = iter(sample)
+    cached = time_calls(lambda: normalizer.normalize(next(sample_iter)), repeat)
+
+    normalizer = PhoneNumberNormalizer("US", cache_size=len(numbers))
+    started = time.perf_counter()
+    normalizer.normalize_many(numbers)
+    batch_ms = (time.perf_counter() - started) * 1000.0
+    started = time.perf_counter()
+    normalizer.normalize_contacts(records)
+    contacts_ms = (time.perf_counter() - started) * 1000.0
+    return {
+        "numbers": len(numbers),
+        "contacts": len(records),
+        "uncached": summarize(uncached),
+        "cached": summarize(cached),
+        "normalize_many_ms": batch_ms,
+        "normalize_contacts_ms": contacts_ms,
+    }
+
+
+def print_phone_results(results: Dict):
+    print("operation       p50 ms   p95 ms   p99 ms")
+    for op in ("uncached", "cached"):
+        stats = results[op]
+        print(f"{op:<14} {stats['p50_ms']:>7.4f}  {stats['p95_ms']:>7.4f}  {stats['p99_ms']:>7.4f}")
+    print(f"normalize_many: {results['numbers']} numbers in {results['normalize_many_ms']:.1f} ms")
+    print(f"normalize_contacts: {results['contacts']} contacts in {results['normalize_contacts_ms']:.1f} ms")
+
+
+def bench_dialer(calls: int = 2000, unique: int = 500, latency: float = 0.0005) -> Dict:
+    """Dialer throughput and time-to-dispatch under a burst of calls with repeats"""
+    launcher = FakeLauncher(latency=latency, child_lifetime=0.05)
+    dialer = Dialer(launcher, min_interval=0.0, dedupe_window=0.5)
+    rng = random.Random(3)
+    numbers = [f"+1312555{i:04d}" for i in range(unique)]
+    started = time.perf_counter()
+    futures = [dialer.dial(rng.choice(numbers)) for _ in range(calls)]
+    peak_depth = dialer.depth
+    for future in futures:
+        future.result()
+    elapsed = time.perf_counter() - started
+    stats = dialer.stats()
+    dialer.close()
+    return {
+        "calls": calls,
+        "launched": stats["dispatched"] + stats["failed"],
+        "calls_per_sec": calls / elapsed,
+        "peak_depth": peak_depth,
+        **{k: stats[k] for k in ("deduped", "failed", "dispatch_p50_ms", "dispatch_p95_ms", "dispatch_max_ms")},
+    }
+
+
+def print_dialer_results(results: Dict):
+    for name, value in results.items():
+        print(f"{name:<16} {value:>10.1f}" if isinstance(value, float) else f"{name:<16} {value:>10}")
+
+
+def bench_call_history(calls: int = 100000, targets: int = 2000, repeat: int = 500) -> Dict:
+    """Call history writes and the recent, most frequent and redial queries, on disk"""
+    rng = random.Random(7)
+    with tempfile.TemporaryDirectory() as directory:
+        history = CallHistory(Path(directory) / "history.db")
+        started = time.perf_counter()
+        for _ in range(calls):
+            target = rng.randrange(targets)
+            history.record(f"+1312555{target:04d}", "dispatched", 0.01, contact=f"Contact {target}")
+        record_us = (time.perf_counter() - started) / calls * 1e6
+        history.flush()
+        commit_s = time.perf_counter() - started
+        numbers = iter([f"+1312555{rng.randrange(targets):04d}" for _ in range(repeat)])
+        results = {
+            "calls": calls,
+            "record_us": record_us,
+            "rows_per_sec": calls / commit_s,
+            "recent": summarize(time_calls(lambda: history.recent(20), repeat)),
+            "frequent": summarize(time_calls(lambda: history.frequent(10), repeat)),
+            "calls_to": summarize(time_calls(lambda: history.calls_to(next(numbers)), repeat)),
+            "redial": summarize(time_calls(history.last_call, repeat)),
+            "quick_dial": summarize(time_calls(history.quick_dial, repeat)),
+        }
+        history.close()
+    return results
+
+
+def print_history_results(results: Dict):
+    print(f"{results['calls']} calls: record {results['record_us']:.2f} us each, "
+          f"{results['rows_per_sec']:.0f} rows/s committed")
+    print("query           p50 ms   p95 ms   p99 ms")
+    for op in ("recent", "frequent", "calls_to", "redial", "quick_dial"):
+        stats = results[op]
+        print(f"{op:<14} {stats['p50_ms']:>7.4f}  {stats['p95_ms']:>7.4f}  {stats['p99_ms']:>7.4f}")
+
+
+def write_contacts_fixture(path: Path, records: Sequence[Tuple[str, Sequence[Phone]]]):
+    """A contacts database in Phone Link's schema, in WAL mode like the real one"""
+    schema = PHONE_LINK_SCHEMA
+    types = {"mobile": 2, "home": 1, "work": 3}
+    db = sqlite3.connect(path)
+    db.execute("PRAGMA journal_mode=WAL")
+    db.execute(f"CREATE TABLE IF NOT EXISTS {schema.contact_table} "
+               f"({schema.contact_id} INTEGER PRIMARY KEY, {schema.display_name} TEXT)")
+    db.execute(f"CREATE TABLE IF NOT EXISTS {schema.phone_table} "
+               f"({schema.phone_contact_id} INTEGER, {schema.phone_number} TEXT, {schema.phone_type} INTEGER)")
+    with db:
+        for contact_id, (name, phones) in enumerate(records, start=1):
+            db.execute(f"INSERT INTO {schema.contact_table} VALUES (?, ?)", (contact_id, name))
+            db.executemany(f"INSERT INTO {schema.phone_table} VALUES (?, ?, ?)",
+                           [(contact_id, number, types.get(label, 7)) for label, number in phones])
+    return db
+
+
+def write_vcard_fixture(path: Path, records: Sequence[Tuple[int, str, Sequence[Phone]]]):
+    """A vCard 3.0 export; each record is (uid, name, phones)"""
+    with open(path, "w", encoding="utf-8", newline="") as f:
+        for uid, name, phones in records:
+            f.write(f"BEGIN:VCARD\r\nVERSION:3.0\r\nUID:contact-{uid}\r\nFN:{name}\r\n")
+            for label, number in phones:
+                f.write(f"TEL;TYPE={'cell' if label == 'mobile' else label}:{number}\r\n")
+            f.write("END:VCARD\r\n")
+
+
+def bench_contact_sync(contacts: int = 20000, changes: int = 100) -> Dict:
+    """Initial sync, no-change refresh and delta refresh of fixture databases, against a
+    full reload of the same contacts"""
+    schema = PHONE_LINK_SCHEMA
+    records = synthetic_contacts(contacts)
+    normalizer = PhoneNumberNormalizer("US")
+    results: Dict[str, Dict] = {}
+    with tempfile.TemporaryDirectory() as directory:
+        db_path = Path(directory) / "contacts.db"
+        db = write_contacts_fixture(db_path, records)
+        vcf_path = Path(directory) / "contacts.vcf"
+        write_vcard_fixture(vcf_path, [(uid, name, phones) for uid, (name, phones) in enumerate(records)])
+
+        for name, source in (("sqlite", SqliteContactSource(db_path)), ("vcard", VCardContactSource(vcf_path))):
+            store = ContactStore(normalizer=normalizer.key)
+            sync = ContactSync(store, source, normalizer=normalizer)
+            initial = sync.refresh()
+            unchanged = sync.refresh()
+
+            started = time.perf_counter()
+            reload_store = ContactStore(normalizer=normalizer.key)
+            reload_store.add_many(normalizer.normalize_contacts((c.name, c.phones) for c in source.read()))
+            full_reload_ms = (time.perf_counter() - started) * 1000.0
+
+            # Rename, delete and add a few contacts, as a phone sync would
+            rng = random.Random(9)
+            if name == "sqlite":
+                with db:
+                    for contact_id in rng.sample(range(1, contacts + 1), changes):
+                        db.execute(f"UPDATE {schema.contact_table} SET {schema.display_name} = "
+                                   f"{schema.display_name} || ' Jr' WHERE {schema.contact_id} = ?", (contact_id,))
+                    db.execute(f"DELETE FROM {schema.contact_table} WHERE {schema.contact_id} <= ?", (changes,))
+                    for offset in range(changes):
+                        db.execute(f"INSERT INTO {schema.contact_table} VALUES (?, ?)",
+                                   (contacts + 1 + offset, f"New Contact {offset}"))
+            else:
+                renamed = set(rng.sample(range(changes, contacts), changes))
+                kept = [(uid, f"{name} Jr" if uid in renamed else name, phones)
+                        for uid, (name, phones) in enumerate(records) if uid >= changes]
+                added = [(contacts + i, f"New Contact {i}", [("mobile", f"+1773555{i:04d}")]) for i in range(changes)]
+                write_vcard_fixture(vcf_path, kept + added)
+            delta = sync.refresh()
+            results[name] = {
+                "contacts": len(store),
+                "initial_ms": initial.seconds * 1000.0,
+                "unchanged_ms": unchanged.seconds * 1000.0,
+                "delta_ms": delta.seconds * 1000.0,
+                "full_reload_ms": full_reload_ms,
+                "delta": delta.describe(),
+            }
+        db.close()
+    return results
+
+
+def print_sync_results(results: Dict):
+    print(f"{'source':<8} {'contacts':>8} {'initial ms':>10} {'unchanged ms':>12} {'delta ms':>9} {'reload ms':>9}")
+    for name, row in results.items():
+        print(f"{name:<8} {row['contacts']:>8} {row['initial_ms']:>10.1f} {row['unchanged_ms']:>12.3f} "
+              f"{row['delta_ms']:>9.1f} {row['full_reload_ms']:>9.1f}  ({row['delta']})")
+
+
+def synthetic_inventory(devices: int, phones: int, seed: int = 13) -> List[str]:
+    """INVENTORY_SCRIPT output lines: Bluetooth phones plus ordinary USB devices"""
+    rng = random.Random(seed)
+    lines = []
+    for i in range(phones):
+        mac = f"{rng.getrandbits(48):012X}"
+        lines.append(f"BTHENUM\\{{0000111F-0000-1000-8000-00805F9B34FB}}_LOCALMFG&0002\\7&{i:X}&0&{mac}_C00000000"
+                     f"\tBluetooth\tOK\tPhone {i} Hands-Free Audio Gateway")
+    for i in range(devices - phones):
+        lines.append(f"USB\\VID_{rng.getrandbits(16):04X}&PID_{rng.getrandbits(16):04X}\\6&{i:X}&0&2"
+                     f"\tUSB\tOK\tUSB Input Device {i}")
+    return lines
+
+
+def bench_device_inventory(sizes: Sequence[int] = (100, 1000, 10000), phones: int = 5, repeat: int = 200) -> List[Dict]:
+    """Parsing an inventory pass and diffing it against the previous one"""
+    results = []
+    for size in sizes:
+        lines = synthetic_inventory(size, phones)
+        steady = "\n".join(lines)
+        # One phone goes out of range and one USB device is unplugged
+        changed = "\n".join([lines[0].replace("\tOK\t", "\tUnknown\t")] + lines[1:-1])
+        registry = DeviceRegistry()
+        registry.apply(parse_inventory(steady))
+        outputs = iter([changed, steady] * repeat)
+        changes: List[int] = []
+        results.append({
+            "devices": size,
+            "parse": summarize(time_calls(lambda: parse_inventory(steady), repeat)),
+            "diff_apply": summarize(time_calls(
+                lambda: changes.append(len(registry.apply(parse_inventory(next(outputs))))), repeat
+            )),
+            "phone_changes_per_pass": sum(changes) / len(changes),
+            "phones_tracked": len(registry.phones()),
+        })
+    return results
+
+
+def print_inventory_results(results: List[Dict]):
+    print(f"{'devices':>8}  {'parse p50':>9}  {'parse p95':>9}  {'diff p50':>9}  {'diff p95':>9}  phones  changes/pass")
+    for row in results:
+        print(f"{row['devices']:>8}  {row['parse']['p50_ms']:>9.3f}  {row['parse']['p95_ms']:>9.3f}  "
+              f"{row['diff_apply']['p50_ms']:>9.3f}  {row['diff_apply']['p95_ms']:>9.3f}  "
+              f"{row['phones_tracked']:>6}  {row['phone_changes_per_pass']:>12.1f}")
+
+# Hand-written address book entries and commands for the resolver: family words,
+# nicknames, misheard and misspelled names; (command, expected contact, expected label)
+RESOLVER_CONTACTS: List[Tuple[str, List[Phone]]] = [
+    ("Mom", [("mobile", "+1 (773) 555-0101"), ("home", "+1 (773) 555-0102")]),
+    ("Dad", [("mobile", "+1 (773) 555-0103")]),
+    ("Grandma Rose", [("home", "+1 (708) 555-0104")]),
+    ("Siobhan O'Neill", [("mobile", "+353 87 555 0105"), ("work", "+353 1 555 0106")]),
+    ("Stephen Kowalczyk", [("work", "+1 (312) 555-0107"), ("mobile", "+1 (312) 555-0108")]),
+    ("Catherine Zhou", [("mobile", "+1 (415) 555-0109")]),
+    ("Bartholomew Quigley", [("home", "+1 (617) 555-0110")]),
+    ("Dr. Nakamura Office", [("work", "+1 (206) 555-0111")]),
+    ("Geoffrey Featherstonehaugh", [("mobile", "+44 7700 900112")]),
+    ("Xiomara Delgado", [("mobile", "+1 (305) 555-0113"), ("home", "+1 (305) 555-0114")]),
+]
+RESOLVER_COMMANDS: List[Tuple[str, str, Optional[str]]] = [
+    ("call mom", "Mom", None),
+    ("call mom mobile", "Mom", "mobile"),
+    ("ring mum at home", "Mom", "home"),
+    ("please call my mother on her cell", "Mom", "mobile"),
+    ("call dad", "Dad", None),
+    ("give my father a call", "Dad", None),
+    ("call grandma", "Grandma Rose", None),
+    ("ring granny rose", "Grandma Rose", None),
+    ("call siobhan", "Siobhan O'Neill", None),
+    ("call siobhan oneill at work", "Siobhan O'Neill", "work"),
+    ("call siobahn o'neil", "Siobhan O'Neill", None),
+    ("phone steven kowalczyk", "Stephen Kowalczyk", None),
+    ("call stefan kowalczyk at the office", "Stephen Kowalczyk", "work"),
+    ("call stephen kowalcyk mobile", "Stephen Kowalczyk", "mobile"),
+    ("call kathryn zhou", "Catherine Zhou", None),
+    ("call cathy zhou", "Catherine Zhou", None),
+    ("dial bartholomew quigly", "Bartholomew Quigley", None),
+    ("call quigley", "Bartholomew Quigley", None),
+    ("call bart quigley home", "Bartholomew Quigley", "home"),
+    ("call dr nakamura", "Dr. Nakamura Office", None),
+    ("call jeffrey featherstonehaugh", "Geoffrey Featherstonehaugh", None),
+    ("call geoff featherstone", "Geoffrey Featherstonehaugh", None),
+    ("call xiomara", "Xiomara Delgado", None),
+    ("call ziomara delgado at home", "Xiomara Delgado", "home"),
+]
+
+
+FIRST_NAME_WORDS = frozenset(name.lower() for name in FIRST_NAMES)
+
+
+def _misspell(word: str, rng: random.Random) -> str:
+    """One typing error: a swapped, dropped, doubled or replaced letter"""
+    if len(word) < 4:
+        return word
+    i = rng.randrange(1, len(word) - 1)
+    kind = rng.randrange(4)
+    if kind == 0:
+        return word[:i] + word[i + 1] + word[i] + word[i + 2:]
+    if kind == 1:
+        return word[:i] + word[i + 1:]
+    if kind == 2:
+        return word[:i] + word[i] + word[i:]
+    return word[:i] + rng.choice("aeiou") + word[i + 1:]
+
+
+def resolver_corpus(contacts: Sequence[Tuple[str, List[Phone]]], count: int,
+                    seed: int = 11) -> List[Tuple[str, str, str, Optional[str]]]:
+    """(kind, command, expected name, expected label) for synthetic contacts
+
+    Names in the synthetic book repeat, so any contact with the expected name is a
+    correct answer.
+    """
+    rng = random.Random(seed)
+    plain = [(name, phones) for name, phones in contacts if not name[-1].isdigit()]
+    corpus = []
+    for i in range(count):
+        name, phones = rng.choice(plain)
+        first, last = name.split(" ", 1)
+        label = rng.choice(phones)[0] if rng.random() < 0.5 else None
+        suffix = f" {rng.choice(['at', 'on'])} {label}" if label else ""
+        kind = ("exact", "lowercase", "misspelled", "nickname")[i % 4]
+        if kind == "exact":
+            command = f"call {name}{suffix}"
+        elif kind == "lowercase":
+            command = f"ring {name.lower()}{suffix}"
+        elif kind == "misspelled":
+            command = f"call {first} {_misspell(last.lower(), rng)}{suffix}"
+        else:
+            # Nicknames shared by two first names in the book (Jon, John: "johnny") are ambiguous
+            others = ALIASES.get(first.lower(), frozenset()) & FIRST_NAME_WORDS - {first.lower()}
+            nicknames = [] if others else sorted(ALIASES.get(first.lower(), frozenset()) - {first.lower()})
+            command = f"please call {rng.choice(nicknames) if nicknames else first} {last}{suffix}"
+        corpus.append((kind, command, name, label))
+    return corpus
+
+
+def bench_resolver(contacts: int = 50000, queries: int = 400) -> Dict:
+    """Accuracy and latency of resolving call commands against a large address book"""
+    book = synthetic_contacts(contacts) + RESOLVER_CONTACTS
+    store = ContactStore()
+    store.add_many(book)
+    resolver = CallResolver(store)
+    started = time.perf_counter()
+    resolver.refresh()
+    index_ms = (time.perf_counter() - started) * 1000.0
+
+    corpus = [("hand-written", command, name, label) for command, name, label in RESOLVER_COMMANDS]
+    corpus += resolver_corpus(book, queries)
+    by_kind: Dict[str, List[int]] = {}
+    misses = []
+    cold, warm = [], []
+    for kind, command, name, label in corpus:
+        started = time.perf_counter()
+        resolution = resolver.resolve(command)
+        cold.append((time.perf_counter() - started) * 1000.0)
+        found = resolution is not None and normalize_name(resolution.contact.name) == normalize_name(name)
+        if found and label is not None:
+            found = resolution.label == label
+        counts = by_kind.setdefault(kind, [0, 0])
+        counts[0] += found
+        counts[1] += 1
+        if not found:
+            misses.append(f"{command!r} -> {resolution.describe() if resolution else None}, expected {name}")
+    for _, command, _, _ in corpus:
+        started = time.perf_counter()
+        resolver.resolve(command)
+        warm.append((time.perf_counter() - started) * 1000.0)
+    return {
+        "contacts": len(store),
+        "vocabulary": resolver.vocabulary_size,
+        "index_ms": index_ms,
+        "accuracy": {kind: correct / total for kind, (correct, total) in by_kind.items()},
+        "overall_accuracy": sum(c for c, _ in by_kind.values()) / len(corpus),
+        "uncached": summarize(cold),
+        "memoized": summarize(warm),
+        "misses": misses,
+    }
+
+
+def print_resolver_results(results: Dict):
+    print(f"{results['contacts']} contacts, {results['vocabulary']} distinct name words, "
+          f"index built in {results['index_ms']:.0f} ms")
+    for kind, accuracy in results["accuracy"].items():
+        print(f"  {kind:<13} {accuracy:7.1%}")
+    print(f"  {'overall':<13} {results['overall_accuracy']:7.1%}")
+    print("lookup          p50 ms   p95 ms   p99 ms")
+    for op in ("uncached", "memoized"):
+        stats = results[op]
+        print(f"{op:<14} {stats['p50_ms']:>7.4f}  {stats['p95_ms']:>7.4f}  {stats['p99_ms']:>7.4f}")
+    for miss in results["misses"]:
+        print(f"  miss: {miss}")
+
+def _wait_until(condition: Callable[[], bool], timeout: float = 10.0) -> bool:
+    deadline = time.monotonic() + timeout
+    while not condition():
+        if time.monotonic() > deadline:
+            return False
+        time.sleep(0.005)
+    return True
+
+
+def bench_supervisor(cold_start: float = 1.0, window_delay: float = 0.1, calls: int = 5) -> Dict:
+    """Click to dial window on a cold Phone Link versus one pre-warmed by the supervisor,
+    and how long the supervisor takes to restart a host that died"""
+    from main import PhoneLinkManager
+    results: Dict = {"cold_start_s": cold_start, "window_delay_s": window_delay}
+    for mode in ("unsupervised", "supervised"):
+        host = FakePhoneLinkHost(cold_start=cold_start, window_delay=window_delay)
+        dialer = Dialer(launcher=host, min_interval=0.0, dedupe_window=0.0)
+        metrics = MetricsRegistry()
+        supervisor = PhoneLinkSupervisor(
+            host, lambda: dialer.submit(PhoneLinkManager.PHONE_LINK_URI).result(5.0),
+            poll_interval=0.02, min_backoff=0.05, restart_on_exit=True, metrics=metrics
+        )
+        with count_spawns() as spawns:
+            if mode == "supervised":
+                # The app starts a while before the first call
+                supervisor.start()
+                _wait_until(lambda: supervisor.running)
+            for i in range(calls):
+                supervisor.time_dial_window()
+                dialer.dial(f"+1312555{i:04d}")
+                count = len(supervisor.dial_windows)
+                _wait_until(lambda: len(supervisor.dial_windows) > count)
+            first_start, first_seconds = supervisor.dial_windows[0]
+            later = [seconds * 1000.0 for _, seconds in list(supervisor.dial_windows)[1:]]
+            mode_results = {
+                "first_call_ms": first_seconds * 1000.0,
+                "first_call_start": first_start,
+                "later_calls": summarize(later),
+                "host_starts": host.starts,
+            }
+            if mode == "supervised":
+                host.kill()
+                killed = time.perf_counter()
+                _wait_until(lambda: not supervisor.running)
+                _wait_until(lambda: supervisor.running)
+                mode_results["restart_ms"] = (time.perf_counter() - killed) * 1000.0
+                mode_results["host_starts"] = host.starts
+        mode_results["spawns"] = spawns.count
+        supervisor.stop()
+        dialer.close()
+        results[mode] = mode_results
+    return results
+
+
+def print_supervisor_results(results: Dict):
+    print(f"Simulated Phone Link: {results['cold_start_s']:.1f}s cold start, "
+          f"dial window {results['window_delay_s'] * 1000:.0f} ms after the host is up")
+    print("mode           first call ms  start   later p50 ms  host starts  spawns")
+    for mode in ("unsupervised", "supervised"):
+        stats = results[mode]
+        print(f"{mode:<14} {stats['first_call_ms']:>13.0f}  {stats['first_call_start']:<6} "
+              f"{stats['later_calls']['p50_ms']:>12.0f}  {stats['host_starts']:>11}  {stats['spawns']:>6}")
+    print(f"Restart after the host died: {results['supervised']['restart_ms']:.0f} ms")
+
+def write_csv_fixture(path: Path, records: Sequence[Tuple[str, Sequence[Phone]]]):
+    """An Outlook-style CSV export"""
+    columns = {"mobile": 2, "home": 3, "work": 4}
+    with open(path, "w", encoding="utf-8", newline="") as f:
+        writer = csv.writer(f)
+        writer.writerow(["First Name", "Last Name", "Mobile Phone", "Home Phone", "Business Phone"])
+        for name, phones in records:
+            first, _, last = name.partition(" ")
+            row = [first, last, "", "", ""]
+            for label, number in phones:
+                row[columns[label]] = number
+            writer.writerow(row)
+
+
+class _EventLoop:
+    """Runs after() callbacks in due order on the calling thread, like Tk's event loop"""
+
+    def __init__(self):
+        self._pending: List[Tuple[float, int, Callable[[], None]]] = []
+        self._sequence = 0
+        self.callback_ms: List[float] = []
+
+    def after(self, ms: int, callback: Callable[[], None]):
+        self._sequence += 1
+        heapq.heappush(self._pending, (time.monotonic() + ms / 1000.0, self._sequence, callback))
+
+    def run(self):
+        while self._pending:
+            due, _, callback = heapq.heappop(self._pending)
+            delay = due - time.monotonic()
+            if delay > 0:
+                time.sleep(delay)
+            started = time.perf_counter()
+            callback()
+            self.callback_ms.append((time.perf_counter() - started) * 1000.0)
+
+
+def _import_records(count: int, duplicates: float = 0.1) -> List[Tuple[str, List[Phone]]]:
+    """Synthetic contacts plus repeats of some of them, as merged exports contain"""
+    records = synthetic_contacts(count)
+    rng = random.Random(5)
+    repeats = [records[rng.randrange(count)] for _ in range(int(count * duplicates))]
+    for record in repeats:
+        records.insert(rng.randrange(len(records)), record)
+    return records
+
+
+def bench_contact_import(sizes: Sequence[int] = (10000, 50000)) -> Dict:
+    """Streaming import of vCard and CSV exports: throughput, UI-thread time per batch,
+    reader memory and cancellation"""
+    normalizer = PhoneNumberNormalizer("US")
+    results: Dict = {"runs": []}
+    with tempfile.TemporaryDirectory() as directory:
+        for size in sizes:
+            records = _import_records(size)
+            paths = {"vcf": Path(directory) / f"contacts-{size}.vcf", "csv": Path(directory) / f"contacts-{size}.csv"}
+            write_vcard_fixture(paths["vcf"], [(i, name, phones) for i, (name, phones) in enumerate(records)])
+            write_csv_fixture(paths["csv"], records)
+            for kind, path in paths.items():
+                store = ContactStore(normalizer=normalizer.key)
+                loop = _EventLoop()
+                done: List[ImportProgress] = []
+                ContactImport(path, store, loop.after, normalizer=normalizer, on_done=done.append).start()
+                loop.run()
+                progress = done[0]
+
+                # Peak memory of the reading side alone, which should not grow with the file
+                tracemalloc.start()
+                reader = ContactImport(path, ContactStore(normalizer=normalizer.key), loop.after, normalizer=normalizer)
+                for _ in reader.read_batches():
+                    pass
+                _, peak = tracemalloc.get_traced_memory()
+                tracemalloc.stop()
+
+                results["runs"].append({
+                    "format": kind,
+                    "rows": progress.rows,
+                    "file_mb": path.stat().st_size / 1e6,
+                    "added": progress.added,
+                    "merged": progress.merged,
+                    "seconds": progress.seconds,
+                    "rows_per_sec": progress.rows_per_sec,
+                    "ui_callback": summarize(loop.callback_ms),
+                    "ui_max_ms": max(loop.callback_ms),
+                    "reader_peak_mb": peak / 1e6,
+                })
+
+        # Cancel a large import a few batches in
+        path = Path(directory) / f"contacts-{sizes[-1]}.vcf"
+        store = ContactStore(normalizer=normalizer.key)
+        loop = _EventLoop()
+        done = []
+        contact_import = ContactImport(path, store, loop.after, normalizer=normalizer, on_done=done.append)
+        cancelled_at: List[float] = []
+
+        def on_progress(progress: ImportProgress):
+            if progress.rows >= 2000 and not cancelled_at:
+                cancelled_at.append(time.perf_counter())
+                contact_import.cancel()
+
+        contact_import.on_progress = on_progress
+        contact_import.start()
+        loop.run()
+        contact_import._thread.join(5.0)
+        results["cancel"] = {
+            "stopped_ms": (time.perf_counter() - cancelled_at[0]) * 1000.0,
+            "rows_read": done[0].rows,
+            "contacts_kept": len(store),
+            "reader_stopped": not contact_import._thread.is_alive(),
+        }
+    return results
+
+
+def print_import_results(results: Dict):
+    print("format    rows  file MB    added  merged  rows/s   UI p95 ms  UI max ms  reader peak MB")
+    for run in results["runs"]:
+        ui = run["ui_callback"]
+        print(f"{run['format']:<6} {run['rows']:>7} {run['file_mb']:>8.1f} {run['added']:>8} {run['merged']:>7} "
+              f"{run['rows_per_sec']:>7.0f}  {ui['p95_ms']:>9.2f}  {run['ui_max_ms']:>9.2f}  "
+              f"{run['reader_peak_mb']:>14.2f}")
+    cancel = results["cancel"]
+    print(f"Cancelled after {cancel['rows_read']} rows: reader stopped={cancel['reader_stopped']}, "
+          f"{cancel['contacts_kept']} contacts kept, import ended {cancel['stopped_ms']:.0f} ms after cancel()")
+
+
+# A repeat launch reduced to its single-instance check, as main.py runs it before its imports
+_SECOND_LAUNCH = (
+    "import sys\n"
+    "from single_instance import claim_or_forward\n"
+    "sys.exit(0 if claim_or_forward(sys.argv[2:], directory=sys.argv[1]) is None else 2)\n"
+)
+_HOLD_LOCK = (
+    "import sys, time\n"
+    "from single_instance import InstanceLock\n"
+    "InstanceLock(directory=sys.argv[1]).acquire()\n"
+    "print('locked', flush=True)\n"
+    "time.sleep(60)\n"
+)
+
+
+def bench_single_instance(handoffs: int = 200, launches: int = 20, startup_delay: float = 0.2) -> Dict:
+    """Hand-off latency from a repeat launch to the running instance
+
+    Measured in-process (the IPC alone) and from real second processes, plus the
+    cases where the running instance is still starting or its holder was killed.
+    """
+    here = str(Path(__file__).resolve().parent)
+    results: Dict = {}
+    with tempfile.TemporaryDirectory() as directory:
+        lock = InstanceLock(directory=directory)
+        results["first_launch_locked"] = lock.acquire()
+        results["second_lock_refused"] = not InstanceLock(directory=directory).acquire()
+        received: List[Tuple[float, List[str]]] = []
+        server = InstanceServer(lambda args: received.append((time.perf_counter(), args)),
+                                directory=directory, metrics=MetricsRegistry())
+        server.start()
+
+        handoff_ms, reply_ms = [], []
+        for i in range(handoffs):
+            count = len(received)
+            started = time.perf_counter()
+            ok = forward_args([f"tel:+1312555{i:04d}"], directory=directory)
+            replied = time.perf_counter()
+            if ok and _wait_until(lambda: len(received) > count, timeout=2.0):
+                handoff_ms.append((received[-1][0] - started) * 1000.0)
+                reply_ms.append((replied - started) * 1000.0)
+        results["in_process"] = {"handoff": summarize(handoff_ms), "reply": summarize(reply_ms),
+                                 "delivered": len(handoff_ms), "sent": handoffs}
+
+        interpreter_ms, launch_ms, exit_ms, forwarded = [], [], [], 0
+        for i in range(launches):
+            started = time.perf_counter()
+            subprocess.run([sys.executable, "-c", "pass"], cwd=here, check=True)
+            interpreter_ms.append((time.perf_counter() - started) * 1000.0)
+            count = len(received)
+            target = f"tel:+1-312-555-{i:04d};phone-context=example.com"
+            started = time.perf_counter()
+            code = subprocess.run([sys.executable, "-c", _SECOND_LAUNCH, directory, target], cwd=here).returncode
+            exited = time.perf_counter()
+            if code == 0 and _wait_until(lambda: len(received) > count, timeout=2.0):
+                forwarded += 1
+                launch_ms.append((received[-1][0] - started) * 1000.0)
+                exit_ms.append((exited - started) * 1000.0)
+        results["second_process"] = {
+            "interpreter": summarize(interpreter_ms), "handoff": summarize(launch_ms), "exit": summarize(exit_ms),
+            "forwarded": forwarded, "launches": launches,
+            "dial_target": dial_target(received[-1][1]) if received else None,
+        }
+
+        # A launch while the running instance is still starting, with a stale endpoint left behind
+        server.stop()
+        crashed = InstanceServer(lambda args: None, directory=directory)
+        crashed.start()
+        crashed.stop()
+        endpoint_path(directory=directory).write_text(
+            json.dumps({"port": crashed.port, "pid": os.getpid(), "token": crashed.token}), encoding="utf-8")
+        count = len(received)
+        restarted = InstanceServer(lambda args: received.append((time.perf_counter(), args)),
+                                   directory=directory, metrics=MetricsRegistry())
+        starter = threading.Timer(startup_delay, restarted.start)
+        started = time.perf_counter()
+        starter.start()
+        ok = forward_args(["tel:+13125550199"], directory=directory)
+        results["while_starting"] = {
+            "delivered": ok and _wait_until(lambda: len(received) > count, timeout=2.0),
+            "startup_delay_ms": startup_delay * 1000.0,
+            "handoff_ms": (received[-1][0] - started) * 1000.0 if len(received) > count else None,
+        }
+        restarted.stop()
+        lock.release()
+
+        # The lock goes with its holder: a killed instance does not block the next launch
+        holder = subprocess.Popen([sys.executable, "-c", _HOLD_LOCK, directory], cwd=here,
+                                  stdout=subprocess.PIPE, text=True)
+        holder.stdout.readline()
+        held = not InstanceLock(directory=directory).acquire()
+        holder.kill()
+        holder.wait()
+        holder.stdout.close()
+        next_lock = InstanceLock(directory=directory)
+        results["after_kill"] = {"held_while_running": held, "reacquired": next_lock.acquire()}
+        next_lock.release()
+    return results
+
+
+def print_single_instance_results(results: Dict):
+    print(f"First launch locked: {results['first_launch_locked']}, "
+          f"second lock refused: {results['second_lock_refused']}")
+    print("handoff                    p50 ms   p95 ms   p99 ms  delivered")
+    in_process = results["in_process"]
+    for label, stats in (("in-process, args received", in_process["handoff"]),
+                         ("in-process, sender done", in_process["reply"])):
+        print(f"{label:<25} {stats['p50_ms']:>7.2f}  {stats['p95_ms']:>7.2f}  {stats['p99_ms']:>7.2f}  "
+              f"{in_process['delivered']:>5}/{in_process['sent']}")
+    second = results["second_process"]
+    for label, stats in (("python -c pass", second["interpreter"]),
+                         ("2nd launch, args received", second["handoff"]),
+                         ("2nd launch, exited", second["exit"])):
+        print(f"{label:<25} {stats['p50_ms']:>7.2f}  {stats['p95_ms']:>7.2f}  {stats['p99_ms']:>7.2f}  "
+              f"{second['forwarded']:>5}/{second['launches']}")
+    print(f"Forwarded tel: link dials {second['dial_target']!r}")
+    starting = results["while_starting"]
+    handoff = f"{starting['handoff_ms']:.0f} ms" if starting["handoff_ms"] is not None else "not delivered"
+    print(f"Instance still starting ({starting['startup_delay_ms']:.0f} ms, stale endpoint): {handoff}")
+    after_kill = results["after_kill"]
+    print(f"Killed instance: lock held while running={after_kill['held_while_running']}, "
+          f"re-acquired after kill={after_kill['reacquired']}")
+
+
+class BackendProfile(NamedTuple):
+    """Behaviour of the fake PowerShell and launcher backends"""
+    latency: float          # Seconds per PowerShell command
+    jitter: float           # Up to this much extra per command
+    failure_rate: float     # Fraction of commands that fail
+    timeout_rate: float     # Fraction of commands that hang until their timeout
+    launch_latency: float   # Seconds per URI launch
+    launch_failure_rate: float
+
+
+PROFILES: Dict[str, BackendProfile] = {
+    "fast": BackendProfile(0.001, 0.0, 0.0, 0.0, 0.0, 0.0),
+    "typical": BackendProfile(0.02, 0.01, 0.02, 0.0, 0.005, 0.0),
+    "degraded": BackendProfile(0.15, 0.15, 0.1, 0.02, 0.05, 0.05),
+}
+
+# Fake probe output: Phone Link installed, phone connected over Bluetooth only
+PROBE_RESPONSES = {
+    "Get-AppxPackage": "Microsoft.YourPhone",
+    "Get-Process": "",
+    "Test-Path": "False",
+    "Get-PnpDevice -Class Bluetooth,USB": (
+        "USB\\VID_8087&PID_0026\\5&1A2B3C4D&0&10\tBluetooth\tOK\tIntel(R) Wireless Bluetooth(R)\n"
+        "BTHENUM\\{0000111F-0000-1000-8000-00805F9B34FB}_LOCALMFG&0002\\7&2C0A1B&0&AABBCCDDEEFF_C00000000"
+        "\tBluetooth\tOK\tPixel 8 Hands-Free Audio Gateway\n"
+        "USB\\VID_046D&PID_C52B\\6&3A1F&0&2\tUSB\tOK\tUSB Composite Device\n"
+    ),
+}
+
+
+class _Backends(NamedTuple):
+    manager: object
+    runner: FakeCommandRunner
+    launcher: FakeLauncher
+
+
+def fake_backends(profile: BackendProfile, seed: int = 0) -> _Backends:
+    """A PhoneLinkManager wired to fake backends, with no snapshot file"""
+    from main import PhoneLinkManager
+
+    runner = FakeCommandRunner(
+        PROBE_RESPONSES, latency=profile.latency, jitter=profile.jitter,
+        failure_rate=profile.failure_rate, timeout_rate=profile.timeout_rate, seed=seed
+    )
+    launcher = FakeLauncher(latency=profile.launch_latency, failure_rate=profile.launch_failure_rate, seed=seed)
+    manager = PhoneLinkManager(
+        runner=runner,
+        status_cache=StatusCache(PhoneLinkManager.STATUS_TTLS, transient=PhoneLinkManager.TRANSIENT_STATUS),
+        dialer=Dialer(launcher, min_interval=0.0),
+        history=CallHistory(":memory:"),
+    )
+    return _Backends(manager, runner, launcher)
+
+
+class _SpawnCounter:
+    count = 0
+
+
+@contextlib.contextmanager
+def count_spawns() -> Iterator[_SpawnCounter]:
+    """Count real child processes started, which the fakes should make zero"""
+    counter = _SpawnCounter()
+    original = subprocess.Popen
+
+    class CountingPopen(original):
+        def __init__(self, *args, **kwargs):
+            counter.count += 1
+            super().__init__(*args, **kwargs)
+
+    subprocess.Popen = CountingPopen
+    try:
+        yield counter
+    finally:
+        subprocess.Popen = original
+
+
+def measure(fn: Callable[[], object], repeat: int, backends: Optional[_Backends] = None,
+            memory_repeat: int = 10) -> Dict:
+    """Latency percentiles, backend calls per operation and peak traced memory"""
+    commands_before = backends.runner.call_count if backends else 0
+    launches_before = len(backends.launcher.launched) if backends else 0
+    with count_spawns() as spawns:
+        samples = time_calls(fn, repeat)
+    result = summarize(samples)
+    result.update({
+        "repeat": repeat,
+        "commands_per_op": ((backends.runner.call_count - commands_before) / repeat) if backends else 0.0,
+        "launches_per_op": ((len(backends.launcher.launched) - launches_before) / repeat) if backends else 0.0,
+        "spawns_per_op": spawns.count / repeat,
+    })
+    # Peak memory on separate runs; tracemalloc distorts timings
+    peak = 0
+    tracemalloc.start()
+    try:
+        for _ in range(min(repeat, memory_repeat)):
+            tracemalloc.reset_peak()
+            current = tracemalloc.get_traced_memory()[0]
+            fn()
+            peak = max(peak, tracemalloc.get_traced_memory()[1] - current)
+    finally:
+        tracemalloc.stop()
+    result["peak_kb"] = peak / 1024.0
+    return result
+
+
+def _synthetic_contact_dicts(count: int) -> List[Dict]:
+    return [
+        {"name": name, "phones": [{"label": label, "number": number} for label, number in phones]}
+        for name, phones in synthetic_contacts(count)
+    ]
+
+
+def bench_hotpaths(profile_name: str = "typical", repeat: int = 50, contacts: int = 5000) -> Dict:
+    """Application hot paths against fake backends"""
+    profile = PROFILES[profile_name]
+    operations: Dict[str, Dict] = {}
+
+    backends = fake_backends(profile)
+    manager = backends.manager
+    operations["detect_phone_connection"] = measure(
+        lambda: manager.detect_phone_connection(force=True), repeat, backends
+    )
+    operations["detect_phone_connection_cached"] = measure(
+        manager.detect_phone_connection, repeat * 20, backends
+    )
+    operations["check_phone_link_installed"] = measure(
+        lambda: manager.check_phone_link_installed(force=True), repeat, backends
+    )
+    # Distinct numbers, so the dialer's de-duplication does not merge them
+    numbers = iter(f"(312) 555-{i:04d}" for i in range(10 ** 4))
+    operations["make_call"] = measure(lambda: manager.make_call(next(numbers)), repeat, backends)
+
+    contact_dicts = _synthetic_contact_dicts(contacts)
+    manager.get_contacts_via_people_api = lambda: contact_dicts
+
+    def load_contacts():
+        store = ContactStore(normalizer=manager.normalizer.key)
+        store.add_many(manager.load_contacts())
+
+    operations["load_contacts"] = measure(load_contacts, max(3, repeat // 10), backends, memory_repeat=2)
+    manager.close()
+
+    with tempfile.TemporaryDirectory() as directory:
+        pipeline = LogPipeline(log_path=Path(directory) / "bench.log")
+        counter = iter(range(10 ** 9))
+        operations["log"] = measure(
+            lambda: pipeline.log(f"Benchmark message {next(counter)}"), repeat * 100, memory_repeat=100
+        )
+        pipeline.close()
+
+    operations["app_construction"] = bench_app_construction(profile, max(3, repeat // 10))
+
+    return {
+        "profile": profile_name,
+        "backend": profile._asdict(),
+        "python": sys.version.split()[0],
+        "platform": sys.platform,
+        "operations": operations,
+    }
+
+
+def bench_app_construction(profile: BackendProfile, repeat: int) -> Dict:
+    """CallAssistantApp construction up to its first painted frame; needs a display"""
+    import tkinter as tk
+    from main import CallAssistantApp
+
+    try:
+        tk.Tk().destroy()
+    except tk.TclError as e:
+        return {"skipped": f"no display ({e})"}
+
+    totals = {"commands": 0, "launches": 0}
+
+    def construct():
+        backends = fake_backends(profile)
+        root = tk.Tk()
+        app = CallAssistantApp(root, phone_manager=backends.manager)
+        root.update()
+        totals["commands"] += backends.runner.call_count
+        totals["launches"] += len(backends.launcher.launched)
+        app.on_close()
+
+    result = measure(construct, repeat, memory_repeat=2)
+    runs = repeat + min(repeat, 2)
+    result["commands_per_op"] = totals["commands"] / runs
+    result["launches_per_op"] = totals["launches"] / runs
+    return result
+
+
+def compare_results(results: Dict, baseline: Dict, tolerance: float = 0.3,
+                    slack_ms: float = 2.0, slack_kb: float = 64.0) -> List[str]:
+    """Regressions of results against baseline, as human-readable lines
+
+    Latency and memory may grow by tolerance (a fraction) plus a small absolute
+    slack before they count; backend calls per operation may not grow at all.
+    """
+    regressions = []
+    if results.get("profile") != baseline.get("profile"):
+        regressions.append(
+            f"profile {results.get('profile')!r} does not match baseline profile {baseline.get('profile')!r}"
+        )
+        return regressions
+    for name, base in baseline.get("operations", {}).items():
+        current = results["operations"].get(name)
+        if current is None:
+            regressions.append(f"{name}: missing from results")
+            continue
+        if "skipped" in current or "skipped" in base:
+            continue
+        # p99 is reported but not gated: with tens of samples it is one outlier
+        for metric in ("p50_ms", "p95_ms"):
+            limit = base[metric] * (1 + tolerance) + slack_ms
+            if current[metric] > limit:
+                regressions.append(f"{name}: {metric} {current[metric]:.3f} > {limit:.3f} (baseline {base[metric]:.3f})")
+        for metric in ("commands_per_op", "launches_per_op", "spawns_per_op"):
+            if current[metric] > base[metric] + 0.01:
+                regressions.append(f"{name}: {metric} {current[metric]:.2f} > baseline {base[metric]:.2f}")
+        limit = base["peak_kb"] * (1 + tolerance) + slack_kb
+        if current["peak_kb"] > limit:
+            regressions.append(f"{name}: peak_kb {current['peak_kb']:.1f} > {limit:.1f} (baseline {base['peak_kb']:.1f})")
+    return regressions
+
+
+def print_hotpath_results(results: Dict):
+    print(f"profile: {results['profile']}")
+    print(f"{'operation':<32} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8} {'cmds/op':>8} {'launch/op':>9} "
+          f"{'spawn/op':>8} {'peak KB':>9}")
+    for name, row in results["operations"].items():
+        if "skipped" in row:
+            print(f"{name:<32} skipped: {row['skipped']}")
+            continue
+        print(f"{name:<32} {row['p50_ms']:>8.3f} {row['p95_ms']:>8.3f} {row['p99_ms']:>8.3f} "
+              f"{row['commands_per_op']:>8.2f} {row['launches_per_op']:>9.2f} {row['spawns_per_op']:>8.2f} "
+              f"{row['peak_kb']:>9.1f}")
+
+
+def run_hotpaths(args) -> int:
+    results = bench_hotpaths(args.profile, repeat=args.repeat)
+    print_hotpath_results(results)
+    output = Path(args.output)
+    output.write_text(json.dumps(results, indent=2), encoding="utf-8")
+    print(f"Results written to {output}")
+
+    baseline_path = Path(args.baseline)
+    if args.update_baseline:
+        baseline_path.write_text(json.dumps(results, indent=2), encoding="utf-8")
+        print(f"Baseline updated: {baseline_path}")
+        return 0
+    if not baseline_path.exists():
+        print(f"No baseline at {baseline_path}; run with --update-baseline to create one")
+        return 0
+    baseline = json.loads(baseline_path.read_text(encoding="utf-8"))
+    regressions = compare_results(results, baseline, tolerance=args.tolerance)
+    if regressions:
+        print(f"\nPERFORMANCE REGRESSION against {baseline_path}:", file=sys.stderr)
+        for line in regressions:
+            print(f"  {line}", file=sys.stderr)
+        return 1
+    print(f"No regressions against {baseline_path}")
+    return 0
+
+
+async def _service_client(host: str, port: int, token: str, requests: List[Tuple[str, str, bytes]],
+                          latencies: List[float], errors: List[str]):
+    """One keep-alive connection sending its requests back to back"""
+    reader, writer = await asyncio.open_connection(host, port)
+    try:
+        for method, path, body in requests:
+            started = time.perf_counter()
+            writer.write(
+                f"{method} {path} HTTP/1.1\r\nHost: {host}\r\nAuthorization: Bearer {token}\r\n"
+                f"Content-Type: application/json\r\nContent-Length: {len(body)}\r\n\r\n".encode("latin-1") + body
+            )
+            await writer.drain()
+            status_line = await reader.readline()
+            length = 0
+            while True:
+                line = await reader.readline()
+                if line in (b"\r\n", b""):
+                    break
+                name, _, value = line.decode("latin-1").partition(":")
+                if name.lower() == "content-length":
+                    length = int(value)
+            await reader.readexactly(length)
+            latencies.append(time.perf_counter() - started)
+            status = status_line.split()[1].decode() if len(status_line.split()) > 1 else "none"
+            if not status.startswith("2"):
+                errors.append(f"{method} {path}: {status}")
+    finally:
+        writer.close()
+
+
+def bench_service(profile_name: str = "typical", clients: int = 100, requests_per_client: int = 20,
+                  contacts: int = 5000) -> Dict:
+    """Load test of the headless dial API against fake backends"""
+    from dial_service import DialService
+
+    backends = fake_backends(PROFILES[profile_name])
+    manager = backends.manager
+    manager.get_contacts_via_people_api = lambda: _synthetic_contact_dicts(contacts)
+    rng = random.Random(5)
+    queries = ["smith", "mar", "312", "jo", "garcia", "lee"]
+    dial_count = 0
+
+    def next_request() -> Tuple[str, str, bytes]:
+        nonlocal dial_count
+        roll = rng.random()
+        if roll < 0.6:
+            return "GET", "/status", b""
+        if roll < 0.9:
+            return "GET", f"/contacts?q={rng.choice(queries)}&limit=20", b""
+        dial_count += 1
+        return "POST", "/dial", json.dumps({"number": f"+1312556{dial_count:04d}"}).encode()
+
+    plans = [[next_request() for _ in range(requests_per_client)] for _ in range(clients)]
+
+    async def run() -> Dict:
+        service = DialService(manager, "bench-token", port=0, max_connections=clients + 10)
+        host, port = await service.start()
+        await service.load_contacts()
+        latencies: List[float] = []
+        errors: List[str] = []
+        commands_before = backends.runner.call_count
+        started = time.perf_counter()
+        with count_spawns() as spawns:
+            await asyncio.gather(*(
+                _service_client(host, port, service.token, plan, latencies, errors) for plan in plans
+            ))
+        elapsed = time.perf_counter() - started
+        commands = backends.runner.call_count - commands_before
+        await service.close()
+        samples_ms = sorted(latency * 1000.0 for latency in latencies)
+        return {
+            "profile": profile_name,
+            "clients": clients,
+            "requests": len(latencies),
+            "requests_per_sec": len(latencies) / elapsed,
+            **summarize(samples_ms),
+            "errors": len(errors),
+            "status_requests": sum(1 for plan in plans for method, path, _ in plan if path == "/status"),
+            "powershell_commands": commands,
+            "calls_launched": len(backends.launcher.launched),
+            "spawns": spawns.count,
+        }
+
+    try:
+        return asyncio.run(run())
+    finally:
+        manager.close()
+
+
+def print_service_results(results: Dict):
+    for name, value in results.items():
+        print(f"{name:<20} {value:>10.1f}" if isinstance(value, float) else f"{name:<20} {value:>10}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="AI Call Assistant benchmarks")
+    parser.add_argument("suite", choices=["contacts", "phones", "dialer", "history", "sync", "inventory", "resolver", "supervisor", "import", "instance", "hotpaths", "service"], nargs="?", default="contacts")
+    parser.add_argument("--profile", choices=sorted(PROFILES), default="typical",
+                        help="fake backend latency/failure profile (hotpaths, service)")
+    parser.add_argument("--repeat", type=int, default=50, help="samples per operation (hotpaths)")
+    parser.add_argument("--clients", type=int, default=100, help="concurrent connections (service)")
+    parser.add_argument("--output", default="benchmark-results.json", help="results file (hotpaths)")
+    parser.add_argument("--baseline", default=str(BASELINE_PATH), help="baseline to compare with (hotpaths)")
+    parser.add_argument("--update-baseline", action="store_true", help="store these results as the baseline")
+    parser.add_argument("--tolerance", type=float, default=0.3,
+                        help="allowed fractional slowdown before a regression is reported")
+    args = parser.parse_args(argv)
+
+    if args.suite == "contacts":
+        print_contact_results(bench_contact_store())
+    elif args.suite == "phones":
+        print_phone_results(bench_phone_numbers())
+    elif args.suite == "dialer":
+        print_dialer_results(bench_dialer())
+    elif args.suite == "history":
+        print_history_results(bench_call_history())
+    elif args.suite == "sync":
+        print_sync_results(bench_contact_sync())
+    elif args.suite == "inventory":
+        print_inventory_results(bench_device_inventory())
+    elif args.suite == "resolver":
+        print_resolver_results(bench_resolver())
+    elif args.suite == "supervisor":
+        print_supervisor_results(bench_supervisor())
+    elif args.suite == "import":
+        print_import_results(bench_contact_import())
+    elif args.suite == "instance":
+        print_single_instance_results(bench_single_instance())
+    elif args.suite == "hotpaths":
+        return run_hotpaths(args)
+    elif args.suite == "service":
+        results = bench_service(args.profile, clients=args.clients)
+        print_service_results(results)
+        return 1 if results["errors"] else 0
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,39 +1,51 @@
 """
 Build script to create executable from the application
+
+    python build_exe.py            # single AI-Call-Assistant.exe (--onefile)
+    python build_exe.py --onedir   # fast-start folder build
+
+A onefile executable unpacks its whole archive to a temporary directory on every
+launch. The onedir build ships the files already unpacked, so it starts faster.
 """
 
+import argparse
 import PyInstaller.__main__
 import os
 import sys
 
-def build_exe():
+# Build profiles: PyInstaller options and where the executable ends up
+PROFILES = {
+    "onefile": (["--onefile"], os.path.join("dist", "AI-Call-Assistant.exe")),
+    # No UPX either: compressed DLLs would be unpacked in memory on every start
+    "onedir": (["--onedir", "--noupx"], os.path.join("dist", "AI-Call-Assistant", "AI-Call-Assistant.exe")),
+}
+
+def build_exe(profile: str = "onefile"):
     """Build the executable"""
-    print("Building AI Call Assistant executable...")
-    
+    print(f"Building AI Call Assistant executable ({profile})...")
+    profile_args, exe_path = PROFILES[profile]
+
     # PyInstaller arguments
     args = [
         'main.py',
         '--name=AI-Call-Assistant',
-        '--onefile',
+        *profile_args,
         '--windowed',  # No console window
         '--icon=NONE',  # Add icon file path here if you have one
         '--add-data=requirements.txt;.',  # Include requirements if needed
-        '--hidden-import=win32timezone',
-        '--hidden-import=win32api',
-        '--hidden-import=win32con',
-        '--hidden-import=win32com',
-        '--collect-all=win32com',
         '--noconfirm',  # Overwrite output without asking
     ]
-    
+
     try:
         PyInstaller.__main__.run(args)
         print("\n✓ Build completed successfully!")
-        print("Executable location: dist/AI-Call-Assistant.exe")
+        print(f"Executable location: {exe_path}")
     except Exception as e:
         print(f"\n✗ Build failed: {e}")
         sys.exit(1)
 
 if __name__ == "__main__":
-    build_exe()
-
+    parser = argparse.ArgumentParser(description="Build AI Call Assistant")
+    parser.add_argument("--onedir", dest="profile", action="store_const", const="onedir", default="onefile",
+                        help="build a folder instead of a single file; starts faster")
+    build_exe(parser.parse_args().profile)
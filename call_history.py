@@ -0,0 +1,279 @@
+"""
+Persistent call history in SQLite.
+
+record() only enqueues: a background writer thread commits calls in batches, so
+placing a call never waits on the disk. The database runs in WAL mode, so reads
+on their own connection never block on the writer. After each commit the writer
+reloads the quick-dial list (most called targets) from per-target totals that a
+trigger keeps current. The UI repaints from that cached list instead of querying
+the database on every repaint.
+
+A call targets either a number (E.164 or the digits as typed) or, for contacts
+without a number, a contact name handed to Phone Link.
+"""
+
+import logging
+import queue
+import sqlite3
+import threading
+import time
+from pathlib import Path
+from typing import Callable, List, NamedTuple, Optional, Tuple, Union
+
+from log_pipeline import LOGGER_NAME
+from metrics import REGISTRY, MetricsRegistry
+from status_cache import default_data_dir
+
+logger = logging.getLogger(LOGGER_NAME)
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS calls (
+    id INTEGER PRIMARY KEY,
+    kind TEXT NOT NULL,              -- 'number' or 'contact'
+    target TEXT NOT NULL,            -- Number dialed, or contact name for 'contact'
+    contact TEXT,                    -- Display name, if the call was placed from a contact
+    started REAL NOT NULL,           -- Unix time the call was requested
+    outcome TEXT NOT NULL,           -- 'dispatched', 'failed' or 'error'
+    latency_ms REAL                  -- Request to Phone Link launch
+);
+-- Recent calls and redial: newest first
+CREATE INDEX IF NOT EXISTS idx_calls_started ON calls (started);
+-- Calls to one target, and frequency over a time window
+CREATE INDEX IF NOT EXISTS idx_calls_target ON calls (target, kind, started);
+
+-- Per-target totals of dispatched calls, kept up to date by the trigger below,
+-- so ranking the most frequent targets never scans the call log
+CREATE TABLE IF NOT EXISTS call_targets (
+    target TEXT NOT NULL,
+    kind TEXT NOT NULL,
+    contact TEXT,
+    calls INTEGER NOT NULL,
+    last_called REAL NOT NULL,
+    PRIMARY KEY (target, kind)
+);
+CREATE INDEX IF NOT EXISTS idx_call_targets_rank ON call_targets (calls DESC, last_called DESC);
+CREATE TRIGGER IF NOT EXISTS calls_count_target AFTER INSERT ON calls WHEN NEW.outcome = 'dispatched'
+BEGIN
+    INSERT INTO call_targets (target, kind, contact, calls, last_called)
+    VALUES (NEW.target, NEW.kind, NEW.contact, 1, NEW.started)
+    ON CONFLICT (target, kind) DO UPDATE SET
+        calls = calls + 1,
+        contact = COALESCE(excluded.contact, contact),
+        last_called = MAX(last_called, excluded.last_called);
+END;
+"""
+
+NUMBER = "number"
+CONTACT = "contact"
+
+
+def default_history_path() -> Path:
+    return default_data_dir() / "history.db"
+
+
+class CallRecord(NamedTuple):
+    kind: str
+    target: str
+    contact: Optional[str]
+    started: float
+    outcome: str
+    latency_ms: Optional[float]
+
+    @property
+    def label(self) -> str:
+        return self.contact or self.target
+
+
+class QuickDialEntry(NamedTuple):
+    kind: str
+    target: str
+    contact: Optional[str]
+    calls: int
+    last_called: float
+
+    @property
+    def label(self) -> str:
+        return self.contact or self.target
+
+
+_STOP = object()
+
+
+class _Flush:
+    """Queued behind pending records; set once they are committed"""
+
+    def __init__(self):
+        self.done = threading.Event()
+
+
+class CallHistory:
+    """Call log with batched background writes and a precomputed quick-dial list"""
+
+    def __init__(self, path: Union[Path, str, None] = None, batch_size: int = 100, flush_interval: float = 0.25,
+                 top_n: int = 8, clock: Callable[[], float] = time.time, metrics: Optional[MetricsRegistry] = None):
+        """path ":memory:" keeps the history in memory, for tests and benchmarks"""
+        path = default_history_path() if path is None else path
+        if str(path) == ":memory:":
+            # A named shared-cache database, so the reader and writer connections see the same data
+            self._database = f"file:call-history-{id(self)}?mode=memory&cache=shared"
+        else:
+            Path(path).parent.mkdir(parents=True, exist_ok=True)
+            self._database = Path(path).resolve().as_uri()
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.top_n = top_n
+        self.clock = clock
+        self.metrics = metrics if metrics is not None else REGISTRY
+        self.on_change: Optional[Callable[[], None]] = None  # Called from the writer thread after a commit
+
+        # Set up here, then used only by the writer thread
+        self._writer_db = self._connect(check_same_thread=False)
+        self._writer_db.executescript(SCHEMA)
+        self._reader = self._connect(check_same_thread=False)
+        self._read_lock = threading.Lock()
+        self._quick_dial: Tuple[QuickDialEntry, ...] = tuple(self._query_quick_dial(self._writer_db))
+        last = self._query_recent(self._writer_db, 1)
+        self._last: Optional[CallRecord] = last[0] if last else None
+
+        self._queue: "queue.SimpleQueue[object]" = queue.SimpleQueue()
+        self._writer = threading.Thread(target=self._run_writer, name="call-history", daemon=True)
+        self._writer.start()
+
+    def _connect(self, check_same_thread: bool = True) -> sqlite3.Connection:
+        db = sqlite3.connect(self._database, uri=True, check_same_thread=check_same_thread, isolation_level=None)
+        if "mode=memory" not in self._database:
+            db.execute("PRAGMA journal_mode=WAL")
+            db.execute("PRAGMA synchronous=NORMAL")  # Durable at checkpoints; enough for a call log
+        db.execute("PRAGMA busy_timeout=2000")
+        return db
+
+    # -- Writing --------------------------------------------------------------
+
+    def record(self, target: str, outcome: str, latency: Optional[float] = None,
+               contact: Optional[str] = None, kind: str = NUMBER, started: Optional[float] = None):
+        """Queue a call for writing; safe from any thread and never blocks on disk"""
+        call = CallRecord(
+            kind, target, contact, self.clock() if started is None else started, outcome,
+            None if latency is None else latency * 1000.0,
+        )
+        self._last = call
+        self._queue.put(call)
+
+    def flush(self, timeout: Optional[float] = None) -> bool:
+        """Wait until everything recorded so far is committed"""
+        marker = _Flush()
+        self._queue.put(marker)
+        return marker.done.wait(timeout)
+
+    def close(self):
+        if self._writer.is_alive():
+            self._queue.put(_STOP)
+            self._writer.join(5.0)
+        with self._read_lock:
+            self._reader.close()
+
+    def _run_writer(self):
+        running = True
+        while running:
+            batch: List[CallRecord] = []
+            markers: List[_Flush] = []
+            item = self._queue.get()
+            deadline = time.monotonic() + self.flush_interval
+            # Collect until the batch is full, the interval has passed or someone waits for a flush
+            while True:
+                if item is _STOP:
+                    running = False
+                    break
+                if isinstance(item, _Flush):
+                    markers.append(item)
+                    break
+                batch.append(item)
+                if len(batch) >= self.batch_size:
+                    break
+                try:
+                    item = self._queue.get(timeout=max(0.0, deadline - time.monotonic()))
+                except queue.Empty:
+                    break
+            if batch:
+                self._commit(batch)
+            for marker in markers:
+                marker.done.set()
+        self._writer_db.close()
+
+    def _commit(self, batch: List[CallRecord]):
+        with self.metrics.time("call_history_commit_seconds") as timing:
+            try:
+                self._writer_db.execute("BEGIN")
+                self._writer_db.executemany(
+                    "INSERT INTO calls (kind, target, contact, started, outcome, latency_ms) VALUES (?, ?, ?, ?, ?, ?)",
+                    batch,
+                )
+                self._writer_db.execute("COMMIT")
+            except sqlite3.Error as e:
+                timing.outcome = "error"
+                if self._writer_db.in_transaction:
+                    self._writer_db.execute("ROLLBACK")
+                logger.warning("Error writing call history: %s", e, exc_info=True)
+                return
+            self.metrics.inc("call_history_rows_total", len(batch))
+            self._quick_dial = tuple(self._query_quick_dial(self._writer_db))
+        if self.on_change is not None:
+            self.on_change()
+
+    # -- Reading --------------------------------------------------------------
+
+    def quick_dial(self) -> Tuple[QuickDialEntry, ...]:
+        """Most frequent targets, as of the last commit; no database access"""
+        return self._quick_dial
+
+    def last_call(self) -> Optional[CallRecord]:
+        """The most recent call, for redial; includes calls not yet committed"""
+        return self._last
+
+    def recent(self, limit: int = 20) -> List[CallRecord]:
+        with self._read_lock:
+            return self._query_recent(self._reader, limit)
+
+    def frequent(self, limit: int = 10, since: Optional[float] = None) -> List[QuickDialEntry]:
+        with self._read_lock:
+            return self._query_quick_dial(self._reader, limit, since)
+
+    def calls_to(self, target: str, limit: int = 20) -> List[CallRecord]:
+        with self._read_lock:
+            rows = self._reader.execute(
+                "SELECT kind, target, contact, started, outcome, latency_ms FROM calls "
+                "WHERE target = ? ORDER BY started DESC LIMIT ?",
+                (target, limit),
+            ).fetchall()
+        return [CallRecord(*row) for row in rows]
+
+    def __len__(self) -> int:
+        with self._read_lock:
+            return self._reader.execute("SELECT COUNT(*) FROM calls").fetchone()[0]
+
+    @staticmethod
+    def _query_recent(db: sqlite3.Connection, limit: int) -> List[CallRecord]:
+        rows = db.execute(
+            "SELECT kind, target, contact, started, outcome, latency_ms FROM calls ORDER BY started DESC LIMIT ?",
+            (limit,),
+        ).fetchall()
+        return [CallRecord(*row) for row in rows]
+
+    def _query_quick_dial(self, db: sqlite3.Connection, limit: Optional[int] = None,
+                          since: Optional[float] = None) -> List[QuickDialEntry]:
+        limit = self.top_n if limit is None else limit
+        if since is None:
+            rows = db.execute(
+                "SELECT kind, target, contact, calls, last_called FROM call_targets "
+                "ORDER BY calls DESC, last_called DESC LIMIT ?",
+                (limit,),
+            ).fetchall()
+        else:
+            # A time window cannot use the running totals
+            rows = db.execute(
+                "SELECT kind, target, MAX(contact), COUNT(*) AS calls, MAX(started) AS last_called FROM calls "
+                "WHERE started >= ? AND outcome = 'dispatched' "
+                "GROUP BY target, kind ORDER BY calls DESC, last_called DESC LIMIT ?",
+                (since, limit),
+            ).fetchall()
+        return [QuickDialEntry(*row) for row in rows]
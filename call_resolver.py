@@ -0,0 +1,458 @@
+"""
+Natural-language call commands: "call mom mobile", "ring Jon Smyth at work".
+
+parse_command() strips the verb and filler words and picks out a phone label
+(mobile, home, work...). CallResolver matches the remaining name words against a
+precomputed index of the contact names:
+
+- exact words and word prefixes come from a sorted vocabulary;
+- nicknames and family words come from ALIASES ("bob" -> robert, "mum" -> mom);
+- sound-alikes are matched on Metaphone and Soundex codes ("smyth" -> smith);
+- single typing errors are matched on shared one-letter deletions ("brwon" -> brown);
+- other misspellings are matched on shared letter trigrams ("featherstone" -> featherstonehaugh).
+
+The index works on distinct name words, not contacts, so each query word only
+scores a few hundred words before the matches are mapped to contacts. Results are
+memoized per query, and the index and memo are rebuilt when the store changes.
+"""
+
+import heapq
+import re
+import threading
+from bisect import bisect_left
+from functools import lru_cache
+from typing import Dict, FrozenSet, List, NamedTuple, Optional, Set, Tuple
+
+from contact_store import ContactStore, Contact, normalize_name
+
+VERBS = {"call", "ring", "dial", "phone", "telephone", "contact"}
+FILLERS = {"please", "can", "could", "would", "you", "hey", "ok", "okay", "now", "up", "a", "give", "quickly"}
+LABEL_PREPOSITIONS = {"at", "on", "the", "their", "his", "her", "my", "number", "phone"}
+LABELS = {
+    "mobile": "mobile", "cell": "mobile", "cellphone": "mobile", "cellular": "mobile", "handy": "mobile",
+    "home": "home", "house": "home", "landline": "home",
+    "work": "work", "office": "work", "business": "work", "job": "work",
+    "main": "main", "pager": "pager",
+}
+
+# Nicknames and family words; each group is matched as one name
+ALIAS_GROUPS = [
+    {"mom", "mum", "mother", "mommy", "mummy", "mama", "ma"},
+    {"dad", "father", "daddy", "papa", "pa"},
+    {"grandma", "granny", "nana", "grandmother"},
+    {"grandpa", "granddad", "grandfather", "gramps"},
+    {"robert", "bob", "bobby", "rob", "robbie"},
+    {"william", "bill", "billy", "will", "liam"},
+    {"james", "jim", "jimmy", "jamie"},
+    {"john", "jon", "johnny", "jack"},
+    {"michael", "mike", "mikey", "mick"},
+    {"richard", "rick", "ricky", "dick", "rich"},
+    {"joseph", "joe", "joey"},
+    {"thomas", "tom", "tommy"},
+    {"elizabeth", "liz", "lizzie", "beth", "betty", "eliza"},
+    {"jennifer", "jen", "jenny"},
+    {"patricia", "pat", "patty", "trish"},
+    {"margaret", "maggie", "meg", "peggy"},
+    {"katherine", "catherine", "kate", "katie", "cathy", "kathy"},
+    {"alexander", "alex", "sasha"},
+    {"christopher", "chris"},
+    {"daniel", "dan", "danny"},
+    {"anthony", "tony"},
+    {"susan", "sue", "susie"},
+    {"jose", "pepe"},
+    {"ivan", "vanya"},
+]
+ALIASES: Dict[str, FrozenSet[str]] = {name: frozenset(group) for group in ALIAS_GROUPS for name in group}
+
+# Word similarity by kind of match
+EXACT, ALIAS, PREFIX, METAPHONE, TYPO, SOUNDEX = 1.0, 0.95, 0.85, 0.85, 0.8, 0.75
+MIN_TYPO_LENGTH = 4  # Shorter words are one typo away from too many others
+TRIGRAM_WEIGHT = 0.8
+MIN_TRIGRAM_SIMILARITY = 0.3
+MIN_SCORE = 0.5  # Weaker matches are not offered as a resolution
+MAX_PREFIX_WORDS = 200
+MIN_NUMBER_DIGITS = 3  # Fewer digits are not worth dialing
+
+_POSSESSIVE = re.compile(r"['’]s\b")
+_APOSTROPHES = re.compile(r"['’]")
+_WORDS = re.compile(r"[^\W_]+")
+_VOWELS = "AEIOU"
+
+
+def words(text: str) -> List[str]:
+    """Normalized words of a name or command; apostrophes and possessives removed"""
+    key = normalize_name(_POSSESSIVE.sub("", text))
+    return _WORDS.findall(_APOSTROPHES.sub("", key))
+
+
+# -- Phonetic codes ----------------------------------------------------------
+
+_SOUNDEX_CODES = {c: str(d) for d, letters in enumerate(("AEIOUYHW", "BFPV", "CGJKQSXZ", "DT", "L", "MN", "R"))
+                  for c in letters}
+
+
+def soundex(word: str) -> str:
+    """American Soundex: first letter plus three digits, e.g. Robert -> R163"""
+    letters = [c for c in word.upper() if "A" <= c <= "Z"]
+    if not letters:
+        return ""
+    code = [letters[0]]
+    previous = _SOUNDEX_CODES[letters[0]]
+    for c in letters[1:]:
+        digit = _SOUNDEX_CODES[c]
+        if digit != "0" and digit != previous:
+            code.append(digit)
+        if c not in "HW":  # H and W do not separate letters with the same code
+            previous = digit
+    return "".join(code)[:4].ljust(4, "0")
+
+
+def metaphone(word: str) -> str:
+    """Original Metaphone code (Philips, 1990), e.g. Smyth -> SM0, Knight -> NT"""
+    w = "".join(c for c in word.upper() if "A" <= c <= "Z")
+    if not w:
+        return ""
+    if w[:2] in ("AE", "GN", "KN", "PN", "WR"):
+        w = w[1:]
+    elif w[0] == "X":
+        w = "S" + w[1:]
+    elif w[:2] == "WH":
+        w = "W" + w[2:]
+    n = len(w)
+    out: List[str] = []
+    for i, c in enumerate(w):
+        prev = w[i - 1] if i else ""
+        nxt = w[i + 1] if i + 1 < n else ""
+        after = w[i + 2] if i + 2 < n else ""
+        if c == prev and c != "C":
+            continue
+        if c in _VOWELS:
+            if i == 0:
+                out.append(c)
+        elif c == "B":
+            if not (prev == "M" and i == n - 1):
+                out.append("B")
+        elif c == "C":
+            if nxt == "I" and after == "A" or nxt == "H":
+                out.append("K" if prev == "S" else "X")
+            elif nxt in ("I", "E", "Y"):
+                if prev != "S":
+                    out.append("S")
+            else:
+                out.append("K")
+        elif c == "D":
+            out.append("J" if nxt == "G" and after in ("E", "I", "Y") else "T")
+        elif c == "G":
+            if nxt == "H" and after and after not in _VOWELS:
+                continue  # Silent, as in "night"
+            if nxt == "N" and (i + 2 == n or w[i + 1:] == "NED"):
+                continue  # Silent, as in "sign", "signed"
+            if prev == "D" and nxt in ("E", "I", "Y"):
+                continue  # Already coded by the D of "DGE"
+            out.append("J" if nxt in ("I", "E", "Y") and prev != "G" else "K")
+        elif c == "H":
+            if prev not in ("C", "G", "P", "S", "T") and nxt in _VOWELS:
+                out.append("H")
+        elif c == "K":
+            if prev != "C":
+                out.append("K")
+        elif c == "P":
+            out.append("F" if nxt == "H" else "P")
+        elif c == "Q":
+            out.append("K")
+        elif c == "S":
+            out.append("X" if nxt == "H" or (nxt == "I" and after in ("O", "A")) else "S")
+        elif c == "T":
+            if nxt == "I" and after in ("O", "A"):
+                out.append("X")
+            elif nxt == "H":
+                out.append("0")
+            elif not (nxt == "C" and after == "H"):
+                out.append("T")
+        elif c == "V":
+            out.append("F")
+        elif c in ("W", "Y"):
+            if nxt in _VOWELS:
+                out.append(c)
+        elif c == "X":
+            out.append("KS")
+        elif c == "Z":
+            out.append("S")
+        else:
+            out.append(c)  # F, J, L, M, N, R
+    return "".join(out)
+
+
+def deletions(word: str) -> Set[str]:
+    """The word and every variant with one letter removed
+
+    Two words sharing a variant are one swap, substitution, insertion or deletion apart.
+    """
+    return {word} | {word[:i] + word[i + 1:] for i in range(len(word))}
+
+
+def trigrams(word: str) -> Set[str]:
+    padded = f" {word} "
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+# -- Commands ----------------------------------------------------------------
+
+class ParsedCommand(NamedTuple):
+    name: Tuple[str, ...]     # Name words to look up
+    label: Optional[str]      # Requested phone label, e.g. "mobile"
+    number: Optional[str]     # A number spoken or typed instead of a name
+
+
+def parse_command(text: str) -> ParsedCommand:
+    """Split "please ring Jon Smyth at work" into name words and a label"""
+    tokens = words(text)
+    # Leading verb and filler words ("could you give", "call", "ring up")
+    while tokens and (tokens[0] in VERBS or tokens[0] in FILLERS):
+        tokens.pop(0)
+    # Trailing politeness and "give X a call"
+    while tokens and (tokens[-1] in FILLERS or tokens[-1] in VERBS):
+        tokens.pop()
+    label = None
+    for i in range(len(tokens) - 1, 0, -1):
+        if tokens[i] in LABELS:
+            label = LABELS[tokens[i]]
+            start = i
+            while start > 1 and tokens[start - 1] in LABEL_PREPOSITIONS:
+                start -= 1
+            del tokens[start:i + 1]
+            break
+    # "my mom" -> "mom"
+    tokens = [t for i, t in enumerate(tokens) if not (t == "my" and i + 1 < len(tokens))]
+    digits = "".join(t for t in tokens if t.isdigit())
+    if len(digits) >= MIN_NUMBER_DIGITS and all(t.isdigit() for t in tokens):
+        return ParsedCommand((), label, digits)
+    return ParsedCommand(tuple(tokens), label, None)
+
+
+class Resolution(NamedTuple):
+    contact: Contact
+    number: Optional[str]     # None if the contact has no numbers (call by name)
+    label: Optional[str]      # Label of the chosen number
+    score: float              # 0..1
+    alternatives: Tuple[Contact, ...]
+
+    def describe(self) -> str:
+        target = f"{self.label} {self.number}" if self.number else "by name"
+        return f"{self.contact.name} ({target})"
+
+
+class _Word(NamedTuple):
+    contacts: Tuple[int, ...]
+    metaphone: str
+    soundex: str
+    trigrams: FrozenSet[str]
+
+
+class _Index:
+    """One build of the name index; never changed once published"""
+
+    __slots__ = ("version", "words", "vocabulary", "by_metaphone", "by_soundex", "by_trigram",
+                 "by_deletion", "name_lengths")
+
+    def __init__(self, version: int = -1):
+        self.version = version
+        self.words: Dict[str, _Word] = {}
+        self.vocabulary: List[str] = []
+        self.by_metaphone: Dict[str, List[str]] = {}
+        self.by_soundex: Dict[str, List[str]] = {}
+        self.by_trigram: Dict[str, List[str]] = {}
+        self.by_deletion: Dict[str, List[str]] = {}
+        self.name_lengths: Dict[int, int] = {}
+
+
+class CallResolver:
+    """Resolves free-text call commands to a contact and number
+
+    refresh() builds a new _Index and publishes it with a single assignment, so
+    lookups on other threads (the dial API, the UI) never see a half-built index
+    and need no lock: each one reads self._index once and uses that build throughout.
+    """
+
+    def __init__(self, store: ContactStore, cache_size: int = 4096):
+        self.store = store
+        self._lock = threading.Lock()
+        self._index = _Index()
+        self._ranked = lru_cache(maxsize=cache_size)(self._rank)
+
+    # -- Index ----------------------------------------------------------------
+
+    def refresh(self) -> "_Index":
+        """Rebuild the index if the contact store changed since the last build; returns the current one"""
+        with self._lock:
+            if self._index.version == self.store.version:
+                return self._index
+            index = _Index(self.store.version)
+            by_word: Dict[str, List[int]] = {}
+            for contact in self.store:
+                name_words = words(contact.name)
+                index.name_lengths[contact.id] = len(name_words)
+                for word in set(name_words):
+                    by_word.setdefault(word, []).append(contact.id)
+            for word, ids in by_word.items():
+                entry = _Word(tuple(ids), metaphone(word), soundex(word), frozenset(trigrams(word)))
+                index.words[word] = entry
+                if entry.metaphone:
+                    index.by_metaphone.setdefault(entry.metaphone, []).append(word)
+                if entry.soundex:
+                    index.by_soundex.setdefault(entry.soundex, []).append(word)
+                for gram in entry.trigrams:
+                    index.by_trigram.setdefault(gram, []).append(word)
+                if len(word) >= MIN_TYPO_LENGTH:
+                    for variant in deletions(word):
+                        index.by_deletion.setdefault(variant, []).append(word)
+            index.vocabulary = sorted(index.words)
+            self._index = index
+            # Entries for older builds can never be hit again
+            self._ranked.cache_clear()
+            return index
+
+    @property
+    def ready(self) -> bool:
+        """True if the index matches the store, so a lookup will not rebuild it"""
+        return self._index.version == self.store.version
+
+    @property
+    def vocabulary_size(self) -> int:
+        return len(self._index.vocabulary)
+
+    @property
+    def cache_info(self):
+        return self._ranked.cache_info()
+
+    # -- Matching -------------------------------------------------------------
+
+    @staticmethod
+    def _similar_words(index: _Index, query: str) -> Dict[str, float]:
+        """Indexed words resembling one query word, with their similarity"""
+        found: Dict[str, float] = {}
+
+        def offer(word: str, score: float):
+            if score > found.get(word, 0.0):
+                found[word] = score
+
+        if query in index.words:
+            offer(query, EXACT)
+        for alias in ALIASES.get(query, ()):
+            if alias in index.words:
+                offer(alias, ALIAS)
+        if len(query) >= 2 and not query.isdigit():
+            start = bisect_left(index.vocabulary, query)
+            for word in index.vocabulary[start:start + MAX_PREFIX_WORDS]:
+                if not word.startswith(query):
+                    break
+                offer(word, PREFIX)
+        if query.isdigit():
+            return found
+        for word in index.by_metaphone.get(metaphone(query), ()):
+            offer(word, METAPHONE)
+        for word in index.by_soundex.get(soundex(query), ()):
+            offer(word, SOUNDEX)
+        if len(query) >= MIN_TYPO_LENGTH:
+            for variant in deletions(query):
+                for word in index.by_deletion.get(variant, ()):
+                    offer(word, TYPO)
+        # Trigram overlap (Jaccard), counted over the words sharing at least one trigram
+        grams = trigrams(query)
+        shared: Dict[str, int] = {}
+        for gram in grams:
+            for word in index.by_trigram.get(gram, ()):
+                shared[word] = shared.get(word, 0) + 1
+        for word, count in shared.items():
+            similarity = count / (len(grams) + len(index.words[word].trigrams) - count)
+            if similarity >= MIN_TRIGRAM_SIMILARITY:
+                offer(word, TRIGRAM_WEIGHT * similarity)
+        return found
+
+    def _rank(self, name: Tuple[str, ...], index: _Index) -> Tuple[Tuple[int, float], ...]:
+        """(contact id, score) pairs, best first; memoized per name and index build"""
+        scores: Dict[int, float] = {}
+        for query in name:
+            best: Dict[int, float] = {}
+            # Most similar words first, so each contact keeps its first (best) similarity
+            similar = sorted(self._similar_words(index, query).items(), key=lambda item: -item[1])
+            for word, similarity in similar:
+                for contact_id in index.words[word].contacts:
+                    best.setdefault(contact_id, similarity)
+            for contact_id, similarity in best.items():
+                scores[contact_id] = scores.get(contact_id, 0.0) + similarity
+        # The length penalty only lowers scores, so totals below this can be skipped unscored
+        needed = MIN_SCORE * len(name)
+        ranked = []
+        for contact_id, total in scores.items():
+            if total < needed:
+                continue
+            score = total / len(name)
+            # Prefer names with no words left unmatched: "Mom" over "Mom Work Phone"
+            extra_words = index.name_lengths.get(contact_id, len(name)) - len(name)
+            if extra_words > 0:
+                score *= 1.0 - 0.05 * min(extra_words, 4)
+            if score >= MIN_SCORE:
+                ranked.append((round(-score, 6), contact_id))
+        return tuple((contact_id, -score) for score, contact_id in heapq.nsmallest(10, ranked))
+
+    def search(self, text: str) -> List[Tuple[Contact, float]]:
+        """Contacts matching the name in a command, best first"""
+        index = self.refresh()
+        parsed = parse_command(text)
+        if not parsed.name:
+            return []
+        results = []
+        for contact_id, score in self._ranked(parsed.name, index):
+            contact = self.store.get(contact_id)
+            if contact is not None:
+                results.append((contact, score))
+        return results
+
+    def resolve(self, text: str) -> Optional[Resolution]:
+        """Best contact and number for a command, or None if nothing matches well"""
+        parsed = parse_command(text)
+        matches = self.search(text)
+        if not matches:
+            return None
+        contact, score = matches[0]
+        if parsed.label is not None:
+            # Among equally good matches (namesakes), prefer one with the requested number
+            for candidate, candidate_score in matches:
+                if candidate_score < score:
+                    break
+                if any(label_kind(phone_label) == parsed.label for phone_label, _ in candidate.phones):
+                    contact = candidate
+                    break
+        number, label = choose_number(contact, parsed.label)
+        alternatives = tuple(c for c, _ in matches if c is not contact)[:3]
+        return Resolution(contact, number, label, score, alternatives)
+
+
+def label_kind(phone_label: str) -> str:
+    """A contact's phone label as a LABELS value, e.g. "Cell" and "Mobile phone" are both mobile"""
+    first = phone_label.split()[0].lower() if phone_label.strip() else ""
+    return LABELS.get(first, phone_label.lower())
+
+
+def choose_number(contact: Contact, label: Optional[str]) -> Tuple[Optional[str], Optional[str]]:
+    """The contact's number for a requested label, else its first number"""
+    if not contact.phones:
+        return None, None
+    if label is not None:
+        for phone_label, number in contact.phones:
+            if label_kind(phone_label) == label:
+                return number, phone_label
+    phone_label, number = contact.phones[0]
+    return number, phone_label
+
+
+def is_command(text: str) -> bool:
+    """True for text with letters that a resolver should handle rather than the dialer"""
+    return any(c.isalpha() for c in text)
+
+
+def has_number(text: str) -> bool:
+    """True if text has enough digits to dial as a number when it names no contact,
+    e.g. "555-0100 ext 12" or a pasted "tel:" link"""
+    return sum(c.isdigit() for c in text) >= MIN_NUMBER_DIGITS
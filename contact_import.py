@@ -0,0 +1,410 @@
+"""
+Streaming contact import from vCard (2.1/3.0/4.0) and CSV exports.
+
+Files of tens of thousands of contacts are read in a pipeline that never holds
+the whole file in memory:
+
+- A reader thread decodes the file in buffered chunks and parses it one card or
+  row at a time. vCards are parsed by contact_sync.iter_vcards. CSV columns are
+  matched by header; Outlook, Google and plain name/number exports all work.
+- Each contact's numbers are normalized as they are read. Repeats within a batch
+  are merged: same name and a shared number, or same name and no numbers.
+- Batches wait in a short bounded queue, so a slow consumer holds the reader back
+  instead of letting parsed contacts pile up.
+- The UI thread takes one batch per scheduled callback (Tk's after()). It merges
+  contacts the store already has and adds the rest with one add_many, so the
+  event loop is never blocked for more than one batch.
+
+Progress (bytes read, rows per second) is reported after every batch, and an
+import can be cancelled at any point; contacts already added are kept.
+"""
+
+import csv
+import io
+import os
+import queue
+import re
+import threading
+import time
+from pathlib import Path
+from typing import Callable, Dict, Iterator, List, NamedTuple, Optional, Sequence, Tuple
+
+from contact_store import Contact, ContactStore, Phone, normalize_name
+from contact_sync import iter_vcards
+from metrics import REGISTRY, MetricsRegistry
+from phone_numbers import PhoneNumberNormalizer
+
+Record = Tuple[str, Tuple[Phone, ...]]
+Schedule = Callable[[int, Callable[[], None]], object]  # Tk's after(ms, callback)
+
+# CSV header words, matched case-insensitively
+NAME_COLUMNS = ("name", "display name", "full name", "file as")
+GIVEN_COLUMNS = ("first name", "given name")
+MIDDLE_COLUMNS = ("middle name", "additional name")
+FAMILY_COLUMNS = ("last name", "family name", "surname")
+_PHONE_COLUMN = re.compile(r"phone|mobile|\bcell|\btel\b|telephone|\bfax\b|pager", re.IGNORECASE)
+_GOOGLE_PHONE = re.compile(r"^phone (\d+) - (type|value)$", re.IGNORECASE)
+# Header or type words, most specific first: "Business Fax" is a fax, "Mobile Phone" a mobile
+CSV_LABELS = (("fax", "fax"), ("pager", "pager"), ("mobile", "mobile"), ("cell", "mobile"),
+              ("home", "home"), ("business", "work"), ("work", "work"), ("company", "work"),
+              ("primary", "main"), ("main", "main"))
+
+
+def _csv_label(text: str) -> str:
+    words = set(re.findall(r"[a-z]+", text.lower()))
+    for word, label in CSV_LABELS:
+        if word in words:
+            return label
+    return "other"
+
+
+class _CsvLayout(NamedTuple):
+    name: Optional[int]
+    given: Optional[int]
+    middle: Optional[int]
+    family: Optional[int]
+    phones: Optional[Tuple[Tuple[int, str], ...]]       # (column, label); None: every column after the name
+    typed_phones: Tuple[Tuple[Optional[int], int], ...]  # Google's (type column, value column)
+
+    @classmethod
+    def from_header(cls, header: Sequence[str]) -> Optional["_CsvLayout"]:
+        """Columns of a header row, or None if the row does not look like a header"""
+        lowered = [h.strip().lower() for h in header]
+
+        def find(names: Sequence[str]) -> Optional[int]:
+            for name in names:
+                if name in lowered:
+                    return lowered.index(name)
+            return None
+
+        name, given, middle, family = find(NAME_COLUMNS), find(GIVEN_COLUMNS), find(MIDDLE_COLUMNS), find(FAMILY_COLUMNS)
+        google: Dict[str, List[Optional[int]]] = {}
+        phones = []
+        for i, column in enumerate(lowered):
+            match = _GOOGLE_PHONE.match(column)
+            if match:
+                slot = google.setdefault(match.group(1), [None, None])
+                slot[0 if match.group(2) == "type" else 1] = i
+            elif _PHONE_COLUMN.search(column) and "type" not in column and i not in (name, given, middle, family):
+                phones.append((i, _csv_label(column)))
+        typed = tuple((type_column, value_column) for type_column, value_column in google.values()
+                      if value_column is not None)
+        if name is None and given is None and family is None and not phones and not typed:
+            return None
+        return cls(name, given, middle, family, tuple(phones), typed)
+
+    def record(self, row: Sequence[str]) -> Record:
+        def cell(i: Optional[int]) -> str:
+            return row[i].strip() if i is not None and i < len(row) else ""
+
+        name = cell(self.name) or " ".join(p for p in (cell(self.given), cell(self.middle), cell(self.family)) if p)
+        phones: List[Phone] = []
+        columns = self.phones if self.phones is not None else ((i, "other") for i in range(1, len(row)))
+        for column, label in columns:
+            number = cell(column)
+            if number:
+                phones.append((label, number))
+        for type_column, value_column in self.typed_phones:
+            label = _csv_label(cell(type_column)) if type_column is not None else "other"
+            for number in cell(value_column).split(":::"):  # Google joins several numbers with " ::: "
+                if number.strip():
+                    phones.append((label, number.strip()))
+        return name, tuple(phones)
+
+
+def iter_csv_contacts(lines: Iterator[str]) -> Iterator[Record]:
+    """Stream (name, phones) from CSV text, one row at a time
+
+    The first row is used as a header if it names any name or phone columns;
+    otherwise every row is read as a name followed by phone numbers.
+    """
+    reader = csv.reader(lines)
+    layout: Optional[_CsvLayout] = None
+    for row in reader:
+        if not any(cell.strip() for cell in row):
+            continue
+        if layout is None:
+            layout = _CsvLayout.from_header(row)
+            if layout is not None:
+                continue
+            layout = _CsvLayout(0, None, None, None, None, ())
+        name, phones = layout.record(row)
+        if not name and phones:
+            name = phones[0][1]
+        yield name, phones
+
+
+def open_text(path: Path) -> Tuple[io.BufferedReader, io.TextIOWrapper]:
+    """The file's buffered byte stream (for progress) and a text stream over it
+
+    UTF-16 is detected by its byte order mark; everything else is read as UTF-8,
+    with undecodable bytes replaced.
+    """
+    raw = open(path, "rb")
+    head = raw.peek(4)[:4]
+    encoding = "utf-16" if head.startswith((b"\xff\xfe", b"\xfe\xff")) else "utf-8-sig"
+    return raw, io.TextIOWrapper(raw, encoding=encoding, errors="replace", newline="")
+
+
+def iter_contact_file(text: io.TextIOWrapper, path: Path) -> Iterator[Record]:
+    """(name, phones) from an open export; vCards by extension or by a leading BEGIN:VCARD"""
+    suffix = Path(path).suffix.lower()
+    if suffix in (".vcf", ".vcard"):
+        return ((name, phones) for _, name, phones in iter_vcards(text))
+    if suffix == ".csv":
+        return iter_csv_contacts(text)
+    first = text.readline()
+    lines = _prepend(first, text)
+    if first.strip().upper() == "BEGIN:VCARD":
+        return ((name, phones) for _, name, phones in iter_vcards(lines))
+    return iter_csv_contacts(lines)
+
+
+def _prepend(first: str, rest: Iterator[str]) -> Iterator[str]:
+    yield first
+    yield from rest
+
+
+class ImportProgress(NamedTuple):
+    rows: int            # Contacts read from the file
+    added: int           # New contacts added to the store
+    merged: int          # Duplicates merged into a contact read earlier or already in the store
+    skipped: int         # Rows with neither a name nor a number
+    bytes_read: int
+    total_bytes: int
+    seconds: float
+    finished: bool
+    cancelled: bool
+    error: Optional[str]
+
+    @property
+    def fraction(self) -> float:
+        return min(1.0, self.bytes_read / self.total_bytes) if self.total_bytes else 1.0
+
+    @property
+    def rows_per_sec(self) -> float:
+        return self.rows / self.seconds if self.seconds else 0.0
+
+    def describe(self) -> str:
+        text = (f"{self.rows} read ({self.fraction:.0%}), {self.added} added, {self.merged} merged, "
+                f"{self.rows_per_sec:.0f} rows/s")
+        if self.cancelled:
+            return f"Import cancelled: {text}"
+        if self.error:
+            return f"Import failed: {self.error} ({text})"
+        return f"Imported {text}" if self.finished else f"Importing {text}"
+
+
+_DONE = object()
+
+
+class ContactImport:
+    """One import of an export file into a ContactStore
+
+    start() must be called on the thread that owns the store's UI (the Tk thread),
+    since schedule (root.after) runs the store inserts there. on_progress is called
+    after every batch and on_done once at the end, both on that thread.
+
+    Each batch costs about 60-80 us per record on the UI thread once the store holds
+    tens of thousands of contacts, so the default batch keeps one tick near 15 ms.
+    """
+
+    def __init__(self, path: Path, store: ContactStore, schedule: Schedule,
+                 normalizer: Optional[PhoneNumberNormalizer] = None, batch_size: int = 200,
+                 max_pending: int = 8, interval_ms: int = 1,
+                 on_progress: Optional[Callable[[ImportProgress], None]] = None,
+                 on_done: Optional[Callable[[ImportProgress], None]] = None,
+                 metrics: Optional[MetricsRegistry] = None):
+        self.path = Path(path)
+        self.store = store
+        self.schedule = schedule
+        self.normalizer = normalizer
+        self.batch_size = batch_size
+        self.interval_ms = interval_ms
+        self.on_progress = on_progress
+        self.on_done = on_done
+        self.metrics = metrics if metrics is not None else REGISTRY
+        self.total_bytes = os.path.getsize(self.path)
+        self._batches: "queue.Queue[object]" = queue.Queue(maxsize=max_pending)
+        self._cancelled = threading.Event()
+        # Cleared while a batch is applied, so the reader does not compete for the GIL
+        self._ui_idle = threading.Event()
+        self._ui_idle.set()
+        self._thread: Optional[threading.Thread] = None
+        self._started: Optional[float] = None
+        self._error: Optional[str] = None
+        self._finished = False
+        # Written by the reader thread
+        self._rows = self._skipped = self._read_merged = self._bytes_read = 0
+        # Written on the UI thread
+        self._added = self._store_merged = 0
+
+    # -- Control --------------------------------------------------------------
+
+    def start(self):
+        if self._thread is not None:
+            return
+        self._started = time.perf_counter()
+        self._thread = threading.Thread(target=self._read, name="contact-import", daemon=True)
+        self._thread.start()
+        self.schedule(self.interval_ms, self._pump)
+
+    def cancel(self):
+        """Stop reading; batches not yet added are dropped and contacts already added stay"""
+        self._cancelled.set()
+
+    @property
+    def cancelled(self) -> bool:
+        return self._cancelled.is_set()
+
+    @property
+    def finished(self) -> bool:
+        return self._finished
+
+    def progress(self) -> ImportProgress:
+        seconds = time.perf_counter() - self._started if self._started is not None else 0.0
+        return ImportProgress(
+            self._rows, self._added, self._read_merged + self._store_merged, self._skipped,
+            self._bytes_read, self.total_bytes, seconds, self._finished, self.cancelled, self._error,
+        )
+
+    # -- Reading (reader thread) ----------------------------------------------
+
+    def read_batches(self) -> Iterator[List[Record]]:
+        """Normalized, de-duplicated batches of the file's contacts, read lazily"""
+        raw, text = open_text(self.path)
+        with text:
+            batch: List[Record] = []
+            seen: Dict[Tuple[str, Optional[str]], int] = {}  # (name key, number key) -> position in batch
+            for name, phones in iter_contact_file(text, self.path):
+                if self._cancelled.is_set():
+                    return
+                self._ui_idle.wait()
+                self._rows += 1
+                if not name:
+                    self._skipped += 1
+                    continue
+                if self.normalizer is not None:
+                    # One record at a time, so only numbers repeated within the contact are dropped
+                    name, phones = self.normalizer.normalize_contacts([(name, phones)])[0]
+                if self._merge_into_batch(batch, seen, name, phones):
+                    self._read_merged += 1
+                if len(batch) >= self.batch_size:
+                    self._bytes_read = raw.tell()
+                    yield batch
+                    batch, seen = [], {}
+            self._bytes_read = self.total_bytes
+            if batch:
+                yield batch
+
+    def _merge_into_batch(self, batch: List[Record], seen: Dict[Tuple[str, Optional[str]], int],
+                          name: str, phones: Sequence[Phone]) -> bool:
+        """Append a contact to the batch, or merge it into an earlier one; True if merged"""
+        name_key = normalize_name(name)
+        keys = [self.store.normalize_number(number) for _, number in phones]
+        lookups = [(name_key, key) for key in keys if key] or [(name_key, None)]
+        for lookup in lookups:
+            position = seen.get(lookup)
+            if position is not None:
+                earlier_name, earlier_phones = batch[position]
+                known = {self.store.normalize_number(number) for _, number in earlier_phones}
+                extra = tuple(phone for phone, key in zip(phones, keys) if key and key not in known)
+                batch[position] = (earlier_name, earlier_phones + extra)
+                for extra_lookup in lookups:
+                    seen[extra_lookup] = position
+                return True
+        for lookup in lookups:
+            seen[lookup] = len(batch)
+        batch.append((name, tuple(phones)))
+        return False
+
+    def _read(self):
+        try:
+            for batch in self.read_batches():
+                if not self._put(batch):
+                    return
+        except (OSError, csv.Error, UnicodeError, ValueError) as e:
+            self._error = str(e)
+            self.metrics.inc("errors_total", operation="contact_import")
+        self._put(_DONE)
+
+    def _put(self, item: object) -> bool:
+        """Wait for room in the queue; False if the import was cancelled meanwhile"""
+        while not self._cancelled.is_set():
+            try:
+                self._batches.put(item, timeout=0.1)
+                return True
+            except queue.Full:
+                continue
+        return False
+
+    # -- Inserting (UI thread) ------------------------------------------------
+
+    def _pump(self):
+        """Add at most one batch to the store, then schedule the next call"""
+        if self.cancelled:
+            self._finish()
+            return
+        try:
+            item = self._batches.get_nowait()
+        except queue.Empty:
+            self.schedule(max(self.interval_ms, 15), self._pump)
+            return
+        if item is _DONE:
+            self._finish()
+            return
+        self._ui_idle.clear()
+        try:
+            with self.metrics.time("contact_import_batch_seconds"):
+                self._apply(item)
+        finally:
+            self._ui_idle.set()
+        self.metrics.inc("contact_import_rows_total", len(item))
+        if self.on_progress is not None:
+            self.on_progress(self.progress())
+        self.schedule(self.interval_ms, self._pump)
+
+    def _apply(self, batch: List[Record]):
+        """Merge contacts the store already has (same name, shared number) and add the rest"""
+        new: List[Record] = []
+        for name, phones in batch:
+            existing = self._existing(name, phones)
+            if existing is None:
+                new.append((name, phones))
+                continue
+            known = {self.store.normalize_number(number) for _, number in existing.phones}
+            extra = tuple(phone for phone in phones if self.store.normalize_number(phone[1]) not in known)
+            if extra:
+                self.store.update(existing.id, phones=existing.phones + extra)
+            self._store_merged += 1
+        if new:
+            self.store.add_many(new)
+            self._added += len(new)
+
+    def _existing(self, name: str, phones: Sequence[Phone]) -> Optional[Contact]:
+        name_key = normalize_name(name)
+        for _, number in phones:
+            for contact in self.store.lookup_number(number):
+                if contact.name_key == name_key:
+                    return contact
+        if not phones:
+            matches = self.store.find_by_name(name)
+            return matches[0] if matches else None
+        return None
+
+    def _finish(self):
+        if self._finished:
+            return
+        self._finished = True
+        if self.cancelled:
+            # Drop what the reader had queued; it notices the cancel within its put timeout
+            while True:
+                try:
+                    self._batches.get_nowait()
+                except queue.Empty:
+                    break
+        progress = self.progress()
+        self.metrics.inc("contact_imports_total", outcome="cancelled" if progress.cancelled
+                         else "error" if progress.error else "ok")
+        if self.on_done is not None:
+            self.on_done(progress)
@@ -0,0 +1,341 @@
+"""
+Indexed in-memory contact store.
+
+Contacts are compact __slots__ records. Sorted indexes (full name, individual name
+words and phone digits) answer prefix searches with bisect, and a hash index maps
+normalized phone numbers to contacts for constant-time reverse lookup. All indexes
+are updated incrementally on add, update and delete.
+"""
+
+import heapq
+import re
+import sys
+import threading
+import unicodedata
+from bisect import bisect_left, insort
+from typing import Dict, Iterable, Iterator, List, Optional, Sequence, Set, Tuple
+
+Phone = Tuple[str, str]  # (label, number), e.g. ("mobile", "+1 312 555 0100")
+
+# Sorts after every other character, so bisecting (prefix + _HIGH) ends a prefix range
+_HIGH = "\U0010ffff"
+
+_NON_DIGITS = re.compile(r"\D+")
+
+
+def normalize_name(text: str) -> str:
+    """Case-fold, strip accents and collapse whitespace for indexing"""
+    if text.isascii():
+        return " ".join(text.lower().split())
+    decomposed = unicodedata.normalize("NFKD", text)
+    stripped = "".join(c for c in decomposed if not unicodedata.combining(c))
+    return " ".join(stripped.casefold().split())
+
+
+def normalize_number(number: str) -> str:
+    """Digits only, keeping a leading + for international numbers"""
+    digits = _NON_DIGITS.sub("", number)
+    if digits and number.lstrip().startswith("+"):
+        return "+" + digits
+    return digits
+
+
+class Contact:
+    """A single contact; phones is a tuple of (label, number) pairs"""
+
+    __slots__ = ("id", "name", "phones", "name_key")
+
+    def __init__(self, contact_id: int, name: str, phones: Sequence[Phone] = ()):
+        self.id = contact_id
+        self.name = name
+        self.phones: Tuple[Phone, ...] = tuple((label, number) for label, number in phones)
+        self.name_key = normalize_name(name)
+
+    @property
+    def primary_number(self) -> Optional[str]:
+        return self.phones[0][1] if self.phones else None
+
+    def to_dict(self) -> Dict:
+        return {
+            "id": self.id,
+            "name": self.name,
+            "phones": [{"label": label, "number": number} for label, number in self.phones],
+        }
+
+    def __repr__(self):
+        return f"Contact({self.id!r}, {self.name!r}, {self.phones!r})"
+
+
+def phones_from_dict(data: Dict) -> List[Phone]:
+    """Accept the shapes returned by the contact sources: 'phones' list or single 'phone'"""
+    phones: List[Phone] = []
+    for entry in data.get("phones") or []:
+        if isinstance(entry, dict):
+            number = entry.get("number") or ""
+            label = entry.get("label") or entry.get("type") or "other"
+        else:
+            number, label = str(entry), "other"
+        if number:
+            phones.append((label, number))
+    single = data.get("phone") or data.get("number")
+    if single:
+        phones.append((data.get("label") or "other", single))
+    return phones
+
+
+class ContactStore:
+    """Contacts indexed by name prefix, name-word prefix and normalized phone number"""
+
+    def __init__(self, normalizer=normalize_number):
+        self.normalize_number = normalizer
+        self._contacts: Dict[int, Contact] = {}
+        self._by_name: List[Tuple[str, int]] = []   # (full name key, id), sorted
+        self._by_token: List[Tuple[str, int]] = []  # (name word, id), sorted
+        self._by_phone: Dict[str, Tuple[int, ...]] = {}  # normalized number -> ids
+        self._by_digits: List[Tuple[str, int]] = []  # (digit string, id), sorted
+        self._next_id = 1
+        self._lock = threading.RLock()
+        self.version = 0  # Incremented on every change, for caches built on the store
+
+    def __len__(self) -> int:
+        return len(self._contacts)
+
+    def __contains__(self, contact_id: int) -> bool:
+        return contact_id in self._contacts
+
+    def get(self, contact_id: int) -> Optional[Contact]:
+        return self._contacts.get(contact_id)
+
+    def ids_by_name(self) -> List[int]:
+        """All contact ids in name order"""
+        with self._lock:
+            return [contact_id for _, contact_id in self._by_name]
+
+    def __iter__(self) -> Iterator[Contact]:
+        for contact_id in self.ids_by_name():
+            contact = self._contacts.get(contact_id)
+            if contact is not None:
+                yield contact
+
+    # -- Mutation -------------------------------------------------------------
+
+    def add(self, name: str, phones: Sequence[Phone] = (), contact_id: Optional[int] = None) -> Contact:
+        """Add one contact and update the indexes incrementally"""
+        with self._lock:
+            contact = self._new_contact(name, phones, contact_id)
+            insort(self._by_name, (contact.name_key, contact.id))
+            for token in self._tokens(contact):
+                insort(self._by_token, (token, contact.id))
+            self._index_phones(contact)
+            self.version += 1
+            return contact
+
+    def add_many(self, records: Iterable[Tuple[str, Sequence[Phone]]]) -> List[Contact]:
+        """Add many contacts, merging them into each index once instead of per contact"""
+        with self._lock:
+            added = [self._new_contact(name, phones, None) for name, phones in records]
+            self._by_name = self._insert_sorted(self._by_name, [(c.name_key, c.id) for c in added])
+            self._by_token = self._insert_sorted(
+                self._by_token, [(token, c.id) for c in added for token in self._tokens(c)]
+            )
+            digits: List[Tuple[str, int]] = []
+            for contact in added:
+                self._index_phones(contact, pending=digits)
+            self._by_digits = self._insert_sorted(self._by_digits, digits)
+            self.version += 1
+            return added
+
+    def add_dicts(self, records: Iterable[Dict]) -> List[Contact]:
+        """Add contacts given as {'name': ..., 'phones': [...]} dictionaries"""
+        return self.add_many((r.get("name") or "Unknown", phones_from_dict(r)) for r in records)
+
+    def update(self, contact_id: int, name: Optional[str] = None,
+               phones: Optional[Sequence[Phone]] = None) -> Optional[Contact]:
+        """Change a contact's name and/or phones; returns None if the id is unknown"""
+        with self._lock:
+            old = self._contacts.get(contact_id)
+            if old is None:
+                return None
+            self._unindex(old)
+            contact = Contact(
+                contact_id,
+                old.name if name is None else name,
+                old.phones if phones is None else phones
+            )
+            self._contacts[contact_id] = contact
+            insort(self._by_name, (contact.name_key, contact_id))
+            for token in self._tokens(contact):
+                insort(self._by_token, (token, contact_id))
+            self._index_phones(contact)
+            self.version += 1
+            return contact
+
+    def delete(self, contact_id: int) -> bool:
+        with self._lock:
+            contact = self._contacts.pop(contact_id, None)
+            if contact is None:
+                return False
+            self._unindex(contact)
+            self.version += 1
+            return True
+
+    def clear(self):
+        with self._lock:
+            self._contacts.clear()
+            self._by_name.clear()
+            self._by_token.clear()
+            self._by_phone.clear()
+            self._by_digits.clear()
+            self.version += 1
+
+    def _new_contact(self, name: str, phones: Sequence[Phone], contact_id: Optional[int]) -> Contact:
+        if contact_id is None:
+            contact_id = self._next_id
+        elif contact_id in self._contacts:
+            raise ValueError(f"Duplicate contact id: {contact_id}")
+        self._next_id = max(self._next_id, contact_id + 1)
+        contact = Contact(contact_id, name, phones)
+        self._contacts[contact_id] = contact
+        return contact
+
+    @staticmethod
+    def _tokens(contact: Contact) -> Set[str]:
+        # Interned: first and last names repeat across thousands of contacts
+        return {sys.intern(token) for token in contact.name_key.split()}
+
+    @staticmethod
+    def _digit_keys(key: str) -> Set[str]:
+        """Digit strings a typed number may start with: the whole number, or its
+        last ten digits for users who leave out the country code"""
+        digits = key.lstrip("+")
+        return {digits, digits[-10:]} if digits else set()
+
+    def _index_phones(self, contact: Contact, pending: Optional[List[Tuple[str, int]]] = None):
+        """Index the contact's numbers; digit entries go to pending, if given, instead of being inserted"""
+        for _, number in contact.phones:
+            key = self.normalize_number(number)
+            if key:
+                # Tuples rather than sets: almost every number has a single owner
+                self._by_phone[key] = self._by_phone.get(key, ()) + (contact.id,)
+                for digits in self._digit_keys(key):
+                    if pending is None:
+                        insort(self._by_digits, (digits, contact.id))
+                    else:
+                        pending.append((digits, contact.id))
+
+    def _unindex(self, contact: Contact):
+        self._remove_sorted(self._by_name, (contact.name_key, contact.id))
+        for token in self._tokens(contact):
+            self._remove_sorted(self._by_token, (token, contact.id))
+        for _, number in contact.phones:
+            key = self.normalize_number(number)
+            ids = tuple(i for i in self._by_phone.get(key, ()) if i != contact.id)
+            if ids:
+                self._by_phone[key] = ids
+            else:
+                self._by_phone.pop(key, None)
+            for digits in self._digit_keys(key):
+                self._remove_sorted(self._by_digits, (digits, contact.id))
+
+    @staticmethod
+    def _insert_sorted(index: List[Tuple[str, int]], items: List[Tuple[str, int]]) -> List[Tuple[str, int]]:
+        """A sorted index with a batch inserted
+
+        A small batch is placed by bisection and the index rebuilt with slice copies,
+        which costs no comparisons for the entries in between; re-sorting would
+        compare every entry just to find the existing sorted run. Batches that are
+        large relative to the index are simply appended and sorted.
+        """
+        items.sort()
+        if len(items) * 16 > len(index):
+            index.extend(items)
+            index.sort()
+            return index
+        merged: List[Tuple[str, int]] = []
+        start = 0
+        for item in items:
+            position = bisect_left(index, item, start)
+            merged.extend(index[start:position])
+            merged.append(item)
+            start = position
+        merged.extend(index[start:])
+        return merged
+
+    @staticmethod
+    def _remove_sorted(index: List[Tuple[str, int]], item: Tuple[str, int]):
+        position = bisect_left(index, item)
+        if position < len(index) and index[position] == item:
+            del index[position]
+
+    # -- Queries --------------------------------------------------------------
+
+    def lookup_number(self, number: str) -> List[Contact]:
+        """Contacts that own the given number (reverse lookup)"""
+        key = self.normalize_number(number)
+        with self._lock:
+            return [self._contacts[i] for i in self._by_phone.get(key, ())]
+
+    def find_by_name(self, name: str) -> List[Contact]:
+        """Contacts whose normalized name equals the given one"""
+        key = normalize_name(name)
+        with self._lock:
+            start, end = self._prefix_range(self._by_name, key)
+            return [self._contacts[i] for name_key, i in self._by_name[start:end] if name_key == key]
+
+    @staticmethod
+    def _prefix_range(index: List[Tuple[str, int]], prefix: str) -> Tuple[int, int]:
+        return bisect_left(index, (prefix,)), bisect_left(index, (prefix + _HIGH,))
+
+    def search(self, query: str, limit: int = 50) -> List[Contact]:
+        """Ranked search-as-you-type over names and phone numbers
+
+        Ranking: full name starts with the query, then every query word is a
+        prefix of some name word, then phone numbers starting with the digits.
+        Ties are broken alphabetically.
+        """
+        key = normalize_name(query)
+        if not key:
+            return []
+        with self._lock:
+            ranked: List[Contact] = []
+            seen: Set[int] = set()
+
+            # Rank 0: full-name prefix; the index is already in name order
+            start, end = self._prefix_range(self._by_name, key)
+            for _, contact_id in self._by_name[start:min(end, start + limit)]:
+                ranked.append(self._contacts[contact_id])
+                seen.add(contact_id)
+
+            # Rank 1: every query word prefixes a name word
+            if len(ranked) < limit:
+                # Intersect the id sets of each word's range, smallest range first
+                ranges = sorted(
+                    (self._prefix_range(self._by_token, word) for word in set(key.split())),
+                    key=lambda r: r[1] - r[0]
+                )
+                start, end = ranges[0]
+                ids = {contact_id for _, contact_id in self._by_token[start:end]}
+                for start, end in ranges[1:]:
+                    if not ids:
+                        break
+                    ids &= {contact_id for _, contact_id in self._by_token[start:end]}
+                ids -= seen
+                seen |= ids
+                candidates = [(self._contacts[i].name_key, i) for i in ids]
+                for _, contact_id in heapq.nsmallest(limit - len(ranked), candidates):
+                    ranked.append(self._contacts[contact_id])
+
+            # Rank 2: phone numbers starting with the typed digits, when the query looks like one
+            digits = "".join(c for c in query if c.isdigit())
+            if len(ranked) < limit and len(digits) >= 3 and len(digits) * 2 >= len(query.strip()):
+                start, end = self._prefix_range(self._by_digits, digits)
+                matches = []
+                for _, contact_id in self._by_digits[start:end]:
+                    if contact_id not in seen:
+                        seen.add(contact_id)
+                        contact = self._contacts[contact_id]
+                        matches.append((contact.name_key, contact_id))
+                for _, contact_id in heapq.nsmallest(limit - len(ranked), matches):
+                    ranked.append(self._contacts[contact_id])
+
+            return ranked
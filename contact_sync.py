@@ -0,0 +1,406 @@
+"""
+Incremental contact sync from Phone Link's local contact database.
+
+Phone Link keeps the contacts it copies from the phone in a SQLite database under
+its package directory. A ContactSource reads that database read-only, or an
+exported copy of it, or a vCard export. ContactSync mirrors the source into a
+ContactStore:
+
+- A refresh first compares the source files' size and modification time with the
+  last refresh. If nothing changed, it does nothing.
+- Otherwise it reads the rows and hashes each contact's name and numbers. Only
+  contacts whose hash changed are normalized and written to the store. New
+  contacts are added in one batch, and vanished ones are deleted.
+
+The Phone Link schema is undocumented. The table and column names in
+PHONE_LINK_SCHEMA match current versions and can be overridden for others.
+"""
+
+import glob
+import hashlib
+import os
+import shutil
+import sqlite3
+import tempfile
+import threading
+import time
+from pathlib import Path
+from typing import Callable, Dict, Iterable, Iterator, List, NamedTuple, Optional, Sequence, Tuple
+
+from contact_store import ContactStore, Phone
+from metrics import REGISTRY, MetricsRegistry
+from phone_numbers import PhoneNumberNormalizer
+
+# Environment override: an exported contacts database (.db/.sqlite) or vCard file (.vcf)
+CONTACTS_PATH_ENV = "AI_CALL_ASSISTANT_CONTACTS"
+
+PHONE_LINK_DB_GLOB = os.path.join(
+    "Packages", "Microsoft.YourPhone_8wekyb3d8bbwe", "LocalCache", "Indexed", "*", "System", "Database", "contacts.db"
+)
+
+
+class SourceContact(NamedTuple):
+    """A contact as read from a source; source_id is stable across refreshes"""
+    source_id: str
+    name: str
+    phones: Tuple[Phone, ...]
+
+    def digest(self) -> bytes:
+        h = hashlib.blake2b(digest_size=16)
+        h.update(self.name.encode("utf-8", "surrogatepass"))
+        for label, number in self.phones:
+            h.update(b"\0" + label.encode("utf-8", "surrogatepass") + b"\1" + number.encode("utf-8", "surrogatepass"))
+        return h.digest()
+
+
+class SqliteSchema(NamedTuple):
+    contact_table: str
+    contact_id: str
+    display_name: str
+    phone_table: str
+    phone_contact_id: str
+    phone_number: str
+    phone_type: str
+
+
+PHONE_LINK_SCHEMA = SqliteSchema(
+    contact_table="contact", contact_id="contact_id", display_name="display_name",
+    phone_table="phonenumber", phone_contact_id="contact_id", phone_number="phone_number",
+    phone_type="phone_number_type",
+)
+
+# Android ContactsContract.CommonDataKinds.Phone.TYPE values
+PHONE_TYPES = {"1": "home", "2": "mobile", "3": "work", "4": "work fax", "5": "home fax", "6": "pager", "12": "main"}
+
+# vCard TYPE parameters, most specific first
+VCARD_TYPES = (("cell", "mobile"), ("iphone", "mobile"), ("fax", "fax"), ("pager", "pager"),
+               ("work", "work"), ("home", "home"), ("main", "main"))
+
+
+class ContactSource:
+    """Where contacts are synced from"""
+
+    def __init__(self, path: Path):
+        self.path = Path(path)
+
+    def signature(self) -> Optional[Tuple]:
+        """Cheap fingerprint of the source files; None if the source is missing"""
+        parts = []
+        for path in self.files():
+            try:
+                stat = path.stat()
+            except OSError:
+                if path == self.path:
+                    return None
+                continue  # Optional side files (the WAL) come and go
+            parts.append((path.name, stat.st_mtime_ns, stat.st_size))
+        return tuple(parts)
+
+    def files(self) -> List[Path]:
+        return [self.path]
+
+    def read(self) -> Iterator[SourceContact]:
+        raise NotImplementedError
+
+    def __repr__(self):
+        return f"{type(self).__name__}({str(self.path)!r})"
+
+
+class SqliteContactSource(ContactSource):
+    """Phone Link's contacts.db, or an exported copy, opened read-only"""
+
+    def __init__(self, path: Path, schema: SqliteSchema = PHONE_LINK_SCHEMA):
+        super().__init__(path)
+        self.schema = schema
+
+    def files(self) -> List[Path]:
+        # Phone Link writes in WAL mode: recent changes may only be in the -wal file
+        return [self.path, self.path.with_name(self.path.name + "-wal")]
+
+    def read(self) -> Iterator[SourceContact]:
+        with self._open() as (db, _):
+            yield from self._read_rows(db)
+
+    def _open(self):
+        return _ReadOnlyDatabase(self)
+
+    def _read_rows(self, db: sqlite3.Connection) -> Iterator[SourceContact]:
+        s = self.schema
+        # Ordered by contact, so each contact's numbers arrive together
+        rows = db.execute(
+            f"SELECT c.{s.contact_id}, c.{s.display_name}, p.{s.phone_number}, p.{s.phone_type} "
+            f"FROM {s.contact_table} c LEFT JOIN {s.phone_table} p ON p.{s.phone_contact_id} = c.{s.contact_id} "
+            f"ORDER BY c.{s.contact_id}"
+        )
+        current_id = None
+        name = ""
+        phones: List[Phone] = []
+        for contact_id, display_name, number, phone_type in rows:
+            if contact_id != current_id:
+                if current_id is not None:
+                    yield SourceContact(str(current_id), name, tuple(phones))
+                current_id, name, phones = contact_id, display_name or "Unknown", []
+            if number:
+                phones.append((PHONE_TYPES.get(str(phone_type), "other"), str(number)))
+        if current_id is not None:
+            yield SourceContact(str(current_id), name, tuple(phones))
+
+
+class _ReadOnlyDatabase:
+    """Opens the database with mode=ro; if Phone Link holds it in a way that prevents
+    that, reads a private copy of the database and its WAL instead"""
+
+    def __init__(self, source: SqliteContactSource):
+        self.source = source
+        self.db: Optional[sqlite3.Connection] = None
+        self.copy_dir: Optional[str] = None
+
+    def __enter__(self) -> Tuple[sqlite3.Connection, bool]:
+        try:
+            self.db = sqlite3.connect(f"{self.source.path.resolve().as_uri()}?mode=ro", uri=True)
+            self.db.execute(f"SELECT 1 FROM {self.source.schema.contact_table} LIMIT 1").fetchall()
+            return self.db, False
+        except sqlite3.OperationalError:
+            if self.db is not None:
+                self.db.close()
+        self.copy_dir = tempfile.mkdtemp(prefix="contacts-")
+        for path in self.source.files():
+            if path.exists():
+                shutil.copy2(path, os.path.join(self.copy_dir, path.name))
+        copy = Path(self.copy_dir) / self.source.path.name
+        self.db = sqlite3.connect(copy.as_uri(), uri=True)
+        return self.db, True
+
+    def __exit__(self, *exc):
+        if self.db is not None:
+            self.db.close()
+        if self.copy_dir is not None:
+            shutil.rmtree(self.copy_dir, ignore_errors=True)
+
+
+def unfold_lines(lines: Iterable[str]) -> Iterator[str]:
+    """Join vCard continuation lines (starting with a space or tab) to the line before"""
+    pending: Optional[str] = None
+    for line in lines:
+        line = line.rstrip("\r\n")
+        if line[:1] in (" ", "\t") and pending is not None:
+            pending += line[1:]
+            continue
+        if pending is not None:
+            yield pending
+        pending = line
+    if pending is not None:
+        yield pending
+
+
+def _vcard_unescape(value: str) -> str:
+    return value.replace("\\n", " ").replace("\\N", " ").replace("\\,", ",").replace("\\;", ";").replace("\\\\", "\\")
+
+
+def _vcard_label(params: Sequence[str]) -> str:
+    types = set()
+    for param in params:
+        name, _, value = param.partition("=")
+        values = value if value else name  # vCard 2.1 allows bare types: TEL;CELL:...
+        types.update(t.strip('"').lower() for t in values.split(","))
+    for vcard_type, label in VCARD_TYPES:
+        if vcard_type in types:
+            return label
+    return "other"
+
+
+def iter_vcards(lines: Iterable[str]) -> Iterator[Tuple[Optional[str], str, Tuple[Phone, ...]]]:
+    """Stream (uid, name, phones) from vCard 2.1/3.0/4.0 text, one card at a time"""
+    uid = None
+    formatted = structured = ""
+    phones: List[Phone] = []
+    in_card = False
+    for line in unfold_lines(lines):
+        head, sep, value = line.partition(":")
+        if not sep:
+            continue
+        name, *params = head.split(";")
+        name = name.rpartition(".")[2].upper()  # Drop group prefixes such as "item1."
+        if name == "BEGIN" and value.strip().upper() == "VCARD":
+            uid, formatted, structured, phones, in_card = None, "", "", [], True
+        elif not in_card:
+            continue
+        elif name == "END":
+            in_card = False
+            display = formatted or structured or (phones[0][1] if phones else "")
+            if display:
+                yield uid, display, tuple(phones)
+        elif name == "FN":
+            formatted = _vcard_unescape(value).strip()
+        elif name == "N" and not formatted:
+            # Family;Given;Additional;Prefix;Suffix
+            parts = [_vcard_unescape(part).strip() for part in value.split(";")]
+            parts += [""] * (5 - len(parts))
+            structured = " ".join(p for p in (parts[3], parts[1], parts[2], parts[0], parts[4]) if p)
+        elif name == "TEL":
+            number = value.strip()
+            if number.lower().startswith("tel:"):  # vCard 4.0 VALUE=uri
+                number = number[4:].split(";", 1)[0]
+            if number:
+                phones.append((_vcard_label(params), number))
+        elif name == "UID":
+            uid = value.strip()
+
+
+class VCardContactSource(ContactSource):
+    """A .vcf export; contacts without a UID are identified by name and position"""
+
+    def read(self) -> Iterator[SourceContact]:
+        seen: Dict[str, int] = {}
+        with open(self.path, encoding="utf-8", errors="replace", newline="") as f:
+            for uid, name, phones in iter_vcards(f):
+                if uid is None:
+                    seen[name] = seen.get(name, 0) + 1
+                    uid = f"{name}#{seen[name]}"
+                yield SourceContact(uid, name, phones)
+
+
+def source_for_path(path: Path) -> ContactSource:
+    if Path(path).suffix.lower() in (".vcf", ".vcard"):
+        return VCardContactSource(path)
+    return SqliteContactSource(path)
+
+
+def find_contact_source() -> Optional[ContactSource]:
+    """The exported file named in AI_CALL_ASSISTANT_CONTACTS, else Phone Link's own database"""
+    override = os.environ.get(CONTACTS_PATH_ENV)
+    if override:
+        return source_for_path(Path(override))
+    local_app_data = os.environ.get("LOCALAPPDATA")
+    if not local_app_data:
+        return None
+    # One directory per paired phone; the most recently updated is the current one
+    candidates = glob.glob(os.path.join(local_app_data, PHONE_LINK_DB_GLOB))
+    if not candidates:
+        return None
+    return SqliteContactSource(Path(max(candidates, key=os.path.getmtime)))
+
+
+class SyncResult(NamedTuple):
+    added: int
+    updated: int
+    removed: int
+    unchanged: int
+    skipped: bool      # The source had not changed, so nothing was read
+    seconds: float
+
+    @property
+    def changed(self) -> bool:
+        return bool(self.added or self.updated or self.removed)
+
+    def describe(self) -> str:
+        if self.skipped:
+            return "contacts unchanged"
+        return (f"{self.added} added, {self.updated} updated, {self.removed} removed, "
+                f"{self.unchanged} unchanged in {self.seconds * 1000:.0f} ms")
+
+
+class ContactSync:
+    """Keeps a ContactStore in step with a ContactSource, applying only the differences"""
+
+    def __init__(self, store: ContactStore, source: ContactSource,
+                 normalizer: Optional[PhoneNumberNormalizer] = None, interval: float = 30.0,
+                 on_change: Optional[Callable[[SyncResult], None]] = None,
+                 on_error: Optional[Callable[[Exception], None]] = None,
+                 metrics: Optional[MetricsRegistry] = None):
+        self.store = store
+        self.source = source
+        self.normalizer = normalizer
+        self.interval = interval
+        self.on_change = on_change
+        self.on_error = on_error
+        self.metrics = metrics if metrics is not None else REGISTRY
+        self._known: Dict[str, Tuple[bytes, int]] = {}  # source id -> (content digest, store id)
+        self._signature: Optional[Tuple] = None
+        self._refresh_lock = threading.Lock()
+        self._wake = threading.Event()
+        self._running = False
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self):
+        """Sync now, then check the source every interval on a background thread"""
+        if self._running:
+            return
+        self._running = True
+        self._thread = threading.Thread(target=self._run, name="contact-sync", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._running = False
+        self._wake.set()
+
+    def trigger(self):
+        """Check the source now instead of at the next interval"""
+        self._wake.set()
+
+    def _run(self):
+        while self._running:
+            try:
+                result = self.refresh()
+                if result.changed and self.on_change is not None:
+                    self.on_change(result)
+            except (OSError, sqlite3.Error, ValueError) as e:
+                self.metrics.inc("errors_total", operation="contact_sync")
+                if self.on_error is not None:
+                    self.on_error(e)
+            self._wake.wait(self.interval)
+            self._wake.clear()
+
+    def refresh(self, force: bool = False) -> SyncResult:
+        """Apply the source's changes since the last refresh to the store"""
+        with self._refresh_lock, self.metrics.time("contact_sync_seconds") as timing:
+            started = time.perf_counter()
+            signature = self.source.signature()
+            if signature is None:
+                raise FileNotFoundError(f"Contact source not found: {self.source.path}")
+            if not force and signature == self._signature:
+                timing.outcome = "skipped"
+                return SyncResult(0, 0, 0, len(self._known), True, time.perf_counter() - started)
+
+            new: List[Tuple[str, bytes, str, Sequence[Phone]]] = []
+            updated = unchanged = 0
+            seen = set()
+            for contact in self.source.read():
+                if contact.source_id in seen:
+                    continue
+                seen.add(contact.source_id)
+                digest = contact.digest()
+                known = self._known.get(contact.source_id)
+                if known is not None and known[0] == digest:
+                    unchanged += 1
+                    continue
+                name, phones = self._normalize(contact)
+                if known is None:
+                    new.append((contact.source_id, digest, name, phones))
+                elif self.store.update(known[1], name, phones) is not None:
+                    self._known[contact.source_id] = (digest, known[1])
+                    updated += 1
+                else:
+                    new.append((contact.source_id, digest, name, phones))  # Removed from the store meanwhile
+
+            removed = 0
+            for source_id in [source_id for source_id in self._known if source_id not in seen]:
+                _, contact_id = self._known.pop(source_id)
+                self.store.delete(contact_id)
+                removed += 1
+
+            if new:
+                added = self.store.add_many((name, phones) for _, _, name, phones in new)
+                for (source_id, digest, _, _), contact in zip(new, added):
+                    self._known[source_id] = (digest, contact.id)
+
+            self._signature = signature
+            result = SyncResult(len(new), updated, removed, unchanged, False, time.perf_counter() - started)
+            timing.outcome = "changed" if result.changed else "unchanged"
+            return result
+
+    def _normalize(self, contact: SourceContact) -> Tuple[str, Sequence[Phone]]:
+        if self.normalizer is None:
+            return contact.name, contact.phones
+        # One record at a time, so numbers repeated within the contact are dropped
+        return self.normalizer.normalize_contacts([(contact.name, contact.phones)])[0]
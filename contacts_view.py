@@ -0,0 +1,216 @@
+"""
+Virtualized contacts list widget.
+
+Only the visible rows plus an overscan margin exist as canvas items, whatever the
+number of contacts. Scrolling within the overscan margin just moves the existing
+items; scrolling further re-labels the same pool of items for the new window. Rows
+are contact ids, so selection and activation map back to contacts rather than to
+display names. New row sets are consumed in chunks scheduled with after(), so a
+large result never blocks the event loop in one go.
+"""
+
+import math
+import tkinter as tk
+from tkinter import ttk
+from typing import Callable, Iterable, Iterator, List, Optional
+
+
+class VirtualContactList(ttk.Frame):
+    """Scrollable list of contact ids that draws only the rows on screen"""
+
+    def __init__(self, master, render: Callable[[int], str], row_height: int = 20,
+                 overscan: int = 10, chunk_size: int = 2000, font=None, **kwargs):
+        super().__init__(master, **kwargs)
+        self.render = render
+        self.row_height = row_height
+        self.overscan = overscan
+        self.chunk_size = chunk_size
+        self.font = font or ("Arial", 9)
+
+        self.rows: List[int] = []
+        self.selected: Optional[int] = None  # Row index
+        self._top = 0  # Pixel offset of the viewport into the full list
+        self._window_start = 0  # Row index drawn by the first pooled item
+        self._pool: List[int] = []  # Canvas text item ids
+        self._loading: Optional[Iterator[int]] = None
+        self._load_job: Optional[str] = None
+        self._on_loaded: Optional[Callable[[int], None]] = None
+
+        self.canvas = tk.Canvas(self, highlightthickness=0, background="white", height=10 * row_height)
+        self.scrollbar = ttk.Scrollbar(self, command=self._on_scrollbar)
+        self.scrollbar.pack(side=tk.RIGHT, fill=tk.Y)
+        self.canvas.pack(side=tk.LEFT, fill=tk.BOTH, expand=True)
+        self._highlight = self.canvas.create_rectangle(0, 0, 0, 0, fill="#cce4ff", outline="", state=tk.HIDDEN)
+
+        self.canvas.bind("<Configure>", lambda e: self._rebuild_pool())
+        self.canvas.bind("<Button-1>", self._on_click)
+        self.canvas.bind("<MouseWheel>", self._on_mousewheel)
+        self.canvas.bind("<Button-4>", lambda e: self.scroll_rows(-3))
+        self.canvas.bind("<Button-5>", lambda e: self.scroll_rows(3))
+        self.canvas.bind("<Up>", lambda e: self.select(max(0, (1 if self.selected is None else self.selected) - 1)))
+        self.canvas.bind("<Down>", lambda e: self.select(
+            min(len(self.rows) - 1, (-1 if self.selected is None else self.selected) + 1)
+        ))
+        self.canvas.bind("<Prior>", lambda e: self.scroll_rows(-self._visible_rows()))
+        self.canvas.bind("<Next>", lambda e: self.scroll_rows(self._visible_rows()))
+
+    # -- Data -----------------------------------------------------------------
+
+    def set_rows(self, ids: Iterable[int], on_loaded: Optional[Callable[[int], None]] = None):
+        """Replace the rows; ids are consumed chunk_size at a time between frames"""
+        self.cancel_loading()
+        self.rows = []
+        self.selected = None
+        self._top = 0
+        self._loading = iter(ids)
+        self._on_loaded = on_loaded
+        self._load_chunk()
+
+    def clear(self):
+        self.set_rows([])
+
+    def cancel_loading(self):
+        if self._load_job is not None:
+            self.after_cancel(self._load_job)
+        self._load_job = None
+        self._loading = None
+
+    @property
+    def loading(self) -> bool:
+        return self._loading is not None
+
+    def _load_chunk(self):
+        self._load_job = None
+        chunk = []
+        for contact_id in self._loading:
+            chunk.append(contact_id)
+            if len(chunk) >= self.chunk_size:
+                break
+        self.rows.extend(chunk)
+        # Only redraw if the new rows can be on screen; the scrollbar always changes
+        if len(self.rows) - len(chunk) < self._window_start + len(self._pool):
+            self._render()
+        self._update_scrollbar()
+        if len(chunk) >= self.chunk_size:
+            self._load_job = self.after(1, self._load_chunk)
+        else:
+            self._loading = None
+            if self._on_loaded is not None:
+                self._on_loaded(len(self.rows))
+
+    def refresh(self):
+        """Redraw the visible rows, e.g. after the underlying contacts changed"""
+        self._render()
+
+    # -- Geometry and scrolling ----------------------------------------------
+
+    def _viewport_height(self) -> int:
+        return max(1, self.canvas.winfo_height())
+
+    def _visible_rows(self) -> int:
+        return max(1, math.ceil(self._viewport_height() / self.row_height))
+
+    def _max_top(self) -> int:
+        return max(0, len(self.rows) * self.row_height - self._viewport_height())
+
+    def _rebuild_pool(self):
+        needed = self._visible_rows() + 2 * self.overscan + 1
+        while len(self._pool) < needed:
+            self._pool.append(self.canvas.create_text(
+                4, 0, anchor=tk.NW, text="", font=self.font, tags=("row",)
+            ))
+        while len(self._pool) > needed:
+            self.canvas.delete(self._pool.pop())
+        self.scroll_to(self._top)
+        self._render()
+
+    def scroll_rows(self, count: int):
+        self.scroll_to(self._top + count * self.row_height)
+
+    def scroll_to(self, top: float):
+        top = int(min(max(0, top), self._max_top()))
+        delta = top - self._top
+        self._top = top
+        first = top // self.row_height
+        last = (top + self._viewport_height()) // self.row_height
+        if self._window_start <= first and last < self._window_start + len(self._pool):
+            # Still inside the overscan window: move the existing items
+            if delta:
+                self.canvas.move("row", 0, -delta)
+                self.canvas.move(self._highlight, 0, -delta)
+        else:
+            self._render()
+        self._update_scrollbar()
+
+    def _render(self):
+        first = self._top // self.row_height
+        self._window_start = max(0, first - self.overscan)
+        for slot, item in enumerate(self._pool):
+            index = self._window_start + slot
+            y = index * self.row_height - self._top
+            if index < len(self.rows):
+                self.canvas.itemconfigure(item, text=self.render(self.rows[index]), state=tk.NORMAL)
+                self.canvas.coords(item, 4, y + 2)
+            else:
+                self.canvas.itemconfigure(item, state=tk.HIDDEN)
+        self._place_highlight()
+
+    def _place_highlight(self):
+        if self.selected is None or self.selected >= len(self.rows):
+            self.canvas.itemconfigure(self._highlight, state=tk.HIDDEN)
+            return
+        y = self.selected * self.row_height - self._top
+        self.canvas.coords(self._highlight, 0, y, self.canvas.winfo_width(), y + self.row_height)
+        self.canvas.itemconfigure(self._highlight, state=tk.NORMAL)
+        self.canvas.tag_lower(self._highlight)
+
+    def _update_scrollbar(self):
+        total = len(self.rows) * self.row_height
+        if total <= 0:
+            self.scrollbar.set(0.0, 1.0)
+            return
+        self.scrollbar.set(self._top / total, min(1.0, (self._top + self._viewport_height()) / total))
+
+    def _on_scrollbar(self, action: str, amount: str, unit: Optional[str] = None):
+        if action == "moveto":
+            self.scroll_to(float(amount) * len(self.rows) * self.row_height)
+        elif action == "scroll":
+            step = self._visible_rows() if unit == "pages" else 1
+            self.scroll_rows(int(amount) * step)
+
+    def _on_mousewheel(self, event):
+        self.scroll_rows(-3 if event.delta > 0 else 3)
+
+    # -- Selection ------------------------------------------------------------
+
+    def row_at(self, y: int) -> Optional[int]:
+        """Row index under a y coordinate of the canvas"""
+        index = int((y + self._top) // self.row_height)
+        return index if 0 <= index < len(self.rows) else None
+
+    def contact_id_at(self, y: int) -> Optional[int]:
+        index = self.row_at(y)
+        return self.rows[index] if index is not None else None
+
+    def selected_id(self) -> Optional[int]:
+        if self.selected is None or self.selected >= len(self.rows):
+            return None
+        return self.rows[self.selected]
+
+    def select(self, index: int):
+        if not 0 <= index < len(self.rows):
+            return
+        self.selected = index
+        # Keep the selection on screen
+        y = index * self.row_height
+        if y < self._top:
+            self.scroll_to(y)
+        elif y + self.row_height > self._top + self._viewport_height():
+            self.scroll_to(y + self.row_height - self._viewport_height())
+        self._place_highlight()
+
+    def _on_click(self, event):
+        self.canvas.focus_set()
+        index = self.row_at(event.y)
+        if index is not None:
+            self.select(index)
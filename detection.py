@@ -0,0 +1,112 @@
+"""
+Concurrent, deadline-bounded probe engine.
+
+All probes of one detection run start at the same time. As soon as the answer is
+conclusive the remaining probes are cancelled, and the whole run never takes longer
+than its deadline, no matter how slow an individual probe is. Every probe's duration
+and outcome is recorded in the metrics registry.
+"""
+
+import asyncio
+import time
+from typing import Awaitable, Callable, Coroutine, Dict, List, NamedTuple, Optional
+
+from metrics import REGISTRY, MetricsRegistry
+
+
+class Probe(NamedTuple):
+    """A named asynchronous check; lower priority values are preferred"""
+    name: str
+    run: Callable[[], Awaitable[bool]]
+    priority: int = 0
+
+
+class DetectionResult(NamedTuple):
+    """Outcome of a probe race"""
+    winner: Optional[str]            # Name of the preferred positive probe, if any
+    results: Dict[str, bool]         # Probes that finished before the race ended
+    timed_out: bool
+    elapsed: float
+
+
+_UNDECIDED = object()
+
+
+def _conclusive(ordered: List[Probe], results: Dict[str, bool]):
+    """Return the winning probe name, None if all are negative, or _UNDECIDED"""
+    positive = next((probe for probe in ordered if results.get(probe.name)), None)
+    for probe in ordered:
+        if positive is not None and probe.priority >= positive.priority:
+            return positive.name
+        if probe.name not in results:
+            # A probe with a strictly better priority is still running, so the positive cannot win yet
+            return _UNDECIDED
+    return None
+
+
+def _record_probes(metrics: MetricsRegistry, tasks: Dict[asyncio.Future, Probe],
+                   finished: Dict[asyncio.Future, float], started: float, timed_out: bool):
+    for task, probe in tasks.items():
+        if task.cancelled():
+            outcome = "timeout" if timed_out else "cancelled"
+        elif task.exception() is not None:
+            outcome = "error"
+        else:
+            outcome = "hit" if task.result() else "miss"
+        metrics.observe(
+            "probe_duration_seconds", finished.get(task, time.perf_counter()) - started, outcome, probe=probe.name
+        )
+
+
+async def race_probes(probes: List[Probe], deadline: float,
+                      metrics: Optional[MetricsRegistry] = None) -> DetectionResult:
+    """Run probes concurrently and return as soon as the answer is conclusive
+
+    A positive result wins once every probe with a strictly better priority has
+    answered negatively; probes of equal priority do not hold it back. Exceptions count as negative answers. When the deadline expires
+    the best positive seen so far wins.
+    """
+    loop = asyncio.get_running_loop()
+    started = time.perf_counter()
+    end = loop.time() + deadline
+    ordered = sorted(probes, key=lambda p: p.priority)
+    tasks = {asyncio.ensure_future(probe.run()): probe for probe in probes}
+    finished: Dict[asyncio.Future, float] = {}
+    for task in tasks:
+        task.add_done_callback(lambda t: finished.setdefault(t, time.perf_counter()))
+    pending = set(tasks)
+    results: Dict[str, bool] = {}
+    winner = _UNDECIDED
+    timed_out = False
+    try:
+        while pending:
+            remaining = end - loop.time()
+            if remaining <= 0:
+                timed_out = True
+                break
+            done, pending = await asyncio.wait(
+                pending, timeout=remaining, return_when=asyncio.FIRST_COMPLETED
+            )
+            for task in done:
+                try:
+                    results[tasks[task].name] = bool(task.result())
+                except Exception:
+                    results[tasks[task].name] = False  # Recorded as an "error" outcome
+            winner = _conclusive(ordered, results)
+            if winner is not _UNDECIDED:
+                break
+    finally:
+        for task in pending:
+            task.cancel()
+        if pending:
+            await asyncio.wait(pending)
+        _record_probes(metrics if metrics is not None else REGISTRY, tasks, finished, started, timed_out)
+
+    if winner is _UNDECIDED:
+        winner = next((p.name for p in ordered if results.get(p.name)), None)
+    return DetectionResult(winner, results, timed_out, time.perf_counter() - started)
+
+
+def run_sync(coro: Coroutine):
+    """Run a coroutine to completion from synchronous code (threads without a loop)"""
+    return asyncio.run(coro)
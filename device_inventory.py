@@ -0,0 +1,196 @@
+"""
+Device inventory: one PnP enumeration per detection cycle.
+
+A single PowerShell pass lists the Bluetooth, USB, portable (WPD) and Android USB
+devices as tab-separated records. The records are keyed by PnP instance ID, so
+each snapshot is compared with the previous one in a single pass over two dicts.
+The comparison yields connect, disconnect and change events. DeviceRegistry keeps
+the state of every phone seen, so several paired phones are tracked from the same
+enumeration.
+"""
+
+import re
+import threading
+import time
+from typing import Callable, Dict, Iterable, List, NamedTuple, Optional, Tuple
+
+# Present USB-side devices plus all Bluetooth devices (paired phones that are out of
+# range are listed with a non-OK status, which is how disconnects show up)
+INVENTORY_SCRIPT = r"""
+Get-PnpDevice -Class Bluetooth,USB,WPD,AndroidUsbDeviceClass -ErrorAction SilentlyContinue |
+    Where-Object { $_.Status -eq 'OK' -or $_.Class -eq 'Bluetooth' } |
+    ForEach-Object { "{0}`t{1}`t{2}`t{3}" -f $_.InstanceId, $_.Class, $_.Status, $_.FriendlyName }
+"""
+
+USB = "USB"
+BLUETOOTH = "Bluetooth"
+
+_PHONE_NAME = re.compile(r"android|iphone|phone|mobile|galaxy|pixel", re.IGNORECASE)
+# Bluetooth services only phones expose: Hands-Free Audio Gateway and Phonebook Access server
+_PHONE_SERVICES = ("{0000111F-", "{0000112F-")
+
+
+class DeviceRecord(NamedTuple):
+    """One PnP device from an inventory pass"""
+    instance_id: str
+    device_class: str
+    status: str
+    name: str
+
+    @property
+    def transport(self) -> str:
+        if self.device_class == "Bluetooth" or self.instance_id.startswith(("BTHENUM\\", "BTHLE")):
+            return BLUETOOTH
+        return USB
+
+    @property
+    def ok(self) -> bool:
+        return self.status == "OK"
+
+    @property
+    def is_phone(self) -> bool:
+        return bool(
+            self.device_class == "AndroidUsbDeviceClass"
+            or _PHONE_NAME.search(self.name)
+            or any(service in self.instance_id for service in _PHONE_SERVICES)
+        )
+
+
+Snapshot = Dict[str, DeviceRecord]
+
+
+def parse_inventory(output: str) -> Snapshot:
+    """Records from INVENTORY_SCRIPT output, keyed by upper-cased instance ID"""
+    snapshot: Snapshot = {}
+    for line in output.splitlines():
+        fields = line.rstrip("\r").split("\t", 3)
+        if len(fields) < 3 or not fields[0]:
+            continue
+        instance_id, device_class, status = fields[0].upper(), fields[1], fields[2]
+        snapshot[instance_id] = DeviceRecord(instance_id, device_class, status, fields[3] if len(fields) > 3 else "")
+    return snapshot
+
+
+class DeviceChange(NamedTuple):
+    """kind is 'connected', 'disconnected' or 'changed'"""
+    kind: str
+    record: DeviceRecord
+    previous: Optional[DeviceRecord]
+
+
+def diff_snapshots(previous: Snapshot, current: Snapshot) -> List[DeviceChange]:
+    """Connect, disconnect and change events between two snapshots, in O(n)
+
+    A device counts as connected while its status is OK. Devices that disappear
+    from the inventory, or stay listed but stop being OK, are disconnected.
+    """
+    changes: List[DeviceChange] = []
+    for instance_id, record in current.items():
+        old = previous.get(instance_id)
+        if old == record:
+            continue
+        was_ok = old is not None and old.ok
+        if record.ok and not was_ok:
+            changes.append(DeviceChange("connected", record, old))
+        elif was_ok and not record.ok:
+            changes.append(DeviceChange("disconnected", record, old))
+        elif old is not None:
+            changes.append(DeviceChange("changed", record, old))
+    for instance_id, old in previous.items():
+        if instance_id not in current and old.ok:
+            changes.append(DeviceChange("disconnected", old, old))
+    return changes
+
+
+class DeviceState:
+    """What the registry knows about one device"""
+
+    __slots__ = ("record", "connected", "first_seen", "last_seen", "last_change")
+
+    def __init__(self, record: DeviceRecord, now: float):
+        self.record = record
+        self.connected = record.ok
+        self.first_seen = now
+        self.last_seen = now
+        self.last_change = now
+
+    def to_dict(self) -> Dict:
+        return {
+            "instance_id": self.record.instance_id,
+            "name": self.record.name,
+            "transport": self.record.transport,
+            "connected": self.connected,
+            "last_seen": self.last_seen,
+        }
+
+
+class DeviceRegistry:
+    """Per-device state for every phone seen, updated from inventory snapshots"""
+
+    def __init__(self, clock: Callable[[], float] = time.time):
+        self.clock = clock
+        self._snapshot: Snapshot = {}
+        self._phones: Dict[str, DeviceState] = {}
+        self._bluetooth_enabled = False
+        self._lock = threading.Lock()
+        self.listeners: List[Callable[[List[DeviceChange]], None]] = []
+        self.inventories = 0
+
+    def apply(self, snapshot: Snapshot) -> List[DeviceChange]:
+        """Record a new inventory pass; returns the changes to phones since the last one"""
+        now = self.clock()
+        with self._lock:
+            changes = [change for change in diff_snapshots(self._snapshot, snapshot) if change.record.is_phone]
+            self._snapshot = snapshot
+            self.inventories += 1
+            # Any working Bluetooth device means the radio is on
+            self._bluetooth_enabled = any(r.ok and r.device_class == "Bluetooth" for r in snapshot.values())
+            for change in changes:
+                state = self._phones.get(change.record.instance_id)
+                if state is None:
+                    state = self._phones[change.record.instance_id] = DeviceState(change.record, now)
+                state.record = change.record
+                state.connected = change.kind != "disconnected" and change.record.ok
+                state.last_change = now
+            for instance_id in snapshot:
+                state = self._phones.get(instance_id)
+                if state is not None:
+                    state.last_seen = now
+            listeners = list(self.listeners)
+        if changes:
+            for listener in listeners:
+                listener(changes)
+        return changes
+
+    def phones(self) -> List[DeviceState]:
+        """Every phone seen, connected ones first"""
+        with self._lock:
+            return sorted(self._phones.values(), key=lambda s: (not s.connected, s.record.name))
+
+    def connected_phones(self, transport: Optional[str] = None) -> List[DeviceRecord]:
+        with self._lock:
+            return [
+                s.record for s in self._phones.values()
+                if s.connected and (transport is None or s.record.transport == transport)
+            ]
+
+    @property
+    def bluetooth_enabled(self) -> bool:
+        return self._bluetooth_enabled
+
+    def connection(self) -> Tuple[bool, Optional[str]]:
+        """(connected, "USB" or "Bluetooth"), USB preferred when both are present
+
+        As with the earlier Bluetooth probe, an enabled Bluetooth radio counts as a
+        Bluetooth connection, since paired phones do not always have a phone-like name.
+        """
+        if self.connected_phones(USB):
+            return True, USB
+        if self.connected_phones(BLUETOOTH) or self._bluetooth_enabled:
+            return True, BLUETOOTH
+        return False, None
+
+    @staticmethod
+    def describe(changes: Iterable[DeviceChange]) -> List[str]:
+        return [f"{change.record.name or change.record.instance_id} ({change.record.transport}) {change.kind}"
+                for change in changes]
@@ -0,0 +1,272 @@
+"""
+Event-driven phone connection monitoring.
+
+Instead of re-running the full USB/Bluetooth detection on a fixed timer, the monitor
+subscribes to device arrival/removal notifications and only re-probes when one
+arrives. Bursts of notifications are coalesced into a single probe. When no event
+source is available the monitor falls back to adaptive polling: the interval grows
+while nothing changes and snaps back to the minimum after a change, with jitter so
+several instances do not probe in lockstep.
+"""
+
+import base64
+import logging
+import os
+import random
+import subprocess
+import threading
+import time
+from typing import Any, Callable, NamedTuple, Optional
+
+from log_pipeline import LOGGER_NAME
+from powershell_host import CREATE_NO_WINDOW, POWERSHELL, POWERSHELL_ARGS
+
+logger = logging.getLogger(LOGGER_NAME)
+
+
+class DeviceEvent(NamedTuple):
+    """A device notification; kind is 'arrival', 'removal', 'change' or 'lost'"""
+    kind: str
+    source: str
+    timestamp: float
+
+
+class DeviceEventSource:
+    """Interface for device-change notification sources"""
+
+    name = "base"
+
+    def start(self, callback: Callable[[DeviceEvent], None]) -> bool:
+        """Begin delivering events to callback; return False if unavailable
+
+        A source that fails after starting delivers a 'lost' event.
+        """
+        raise NotImplementedError
+
+    def stop(self):
+        pass
+
+    def _event(self, kind: str) -> DeviceEvent:
+        return DeviceEvent(kind, self.name, time.monotonic())
+
+
+# Subscribes to PnP device changes and Bluetooth device state changes and prints one
+# line per event. The parent PID is checked periodically so the watcher never
+# outlives the application.
+WMI_WATCH_SCRIPT = r"""
+Register-WmiEvent -Class Win32_DeviceChangeEvent -SourceIdentifier DeviceChange | Out-Null
+Register-WmiEvent -Query "SELECT * FROM __InstanceModificationEvent WITHIN 5 WHERE TargetInstance ISA 'Win32_PnPEntity' AND TargetInstance.PNPClass = 'Bluetooth'" -SourceIdentifier BluetoothChange | Out-Null
+[Console]::Out.WriteLine('READY')
+[Console]::Out.Flush()
+while ($true) {
+    $event = Wait-Event -Timeout 10
+    if ($null -eq $event) {
+        if (-not (Get-Process -Id __PARENT_PID__ -ErrorAction SilentlyContinue)) { break }
+        continue
+    }
+    if ($event.SourceIdentifier -eq 'DeviceChange') {
+        switch ($event.SourceEventArgs.NewEvent.EventType) {
+            2 { $kind = 'arrival' }
+            3 { $kind = 'removal' }
+            default { $kind = 'change' }
+        }
+    } else {
+        $kind = 'change'
+    }
+    Remove-Event -EventIdentifier $event.EventIdentifier
+    [Console]::Out.WriteLine($kind)
+    [Console]::Out.Flush()
+}
+"""
+
+
+class WmiDeviceEventSource(DeviceEventSource):
+    """Device notifications from WMI, delivered by a long-lived PowerShell watcher"""
+
+    name = "wmi"
+
+    def __init__(self):
+        self._process: Optional[subprocess.Popen] = None
+        self._stopping = False
+
+    def start(self, callback: Callable[[DeviceEvent], None]) -> bool:
+        self._stopping = False
+        script = WMI_WATCH_SCRIPT.replace("__PARENT_PID__", str(os.getpid()))
+        encoded = base64.b64encode(script.encode("utf-16-le")).decode("ascii")
+        try:
+            self._process = subprocess.Popen(
+                [POWERSHELL] + POWERSHELL_ARGS + ["-EncodedCommand", encoded],
+                stdin=subprocess.DEVNULL,
+                stdout=subprocess.PIPE,
+                stderr=subprocess.DEVNULL,
+                text=True,
+                bufsize=1,
+                creationflags=CREATE_NO_WINDOW
+            )
+        except OSError as e:
+            logger.warning("Error starting device event watcher: %s", e)
+            return False
+        threading.Thread(target=self._read_events, args=(self._process, callback), daemon=True).start()
+        return True
+
+    def _read_events(self, process: subprocess.Popen, callback: Callable[[DeviceEvent], None]):
+        try:
+            for line in process.stdout:
+                kind = line.strip()
+                if kind in ("arrival", "removal", "change"):
+                    callback(self._event(kind))
+        except (OSError, ValueError):
+            pass
+        if not self._stopping:
+            callback(self._event("lost"))
+
+    def stop(self):
+        self._stopping = True
+        process, self._process = self._process, None
+        if process is not None:
+            try:
+                process.kill()
+            except OSError:
+                pass
+
+
+class ScriptedEventSource(DeviceEventSource):
+    """Event source driven by tests and benchmarks through emit()"""
+
+    name = "scripted"
+
+    def __init__(self, available: bool = True):
+        self.available = available
+        self._callback: Optional[Callable[[DeviceEvent], None]] = None
+
+    def start(self, callback: Callable[[DeviceEvent], None]) -> bool:
+        if not self.available:
+            return False
+        self._callback = callback
+        return True
+
+    def emit(self, kind: str = "arrival"):
+        """Deliver an event as if the operating system had raised it"""
+        if self._callback is not None:
+            self._callback(self._event(kind))
+
+    def stop(self):
+        self._callback = None
+
+
+class AdaptivePoller:
+    """Polling interval that backs off while nothing changes"""
+
+    def __init__(self, min_interval: float = 2.0, max_interval: float = 60.0,
+                 backoff: float = 1.5, jitter: float = 0.1, rng: Optional[random.Random] = None):
+        self.min_interval = min_interval
+        self.max_interval = max_interval
+        self.backoff = backoff
+        self.jitter = jitter
+        self.interval = min_interval
+        self._rng = rng or random.Random()
+
+    def next_delay(self) -> float:
+        """Current interval with +/- jitter applied"""
+        spread = self.interval * self.jitter
+        return max(0.0, self.interval + self._rng.uniform(-spread, spread))
+
+    def unchanged(self):
+        self.interval = min(self.max_interval, self.interval * self.backoff)
+
+    def changed(self):
+        self.interval = self.min_interval
+
+
+class DeviceMonitor:
+    """Re-runs a probe when devices change and reports when its result changes
+
+    probe is called on the monitor thread; on_change receives every new result
+    that differs from the previous one (including the first).
+    """
+
+    def __init__(self, probe: Callable[[], Any], on_change: Callable[[Any], None],
+                 event_source: Optional[DeviceEventSource] = None,
+                 poller: Optional[AdaptivePoller] = None,
+                 debounce: float = 0.5, safety_interval: float = 300.0,
+                 on_event: Optional[Callable[[DeviceEvent], None]] = None):
+        self.probe = probe
+        self.on_change = on_change
+        self.event_source = event_source
+        self.poller = poller or AdaptivePoller()
+        self.debounce = debounce
+        # Even with events, probe occasionally in case a change raised no notification
+        self.safety_interval = safety_interval
+        self.on_event = on_event
+        self.last_value: Any = None
+        self.events_active = False
+        self.probe_count = 0
+        self.event_count = 0
+        self._has_value = False
+        self._wake = threading.Event()
+        self._stopped = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def mode(self) -> str:
+        return "events" if self.events_active else "polling"
+
+    def start(self):
+        """Subscribe to events (falling back to polling) and start the monitor thread"""
+        self._stopped.clear()
+        if self.event_source is not None:
+            self.events_active = self.event_source.start(self._on_event)
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stopped.set()
+        self._wake.set()
+        if self.event_source is not None:
+            self.event_source.stop()
+
+    def trigger(self):
+        """Request an immediate re-probe (e.g. after the user clicks Refresh)"""
+        self._on_event(DeviceEvent("change", "manual", time.monotonic()))
+
+    def _on_event(self, event: DeviceEvent):
+        if event.kind == "lost":
+            # The source died; keep watching by polling
+            self.events_active = False
+            self.poller.changed()
+        self.event_count += 1
+        if self.on_event is not None:
+            self.on_event(event)
+        self._wake.set()
+
+    def _run(self):
+        while not self._stopped.is_set():
+            timeout = self.safety_interval if self.events_active else self.poller.next_delay()
+            woken = self._wake.wait(timeout)
+            if self._stopped.is_set():
+                break
+            if woken:
+                self._coalesce()
+            self._probe_once()
+
+    def _coalesce(self):
+        """Wait until events stop arriving for `debounce` seconds"""
+        while True:
+            self._wake.clear()
+            if not self._wake.wait(self.debounce) or self._stopped.is_set():
+                break
+
+    def _probe_once(self):
+        self.probe_count += 1
+        try:
+            value = self.probe()
+        except Exception as e:
+            logger.warning("Error probing device state: %s", e, exc_info=True)
+            return
+        if self._has_value and value == self.last_value:
+            self.poller.unchanged()
+            return
+        self._has_value = True
+        self.last_value = value
+        self.poller.changed()
+        self.on_change(value)
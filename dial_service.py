@@ -0,0 +1,369 @@
+"""
+Local dial API for headless mode.
+
+A small asyncio HTTP/1.1 server on the loopback interface lets CRM tools and scripts
+on the same machine check status, place calls and search contacts without the GUI:
+
+    GET  /status[?force=1]        Phone Link and connection status (cached)
+    POST /dial                    {"number": "..."} or {"contact": "..."}, optional "wait";
+                                  "number" may also be a command such as "call mom mobile"
+    POST /dial/bulk               {"numbers": [...]}, optional "wait"
+    GET  /contacts?q=...&limit=N  Ranked contact search
+    GET  /metrics                 Prometheus text
+
+Every request needs "Authorization: Bearer <token>", where the token is read from a
+file in the data directory, so web pages open in a browser cannot place calls.
+Connections are kept alive and served concurrently. Blocking manager calls run on a
+small thread pool, and all clients share the manager's status cache, so a burst of
+status requests costs one probe.
+"""
+
+import asyncio
+import hmac
+import json
+import os
+import secrets
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from http import HTTPStatus
+from pathlib import Path
+from typing import Awaitable, Callable, Dict, Optional, Tuple
+from urllib.parse import parse_qs, urlsplit
+
+from call_resolver import is_command
+from contact_store import ContactStore
+from metrics import REGISTRY, MetricsRegistry
+
+DEFAULT_HOST = "127.0.0.1"
+DEFAULT_PORT = 47615
+LOOPBACK_HOSTS = ("127.0.0.1", "::1", "localhost")
+
+MAX_HEADER_LINES = 100
+MAX_BODY_BYTES = 1024 * 1024
+IDLE_TIMEOUT = 30.0  # Seconds a kept-alive connection may sit without a request
+
+
+class ServiceError(Exception):
+    """An error reported to the client as an HTTP status and JSON message"""
+
+    def __init__(self, status: HTTPStatus, message: str):
+        super().__init__(message)
+        self.status = status
+
+
+def load_or_create_token(path: Path) -> str:
+    """Read the API token, creating it (readable by the current user only) if missing"""
+    try:
+        token = path.read_text(encoding="ascii").strip()
+        if token:
+            return token
+    except OSError:
+        pass  # Not created yet
+    path.parent.mkdir(parents=True, exist_ok=True)
+    token = secrets.token_urlsafe(32)
+    fd = os.open(path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+    with os.fdopen(fd, "w", encoding="ascii") as f:
+        f.write(token)
+    return token
+
+
+Response = Tuple[HTTPStatus, object]
+Handler = Callable[[Dict[str, str], bytes], Awaitable[Response]]
+
+
+class DialService:
+    """HTTP front end for a PhoneLinkManager"""
+
+    def __init__(self, manager, token: str, contact_store: Optional[ContactStore] = None,
+                 host: str = DEFAULT_HOST, port: int = DEFAULT_PORT, max_bulk: int = 500,
+                 max_connections: int = 512, workers: int = 8, metrics: Optional[MetricsRegistry] = None):
+        if host not in LOOPBACK_HOSTS:
+            raise ValueError(f"Refusing to listen on non-loopback address {host!r}")
+        self.manager = manager
+        self.token = token
+        self.contact_store = contact_store if contact_store is not None else manager.contacts
+        self.host = host
+        self.port = port
+        self.max_bulk = max_bulk
+        self.max_connections = max_connections
+        self.metrics = metrics if metrics is not None else REGISTRY
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="service")
+        self._server: Optional[asyncio.AbstractServer] = None
+        self.contact_sync = None
+        self._connections = 0
+        self.requests = 0
+        self._routes: Dict[Tuple[str, str], Handler] = {
+            ("GET", "/status"): self.handle_status,
+            ("POST", "/dial"): self.handle_dial,
+            ("POST", "/dial/bulk"): self.handle_bulk_dial,
+            ("GET", "/contacts"): self.handle_contacts,
+            ("GET", "/metrics"): self.handle_metrics,
+        }
+
+    # -- Lifecycle ------------------------------------------------------------
+
+    async def start(self) -> Tuple[str, int]:
+        """Start listening; returns the bound address (port 0 picks a free port)"""
+        self._server = await asyncio.start_server(self._serve_connection, self.host, self.port)
+        self.port = self._server.sockets[0].getsockname()[1]
+        return self.host, self.port
+
+    async def serve_forever(self):
+        if self._server is None:
+            await self.start()
+        await self._server.serve_forever()
+
+    async def close(self):
+        if self._server is not None:
+            self._server.close()
+            await self._server.wait_closed()
+            self._server = None
+        if self.contact_sync is not None:
+            self.contact_sync.stop()
+        self._executor.shutdown(wait=False)
+
+    def start_contact_sync(self) -> bool:
+        """Keep the contact store in step with Phone Link's database, if there is one"""
+        self.contact_sync = self.manager.contact_sync(self.contact_store)
+        if self.contact_sync is None:
+            return False
+        self.contact_sync.start()
+        return True
+
+    async def load_contacts(self):
+        """Fill the contact store from the manager's contact source"""
+        records = await self._blocking(self.manager.load_contacts)
+        self.contact_store.clear()
+        self.contact_store.add_many(records)
+
+    def _blocking(self, fn, *args):
+        return asyncio.get_running_loop().run_in_executor(self._executor, fn, *args)
+
+    # -- HTTP -----------------------------------------------------------------
+
+    async def _serve_connection(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        self._connections += 1
+        try:
+            if self._connections > self.max_connections:
+                await self._respond(writer, HTTPStatus.SERVICE_UNAVAILABLE, {"error": "Too many connections"}, False)
+                return
+            keep_alive = True
+            while keep_alive:
+                try:
+                    request = await asyncio.wait_for(self._read_request(reader), IDLE_TIMEOUT)
+                except (asyncio.TimeoutError, asyncio.IncompleteReadError, ConnectionError):
+                    return
+                except ServiceError as e:
+                    await self._respond(writer, e.status, {"error": str(e)}, False)
+                    return
+                if request is None:
+                    return
+                method, target, headers, body, keep_alive = request
+                status, payload = await self._dispatch(method, target, headers, body)
+                await self._respond(writer, status, payload, keep_alive)
+        except ConnectionError:
+            return  # Client went away mid-response
+        finally:
+            self._connections -= 1
+            writer.close()
+
+    async def _read_request(self, reader: asyncio.StreamReader):
+        try:
+            request_line = await reader.readline()
+        except (ValueError, asyncio.LimitOverrunError):
+            raise ServiceError(HTTPStatus.REQUEST_URI_TOO_LONG, "Request line too long")
+        if not request_line:
+            return None  # Client closed the connection
+        try:
+            method, target, version = request_line.decode("latin-1").split()
+        except ValueError:
+            raise ServiceError(HTTPStatus.BAD_REQUEST, "Malformed request line")
+
+        headers: Dict[str, str] = {}
+        for _ in range(MAX_HEADER_LINES):
+            try:
+                line = await reader.readline()
+            except (ValueError, asyncio.LimitOverrunError):
+                raise ServiceError(HTTPStatus.REQUEST_HEADER_FIELDS_TOO_LARGE, "Header too long")
+            line = line.decode("latin-1").rstrip("\r\n")
+            if not line:
+                break
+            name, _, value = line.partition(":")
+            headers[name.strip().lower()] = value.strip()
+        else:
+            raise ServiceError(HTTPStatus.REQUEST_HEADER_FIELDS_TOO_LARGE, "Too many headers")
+
+        try:
+            length = int(headers.get("content-length", "0"))
+        except ValueError:
+            raise ServiceError(HTTPStatus.BAD_REQUEST, "Invalid Content-Length")
+        if length < 0 or length > MAX_BODY_BYTES:
+            raise ServiceError(HTTPStatus.REQUEST_ENTITY_TOO_LARGE, "Request body too large")
+        body = await reader.readexactly(length) if length else b""
+
+        connection = headers.get("connection", "").lower()
+        keep_alive = connection != "close" and (version == "HTTP/1.1" or connection == "keep-alive")
+        return method.upper(), target, headers, body, keep_alive
+
+    async def _dispatch(self, method: str, target: str, headers: Dict[str, str], body: bytes) -> Response:
+        started = time.perf_counter()
+        url = urlsplit(target)
+        endpoint = url.path.rstrip("/") or "/"
+        self.requests += 1
+        try:
+            if not self._authorized(headers):
+                raise ServiceError(HTTPStatus.UNAUTHORIZED, "Missing or invalid bearer token")
+            handler = self._routes.get((method, endpoint))
+            if handler is None:
+                if any(path == endpoint for _, path in self._routes):
+                    raise ServiceError(HTTPStatus.METHOD_NOT_ALLOWED, f"{method} not allowed on {endpoint}")
+                raise ServiceError(HTTPStatus.NOT_FOUND, f"No endpoint {endpoint}")
+            query = {name: values[-1] for name, values in parse_qs(url.query).items()}
+            response = await handler(query, body)
+        except ServiceError as e:
+            response = (e.status, {"error": str(e)})
+        except Exception as e:
+            response = (HTTPStatus.INTERNAL_SERVER_ERROR, {"error": f"Internal error: {e}"})
+        route = endpoint if (method, endpoint) in self._routes else "other"
+        self.metrics.observe(
+            "api_request_seconds", time.perf_counter() - started, f"{response[0].value // 100}xx", endpoint=route
+        )
+        return response
+
+    def _authorized(self, headers: Dict[str, str]) -> bool:
+        scheme, _, token = headers.get("authorization", "").partition(" ")
+        return scheme.lower() == "bearer" and hmac.compare_digest(token.strip(), self.token)
+
+    @staticmethod
+    async def _respond(writer: asyncio.StreamWriter, status: HTTPStatus, payload: object, keep_alive: bool):
+        if isinstance(payload, str):
+            body, content_type = payload.encode("utf-8"), "text/plain; version=0.0.4; charset=utf-8"
+        else:
+            body, content_type = json.dumps(payload).encode("utf-8"), "application/json"
+        head = (
+            f"HTTP/1.1 {status.value} {status.phrase}\r\n"
+            f"Content-Type: {content_type}\r\n"
+            f"Content-Length: {len(body)}\r\n"
+            f"Connection: {'keep-alive' if keep_alive else 'close'}\r\n\r\n"
+        )
+        writer.write(head.encode("latin-1") + body)
+        await writer.drain()
+
+    @staticmethod
+    def _json_body(body: bytes) -> Dict:
+        try:
+            data = json.loads(body or b"{}")
+        except ValueError:
+            raise ServiceError(HTTPStatus.BAD_REQUEST, "Body is not valid JSON")
+        if not isinstance(data, dict):
+            raise ServiceError(HTTPStatus.BAD_REQUEST, "Body must be a JSON object")
+        return data
+
+    # -- Endpoints ------------------------------------------------------------
+
+    async def handle_status(self, query: Dict[str, str], body: bytes) -> Response:
+        force = query.get("force", "") in ("1", "true", "yes")
+        installed, (connected, connection_type) = await asyncio.gather(
+            self._blocking(self.manager.check_phone_link_installed, force),
+            self._blocking(self.manager.detect_phone_connection, force),
+        )
+        return HTTPStatus.OK, {
+            "phone_link_installed": installed,
+            "connected": connected,
+            "connection_type": connection_type,
+            "phones": [state.to_dict() for state in self.manager.devices.phones()],
+        }
+
+    async def _dial_one(self, number: str, wait: bool) -> Dict:
+        if not isinstance(number, str):
+            return {"number": number, "queued": False, "error": "Number must be a string"}
+        if is_command(number) and self.manager.normalizer.normalize(number) is None:
+            # "call mom mobile": resolving may rebuild the name index, so not on the loop
+            resolution = await self._blocking(self.manager.resolve_command, number)
+            # queue_call dials the digits of text that names nobody ("555-0100 ext 12")
+            future = await self._blocking(self.manager.queue_call, number)
+            if future is None:
+                return {"number": number, "queued": False, "error": "No matching contact or number"}
+            result = {"number": number, "queued": True}
+            if resolution is not None:
+                result["resolved"] = resolution.describe()
+            else:
+                result["dialed"] = self.manager.dial_number(number)
+        else:
+            # Queueing times the dial window (process snapshot, window enumeration), so not on the loop
+            future = await self._blocking(self.manager.queue_call, number)
+            if future is None:
+                return {"number": number, "queued": False, "error": "No digits in number"}
+            result = {"number": number, "dialed": self.manager.dial_number(number), "queued": True}
+        if wait:
+            await self._wait_dispatched(future, result)
+        return result
+
+    async def _wait_dispatched(self, future: Future, result: Dict):
+        """Fill in whether the call was launched, giving up after the manager's launch timeout"""
+        try:
+            result["dispatched"] = await asyncio.wait_for(
+                asyncio.wrap_future(future), self.manager.LAUNCH_TIMEOUT
+            )
+        except asyncio.TimeoutError:
+            result["dispatched"] = False
+            result["error"] = "Timed out waiting for the dial queue"
+
+    async def handle_dial(self, query: Dict[str, str], body: bytes) -> Response:
+        data = self._json_body(body)
+        wait = bool(data.get("wait", True))
+        if "number" in data:
+            result = await self._dial_one(data["number"], wait)
+            return (HTTPStatus.OK if result["queued"] else HTTPStatus.BAD_REQUEST), result
+        contact = data.get("contact")
+        if isinstance(contact, str) and contact.strip():
+            future = await self._blocking(self.manager.queue_contact_call, contact.strip())
+            result = {"contact": contact, "queued": True}
+            if wait:
+                await self._wait_dispatched(future, result)
+            return HTTPStatus.OK, result
+        raise ServiceError(HTTPStatus.BAD_REQUEST, 'Expected "number" or "contact"')
+
+    async def handle_bulk_dial(self, query: Dict[str, str], body: bytes) -> Response:
+        data = self._json_body(body)
+        numbers = data.get("numbers")
+        if not isinstance(numbers, list) or not numbers:
+            raise ServiceError(HTTPStatus.BAD_REQUEST, 'Expected a non-empty "numbers" list')
+        if len(numbers) > self.max_bulk:
+            raise ServiceError(HTTPStatus.REQUEST_ENTITY_TOO_LARGE, f"At most {self.max_bulk} numbers per request")
+        # Not waiting by default: the dial queue spaces calls out, so a long list takes a while
+        results = await asyncio.gather(*(self._dial_one(n, bool(data.get("wait", False))) for n in numbers))
+        return HTTPStatus.OK, {"results": results, "queue_depth": self.manager.dialer.depth}
+
+    async def handle_contacts(self, query: Dict[str, str], body: bytes) -> Response:
+        try:
+            limit = max(1, min(200, int(query.get("limit", "20"))))
+        except ValueError:
+            raise ServiceError(HTTPStatus.BAD_REQUEST, "limit must be an integer")
+        q = query.get("q", "").strip()
+        if q:
+            contacts = self.contact_store.search(q, limit=limit)
+        else:
+            ids = self.contact_store.ids_by_name()[:limit]
+            contacts = [self.contact_store.get(i) for i in ids]
+        return HTTPStatus.OK, {
+            "contacts": [c.to_dict() for c in contacts if c is not None],
+            "total": len(self.contact_store),
+        }
+
+    async def handle_metrics(self, query: Dict[str, str], body: bytes) -> Response:
+        return HTTPStatus.OK, self.metrics.to_prometheus()
+
+
+async def run_service(service: DialService, on_started: Optional[Callable[[str, int], None]] = None):
+    """Start the service, sync or load contacts in the background and serve until cancelled"""
+    host, port = await service.start()
+    if on_started is not None:
+        on_started(host, port)
+    contacts = None if service.start_contact_sync() else asyncio.ensure_future(service.load_contacts())
+    try:
+        await service.serve_forever()
+    finally:
+        if contacts is not None:
+            contacts.cancel()
+        await service.close()
@@ -0,0 +1,456 @@
+"""
+Call dispatch queue.
+
+Phone Link is driven through URIs (ms-phone-call:?PhoneNumber=...). Instead of
+spawning "cmd /c start" for each one, URIs are handed to a UriLauncher: ShellExecuteEx
+on Windows, which opens the registered protocol handler directly. Requests go through
+a FIFO queue served by one thread. Repeats of the same call within a short window
+(double-clicks) are merged into the pending request, consecutive launches are spaced
+by a minimum interval, and any child process a launch returns is tracked until it
+exits and then released.
+"""
+
+import logging
+import os
+import subprocess
+import sys
+import threading
+import time
+from collections import deque
+from concurrent.futures import Future
+from typing import Callable, Deque, Dict, List, NamedTuple, Optional, Sequence, Tuple
+from urllib.parse import quote
+
+from log_pipeline import LOGGER_NAME
+from metrics import REGISTRY, MetricsRegistry
+
+logger = logging.getLogger(LOGGER_NAME)
+
+PHONE_CALL_URI = "ms-phone-call:"
+
+
+def call_uri(phone_number: str) -> str:
+    """Call URI for a number; the leading + of E.164 numbers is kept as is"""
+    return f"{PHONE_CALL_URI}?PhoneNumber={quote(phone_number, safe='+')}"
+
+
+def contact_call_uri(contact_name: str) -> str:
+    """Call URI for a contact name, percent-encoded so spaces, & and # survive"""
+    return f"{PHONE_CALL_URI}?ContactName={quote(contact_name, safe='')}"
+
+
+class LaunchedChild:
+    """A process started by a launch; poll() returns its exit code once it has exited"""
+
+    def poll(self) -> Optional[int]:
+        raise NotImplementedError
+
+    def close(self):
+        """Release the handle; called once after the child has exited or on shutdown"""
+
+
+class UriLauncher:
+    """Opens a URI with its registered handler
+
+    launch() raises OSError on failure and returns the child process it started,
+    or None when the handler was activated in an already running process.
+    """
+
+    def launch(self, uri: str) -> Optional[LaunchedChild]:
+        raise NotImplementedError
+
+
+class _HandleChild(LaunchedChild):
+    """A Win32 process handle returned by ShellExecuteEx"""
+
+    def __init__(self, kernel32, handle):
+        self._kernel32 = kernel32
+        self._handle = handle
+
+    def poll(self) -> Optional[int]:
+        if self._handle is None:
+            return 0
+        if self._kernel32.WaitForSingleObject(self._handle, 0) != 0:  # WAIT_OBJECT_0
+            return None
+        import ctypes
+        code = ctypes.c_ulong()
+        self._kernel32.GetExitCodeProcess(self._handle, ctypes.byref(code))
+        return code.value
+
+    def close(self):
+        if self._handle is not None:
+            self._kernel32.CloseHandle(self._handle)
+            self._handle = None
+
+
+class ShellExecuteLauncher(UriLauncher):
+    """ShellExecuteEx, keeping the process handle when a new process is created"""
+
+    SEE_MASK_NOCLOSEPROCESS = 0x00000040
+    SEE_MASK_FLAG_NO_UI = 0x00000400
+    SW_SHOWNORMAL = 1
+
+    def __init__(self):
+        import ctypes
+        from ctypes import wintypes
+
+        class SHELLEXECUTEINFOW(ctypes.Structure):
+            _fields_ = [
+                ("cbSize", wintypes.DWORD),
+                ("fMask", ctypes.c_ulong),
+                ("hwnd", wintypes.HWND),
+                ("lpVerb", wintypes.LPCWSTR),
+                ("lpFile", wintypes.LPCWSTR),
+                ("lpParameters", wintypes.LPCWSTR),
+                ("lpDirectory", wintypes.LPCWSTR),
+                ("nShow", ctypes.c_int),
+                ("hInstApp", wintypes.HINSTANCE),
+                ("lpIDList", ctypes.c_void_p),
+                ("lpClass", wintypes.LPCWSTR),
+                ("hkeyClass", wintypes.HKEY),
+                ("dwHotKey", wintypes.DWORD),
+                ("hIconOrMonitor", wintypes.HANDLE),
+                ("hProcess", wintypes.HANDLE),
+            ]
+
+        self._ctypes = ctypes
+        self._info_type = SHELLEXECUTEINFOW
+        self._shell_execute = ctypes.windll.shell32.ShellExecuteExW
+        self._shell_execute.argtypes = [ctypes.POINTER(SHELLEXECUTEINFOW)]
+        self._shell_execute.restype = wintypes.BOOL
+        self._kernel32 = ctypes.windll.kernel32
+        self._kernel32.WaitForSingleObject.argtypes = [wintypes.HANDLE, wintypes.DWORD]
+        self._kernel32.WaitForSingleObject.restype = wintypes.DWORD
+        self._kernel32.GetExitCodeProcess.argtypes = [wintypes.HANDLE, ctypes.POINTER(ctypes.c_ulong)]
+        self._kernel32.CloseHandle.argtypes = [wintypes.HANDLE]
+
+    def launch(self, uri: str) -> Optional[LaunchedChild]:
+        info = self._info_type()
+        info.cbSize = self._ctypes.sizeof(info)
+        info.fMask = self.SEE_MASK_NOCLOSEPROCESS | self.SEE_MASK_FLAG_NO_UI
+        info.lpVerb = "open"
+        info.lpFile = uri
+        info.nShow = self.SW_SHOWNORMAL
+        if not self._shell_execute(self._ctypes.byref(info)):
+            raise self._ctypes.WinError()
+        return _HandleChild(self._kernel32, info.hProcess) if info.hProcess else None
+
+
+class StartfileLauncher(UriLauncher):
+    """os.startfile: no process handle, so nothing to track"""
+
+    def launch(self, uri: str) -> Optional[LaunchedChild]:
+        os.startfile(uri)
+        return None
+
+
+class _PopenChild(LaunchedChild):
+    def __init__(self, process: subprocess.Popen):
+        self._process = process
+
+    def poll(self) -> Optional[int]:
+        return self._process.poll()
+
+    def close(self):
+        if self._process.poll() is None:
+            self._process.kill()
+        self._process.wait()
+
+
+class SubprocessLauncher(UriLauncher):
+    """Runs an opener command such as xdg-open; used outside Windows"""
+
+    def __init__(self, command: Sequence[str] = ("xdg-open",)):
+        self.command = list(command)
+
+    def launch(self, uri: str) -> Optional[LaunchedChild]:
+        process = subprocess.Popen(
+            self.command + [uri], stdin=subprocess.DEVNULL,
+            stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL
+        )
+        return _PopenChild(process)
+
+
+class _FakeChild(LaunchedChild):
+    def __init__(self, exits_at: float, clock: Callable[[], float]):
+        self.exits_at = exits_at
+        self._clock = clock
+        self.closed = False
+
+    def poll(self) -> Optional[int]:
+        return 0 if self._clock() >= self.exits_at else None
+
+    def close(self):
+        self.closed = True
+
+
+class FakeLauncher(UriLauncher):
+    """Records URIs instead of opening them, for tests and benchmarks
+
+    latency is the time launch() takes, failure_rate the fraction of launches that
+    raise OSError, and child_lifetime how long each fake child runs (None for
+    launches that start no process).
+    """
+
+    def __init__(self, latency: float = 0.0, failure_rate: float = 0.0,
+                 child_lifetime: Optional[float] = None, seed: int = 0):
+        import random
+        self.latency = latency
+        self.failure_rate = failure_rate
+        self.child_lifetime = child_lifetime
+        self.launched: List[str] = []
+        self.children: List[_FakeChild] = []
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()
+
+    def launch(self, uri: str) -> Optional[LaunchedChild]:
+        if self.latency:
+            time.sleep(self.latency)
+        with self._lock:
+            if self.failure_rate and self._random.random() < self.failure_rate:
+                raise OSError(f"Fake launch failure: {uri}")
+            self.launched.append(uri)
+            if self.child_lifetime is None:
+                return None
+            child = _FakeChild(time.monotonic() + self.child_lifetime, time.monotonic)
+            self.children.append(child)
+            return child
+
+
+def default_launcher() -> UriLauncher:
+    if sys.platform == "win32":
+        try:
+            return ShellExecuteLauncher()
+        except (AttributeError, OSError):
+            return StartfileLauncher()
+    return SubprocessLauncher()
+
+
+class _Request(NamedTuple):
+    key: str
+    uri: str
+    enqueued_at: float
+    future: Future
+
+
+class ChildReaper:
+    """Polls launched children and releases each one once it exits"""
+
+    def __init__(self, interval: float = 0.5, clock: Callable[[], float] = time.monotonic):
+        self.interval = interval
+        self._clock = clock
+        self._children: List[Tuple[LaunchedChild, float]] = []
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self.reaped = 0
+        self.lifetimes: Deque[float] = deque(maxlen=200)  # Seconds
+
+    def track(self, child: LaunchedChild):
+        with self._lock:
+            self._children.append((child, self._clock()))
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name="child-reaper", daemon=True)
+                self._thread.start()
+
+    @property
+    def live(self) -> int:
+        with self._lock:
+            return len(self._children)
+
+    def reap(self):
+        """Release every child that has exited"""
+        with self._lock:
+            children = list(self._children)
+        exited = [(child, started) for child, started in children if child.poll() is not None]
+        if not exited:
+            return
+        now = self._clock()
+        for child, started in exited:
+            child.close()
+            self.lifetimes.append(now - started)
+        with self._lock:
+            done = {id(child) for child, _ in exited}
+            self._children = [entry for entry in self._children if id(entry[0]) not in done]
+            self.reaped += len(exited)
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            self.reap()
+
+    def close(self):
+        """Stop polling and release the handles of children still running"""
+        self._stop.set()
+        with self._lock:
+            children, self._children = self._children, []
+        for child, _ in children:
+            try:
+                child.close()
+            except OSError:
+                pass
+
+
+class Dialer:
+    """FIFO queue of URI launches with de-duplication and rate limiting
+
+    submit() returns a future that resolves to True once the URI was launched and
+    False if launching failed. A request whose key is still queued, or was launched
+    less than dedupe_window seconds ago, returns the earlier request's future.
+    """
+
+    def __init__(self, launcher: Optional[UriLauncher] = None, min_interval: float = 0.5,
+                 dedupe_window: float = 2.0, max_samples: int = 500,
+                 clock: Callable[[], float] = time.monotonic, metrics: Optional[MetricsRegistry] = None):
+        self.launcher = launcher if launcher is not None else default_launcher()
+        self.metrics = metrics if metrics is not None else REGISTRY
+        self.min_interval = min_interval
+        self.dedupe_window = dedupe_window
+        self._clock = clock
+        self._queue: Deque[_Request] = deque()
+        self._pending: Dict[str, _Request] = {}  # Queued or launching, by key
+        self._recent: Dict[str, Tuple[float, Future]] = {}  # Launched, by key
+        self._condition = threading.Condition()
+        self._thread: Optional[threading.Thread] = None
+        self._closed = False
+        self._last_launch: Optional[float] = None
+        self.reaper = ChildReaper(clock=clock)
+        self.submitted = 0
+        self.deduped = 0
+        self.dispatched = 0
+        self.failed = 0
+        self.dispatch_times: Deque[float] = deque(maxlen=max_samples)  # Enqueue to launch, ms
+
+    def submit(self, uri: str, key: Optional[str] = None) -> Future:
+        key = key or uri
+        with self._condition:
+            if self._closed:
+                raise RuntimeError("Dialer is closed")
+            now = self._clock()
+            existing = self._pending.get(key)
+            if existing is not None:
+                self.deduped += 1
+                self.metrics.inc("call_requests_total", outcome="deduped")
+                return existing.future
+            recent = self._recent.get(key)
+            if recent is not None and now - recent[0] < self.dedupe_window:
+                self.deduped += 1
+                self.metrics.inc("call_requests_total", outcome="deduped")
+                return recent[1]
+            request = _Request(key, uri, now, Future())
+            self._queue.append(request)
+            self._pending[key] = request
+            self.submitted += 1
+            self.metrics.inc("call_requests_total", outcome="queued")
+            self.metrics.set_gauge("call_queue_depth", len(self._queue))
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name="dialer", daemon=True)
+                self._thread.start()
+            self._condition.notify()
+            return request.future
+
+    def dial(self, phone_number: str) -> Future:
+        return self.submit(call_uri(phone_number), key=f"number:{phone_number}")
+
+    def dial_contact(self, contact_name: str) -> Future:
+        return self.submit(contact_call_uri(contact_name), key=f"contact:{contact_name.casefold()}")
+
+    @property
+    def depth(self) -> int:
+        """Requests waiting to be launched"""
+        with self._condition:
+            return len(self._queue)
+
+    def stats(self) -> Dict[str, float]:
+        """Queue counters and p50/p95/max time-to-dispatch in milliseconds"""
+        ordered = sorted(self.dispatch_times)
+        with self._condition:
+            stats = {
+                "depth": len(self._queue),
+                "submitted": self.submitted,
+                "deduped": self.deduped,
+                "dispatched": self.dispatched,
+                "failed": self.failed,
+                "live_children": self.reaper.live,
+                "reaped_children": self.reaper.reaped,
+            }
+        stats.update({
+            "dispatch_p50_ms": ordered[len(ordered) // 2] if ordered else 0.0,
+            "dispatch_p95_ms": ordered[min(len(ordered) - 1, int(len(ordered) * 0.95))] if ordered else 0.0,
+            "dispatch_max_ms": ordered[-1] if ordered else 0.0,
+        })
+        return stats
+
+    def _next_request(self) -> Optional[_Request]:
+        """Wait for a request and for the rate limit to allow launching it"""
+        with self._condition:
+            while True:
+                if self._closed:
+                    return None
+                if self._queue:
+                    now = self._clock()
+                    ready_at = (self._last_launch + self.min_interval
+                                if self._last_launch is not None else now)
+                    if now >= ready_at:
+                        self._last_launch = now
+                        request = self._queue.popleft()
+                        self.metrics.set_gauge("call_queue_depth", len(self._queue))
+                        return request
+                    self._condition.wait(ready_at - now)
+                else:
+                    self._condition.wait()
+
+    def _run(self):
+        while True:
+            request = self._next_request()
+            if request is None:
+                return
+            success = False
+            try:
+                success = self._launch(request)
+            finally:
+                # Whatever happened, the caller gets an answer and the key can be dialed again
+                now = self._clock()
+                with self._condition:
+                    self._pending.pop(request.key, None)
+                    if success:
+                        self.dispatched += 1
+                        self._recent[request.key] = (now, request.future)
+                        # Forget launches older than the window so the map stays small
+                        if len(self._recent) > 64:
+                            self._recent = {
+                                k: v for k, v in self._recent.items() if now - v[0] < self.dedupe_window
+                            }
+                    else:
+                        self.failed += 1
+                    self.dispatch_times.append((now - request.enqueued_at) * 1000.0)
+                self.metrics.observe("call_dispatch_seconds", now - request.enqueued_at,
+                                     "ok" if success else "error")
+                request.future.set_result(success)
+
+    def _launch(self, request: _Request) -> bool:
+        """Launch one request's URI; False if the launcher failed"""
+        launch_started = time.perf_counter()
+        try:
+            child = self.launcher.launch(request.uri)
+        except Exception as e:
+            # WinError, a malformed URI, a launcher bug: fail this call, keep serving the queue
+            logger.warning("Error launching %s: %s", request.uri, e, exc_info=True)
+            self.metrics.observe("uri_launch_seconds", time.perf_counter() - launch_started, "error")
+            return False
+        self.metrics.observe("uri_launch_seconds", time.perf_counter() - launch_started, "ok")
+        if child is not None:
+            self.metrics.inc("process_spawns_total", kind="launcher")
+            self.reaper.track(child)
+        return True
+
+    def close(self):
+        """Stop dispatching; queued requests resolve to False"""
+        with self._condition:
+            self._closed = True
+            abandoned = list(self._queue)
+            self._queue.clear()
+            self._pending.clear()
+            self._condition.notify_all()
+        for request in abandoned:
+            request.future.set_result(False)
+        self.reaper.close()
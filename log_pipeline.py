@@ -0,0 +1,114 @@
+"""
+Application log pipeline.
+
+log() may be called from any thread. Messages go into an in-memory ring buffer, a
+pending queue for the UI, and a rotating log file written by a background thread.
+LogView flushes the pending lines into the Tk text widget in one batch per frame
+and keeps the widget at a fixed maximum number of lines.
+"""
+
+import logging
+import logging.handlers
+import queue
+import threading
+import time
+from collections import deque
+from pathlib import Path
+from typing import Deque, List, Optional
+
+LOGGER_NAME = "ai_call_assistant"
+
+
+class LogPipeline:
+    """Thread-safe log with a ring buffer, a UI queue and an asynchronous file sink"""
+
+    def __init__(self, capacity: int = 5000, pending_limit: int = 1000,
+                 log_path: Optional[Path] = None, max_bytes: int = 1024 * 1024, backup_count: int = 3):
+        self.history: Deque[str] = deque(maxlen=capacity)
+        # Lines not yet shown; in a burst bigger than the widget can show, the oldest are dropped
+        self._pending: Deque[str] = deque(maxlen=pending_limit)
+        self._lock = threading.Lock()
+        self.dropped = 0
+        self._listener: Optional[logging.handlers.QueueListener] = None
+        self.logger = logging.getLogger(LOGGER_NAME)
+        self.logger.setLevel(logging.INFO)
+        self.logger.propagate = False
+        if log_path is not None:
+            self._start_file_sink(log_path, max_bytes, backup_count)
+
+    def _start_file_sink(self, log_path: Path, max_bytes: int, backup_count: int):
+        try:
+            log_path.parent.mkdir(parents=True, exist_ok=True)
+            file_handler = logging.handlers.RotatingFileHandler(
+                log_path, maxBytes=max_bytes, backupCount=backup_count, encoding="utf-8"
+            )
+        except OSError as e:
+            print(f"Error opening log file: {e}")
+            return
+        file_handler.setFormatter(logging.Formatter("%(asctime)s %(levelname)s %(threadName)s %(message)s"))
+        # Callers only enqueue; the listener thread does all file I/O
+        log_queue: "queue.SimpleQueue[logging.LogRecord]" = queue.SimpleQueue()
+        self.logger.addHandler(logging.handlers.QueueHandler(log_queue))
+        self._listener = logging.handlers.QueueListener(log_queue, file_handler)
+        self._listener.start()
+
+    def log(self, message: str, level: int = logging.INFO):
+        """Record a message; safe to call from any thread"""
+        line = f"[{time.strftime('%H:%M:%S')}] {message}\n"
+        with self._lock:
+            if len(self._pending) == self._pending.maxlen:
+                self.dropped += 1
+            self._pending.append(line)
+            self.history.append(line)
+        self.logger.log(level, message)
+
+    def drain_pending(self) -> List[str]:
+        """Take all lines logged since the last call"""
+        with self._lock:
+            lines = list(self._pending)
+            self._pending.clear()
+        return lines
+
+    def close(self):
+        """Flush and stop the file writer thread"""
+        if self._listener is not None:
+            self._listener.stop()
+            self._listener = None
+        for handler in list(self.logger.handlers):
+            self.logger.removeHandler(handler)
+            handler.close()
+
+
+class LogView:
+    """Copies pending log lines into a Tk text widget at a fixed frame rate"""
+
+    def __init__(self, root, text_widget, pipeline: LogPipeline, max_lines: int = 1000, interval_ms: int = 100):
+        self.root = root
+        self.text = text_widget
+        self.pipeline = pipeline
+        self.max_lines = max_lines
+        self.interval_ms = interval_ms
+        self._running = False
+
+    def start(self):
+        self._running = True
+        self.root.after(self.interval_ms, self._flush)
+
+    def stop(self):
+        self._running = False
+
+    def _flush(self):
+        if not self._running:
+            return
+        lines = self.pipeline.drain_pending()
+        if lines:
+            # Only follow the tail if the user has not scrolled up to read older lines
+            at_bottom = self.text.yview()[1] >= 0.999
+            self.text.insert("end", "".join(lines))
+            line_count = int(self.text.index("end-1c").split(".")[0])
+            excess = line_count - self.max_lines
+            if excess > 0:
+                self.text.delete("1.0", f"{excess + 1}.0")
+            if at_bottom:
+                self.text.see("end")
+        self.root.after(self.interval_ms, self._flush)
@@ -3,40 +3,65 @@ AI Call Assistant - First Version
 Detects phone connections, accesses contacts, and makes calls via Windows Phone Link
 """
 
+# First, so startup timing includes every other import
+from startup_timing import STARTUP
+
 import sys
+
+INSTANCE_LOCK = None
+if __name__ == "__main__" and sys.platform == "win32" and "--headless" not in sys.argv[1:]:
+    # A repeat launch (e.g. a click on a tel: link) hands its arguments to the running
+    # window and exits here, before the imports below
+    from single_instance import claim_or_forward
+    try:
+        INSTANCE_LOCK = claim_or_forward(sys.argv[1:])
+    except TimeoutError as e:
+        print(f"AI Call Assistant is already running but did not respond: {e}")
+        sys.exit(1)
+    if INSTANCE_LOCK is None:
+        sys.exit(0)
+
 import os
-import subprocess
-import platform
-import ctypes
-from pathlib import Path
-import json
-from typing import List, Dict, Optional, Tuple
+import asyncio
+import logging
 import threading
+import weakref
+from concurrent.futures import Future
+from typing import TYPE_CHECKING, Callable, List, Dict, Optional, Tuple
 import time
 
+from contact_store import ContactStore, Phone, phones_from_dict
+from detection import Probe, race_probes, run_sync
+from dialer import Dialer
+from device_inventory import BLUETOOTH, INVENTORY_SCRIPT, USB, DeviceChange, DeviceRegistry, parse_inventory
+from device_monitor import DeviceMonitor, WmiDeviceEventSource
+from powershell_host import CommandRunner, PowerShellPool
+from log_pipeline import LOGGER_NAME, LogPipeline, LogView
+from metrics import REGISTRY
+from phone_numbers import PhoneNumberNormalizer
+from status_cache import StatusCache, default_data_dir, default_snapshot_path
+from ui_worker import FrameLatencyMonitor, ProbeWorker, UiDispatcher
+
 try:
     import tkinter as tk
-    from tkinter import ttk, messagebox, scrolledtext
+    from tkinter import ttk, messagebox, scrolledtext, filedialog
 except ImportError:
     print("tkinter not available. Please install Python with tkinter support.")
     sys.exit(1)
 
-# Windows-specific imports
-if platform.system() == "Windows":
-    try:
-        import winreg
-    except ImportError:
-        winreg = None
-    
-    try:
-        import win32api
-        import win32con
-        from win32com.client import Dispatch
-    except ImportError:
-        # pywin32 not installed - some features may not work
-        win32api = None
-        win32con = None
-        Dispatch = None
+from contacts_view import VirtualContactList
+
+if TYPE_CHECKING:
+    # Subsystems that are not needed for the first frame are imported where they are first used
+    from call_history import CallHistory, QuickDialEntry
+    from call_resolver import CallResolver, Resolution
+    from contact_import import ContactImport, ImportProgress
+    from contact_sync import ContactSource, ContactSync, SyncResult
+    from phone_link_supervisor import PhoneLinkSupervisor, ProcessWatcher
+
+logger = logging.getLogger(LOGGER_NAME)
+
+STARTUP.mark("imports")
 
 
 class PhoneLinkManager:
@@ -47,219 +72,480 @@ class PhoneLinkManager:
     PHONE_LINK_URI = "ms-phone:"
     PHONE_CALL_URI = "ms-phone-call:"
     
-    def __init__(self):
+    # Upper bounds (seconds) for a whole detection run, across all concurrent probes
+    DETECTION_DEADLINE = 6.0
+    INSTALL_CHECK_DEADLINE = 6.0
+    # How long make_call and friends wait for their URI to leave the dialer queue
+    LAUNCH_TIMEOUT = 10.0
+    
+    # How long (seconds) each cached probe result stays fresh. Device events and the
+    # monitor's fallback polls always force a new connection probe, so the short TTL only
+    # lets bursts of unforced reads (dial API /status clients, repeated checks) share one
+    # probe while a missed change is never served for more than a few seconds
+    STATUS_TTLS = {
+        "phone_link_installed": 6 * 3600.0,  # Install state almost never changes
+        "connection": 4.0,
+        "inventory": 4.0,
+    }
+    # Kept in memory only; status.json holds just the summaries shown at the next start
+    TRANSIENT_STATUS = ("inventory",)
+    
+    # PowerShell probe scripts, executed through the manager's CommandRunner
+    APPX_PROBE_SCRIPT = "Get-AppxPackage -Name Microsoft.YourPhone | Select-Object -ExpandProperty Name"
+    PROCESS_PROBE_SCRIPT = "Get-Process -Name PhoneExperienceHost -ErrorAction SilentlyContinue | Select-Object -ExpandProperty ProcessName"
+    URI_PROBE_SCRIPT = "Test-Path -Path 'HKCU:\\Software\\Classes\\ms-phone'"
+    # USB and Bluetooth devices come from one PnP enumeration (device_inventory.INVENTORY_SCRIPT)
+    INVENTORY_TIMEOUT = 5.0
+    # Most called numbers and contacts offered as quick-dial buttons
+    QUICK_DIAL_SIZE = 8
+    
+    def __init__(self, runner: Optional[CommandRunner] = None, status_cache: Optional[StatusCache] = None,
+                 normalizer: Optional[PhoneNumberNormalizer] = None, dialer: Optional[Dialer] = None,
+                 history: Optional["CallHistory"] = None, process_watcher: Optional["ProcessWatcher"] = None):
         self.phone_link_installed = False
         self.phone_connected = False
         self.connection_type = None  # "USB" or "Bluetooth"
+        # Every phone seen by the inventory, so several paired phones are tracked at once
+        self.devices = DeviceRegistry()
+        # All probes share a pool of persistent PowerShell hosts unless a runner is injected
+        self.runner = runner if runner is not None else PowerShellPool()
+        self.status_cache = status_cache if status_cache is not None else StatusCache(
+            self.STATUS_TTLS, default_snapshot_path(), transient=self.TRANSIENT_STATUS
+        )
+        self.normalizer = normalizer if normalizer is not None else PhoneNumberNormalizer()
+        # Contacts shown in the window or served by the dial API; "call mom" is resolved against them
+        self.contacts = ContactStore(normalizer=self.normalizer.key)
+        # The resolver and the history are created on first use, after the window is up
+        self._resolver: Optional["CallResolver"] = None
+        self._subsystem_lock = threading.Lock()
+        # URIs are launched directly from one queue instead of a "cmd /c start" per call
+        self.dialer = dialer if dialer is not None else Dialer()
+        # Every call placed is logged, whether from the window or the dial API
+        self._history = history
+        self._recorded_calls: "weakref.WeakSet[Future]" = weakref.WeakSet()
+        self._recorded_lock = threading.Lock()
+        # Keeps Phone Link's host process running once start_supervisor() is called
+        self.process_watcher = process_watcher
+        self.supervisor: Optional["PhoneLinkSupervisor"] = None
+    
+    @property
+    def resolver(self) -> "CallResolver":
+        """Name index that "call mom" is resolved against"""
+        if self._resolver is None:
+            from call_resolver import CallResolver
+            with self._subsystem_lock:
+                if self._resolver is None:
+                    self._resolver = CallResolver(self.contacts)
+        return self._resolver
+    
+    @property
+    def history(self) -> "CallHistory":
+        """Log of every call placed; opening it reads the database, so it waits for first use"""
+        if self._history is None:
+            from call_history import CallHistory
+            with self._subsystem_lock:
+                if self._history is None:
+                    self._history = CallHistory(top_n=self.QUICK_DIAL_SIZE)
+        return self._history
+    
+    @property
+    def history_open(self) -> bool:
+        return self._history is not None
+    
+    def last_known_status(self) -> Dict:
+        """Last probed values, including those persisted by a previous run"""
+        return self.status_cache.last_known()
+    
+    def invalidate_status(self, key: Optional[str] = None):
+        """Force the next check of one probe (or all probes) to run again"""
+        self.status_cache.invalidate(key)
+    
+    def close(self):
+        """Release the PowerShell hosts, the dialer and the call history owned by the manager"""
+        if self.supervisor is not None:
+            self.devices.listeners.remove(self._prewarm_on_connect)
+            self.supervisor.stop()
+        self.runner.close()
+        self.dialer.close()
+        if self._history is not None:
+            self._history.close()
         
-    def check_phone_link_installed(self) -> bool:
+    def check_phone_link_installed(self, force: bool = False) -> bool:
         """Check if Windows Phone Link is installed"""
+        installed = self.status_cache.get_or_probe(
+            "phone_link_installed", lambda: run_sync(self.check_phone_link_installed_async()), force
+        )
+        self.phone_link_installed = installed
+        return installed
+    
+    async def check_phone_link_installed_async(self) -> bool:
+        """Check all installation signals concurrently; the first positive answer wins"""
         try:
-            # Method 1: Check via PowerShell Get-AppxPackage (most reliable)
-            try:
-                ps_command = "Get-AppxPackage -Name Microsoft.YourPhone | Select-Object -ExpandProperty Name"
-                result = subprocess.run(
-                    ["powershell", "-Command", ps_command],
-                    capture_output=True,
-                    text=True,
-                    timeout=5
-                )
-                if "Microsoft.YourPhone" in result.stdout:
-                    self.phone_link_installed = True
-                    return True
-            except:
-                pass
-            
             # Method 2: Check if Phone Link executable exists in WindowsApps
-            try:
+            # This is a local file check, so it runs first without touching PowerShell
+            with REGISTRY.time("probe_duration_seconds", outcome="miss", probe="file") as timing:
                 windowsapps_path = os.path.expanduser(r"~\AppData\Local\Microsoft\WindowsApps")
                 if os.path.exists(os.path.join(windowsapps_path, self.PHONE_LINK_EXE)):
-                    self.phone_link_installed = True
-                    return True
-            except:
-                pass
-            
-            # Method 3: Check if process is running
-            try:
-                result = subprocess.run(
-                    ["tasklist", "/FI", f"IMAGENAME eq {self.PHONE_LINK_EXE}"],
-                    capture_output=True,
-                    text=True,
-                    timeout=3
-                )
-                if self.PHONE_LINK_EXE.lower() in result.stdout.lower():
-                    self.phone_link_installed = True
-                    return True
-            except:
-                pass
+                    timing.outcome = "hit"
+            if timing.outcome == "hit":
+                self.phone_link_installed = True
+                return True
             
-            # Method 4: Try to verify URI scheme is registered
-            try:
-                # Check if ms-phone: URI is registered
-                result = subprocess.run(
-                    ["powershell", "-Command", "Get-ItemProperty -Path 'HKCU:\\Software\\Classes\\ms-phone' -ErrorAction SilentlyContinue"],
-                    capture_output=True,
-                    timeout=3
-                )
-                if result.returncode == 0:
-                    self.phone_link_installed = True
-                    return True
-            except:
-                pass
-            
-            self.phone_link_installed = False
-            return False
+            process_name = os.path.splitext(self.PHONE_LINK_EXE)[0]
+            probes = [
+                # Method 1: Check via PowerShell Get-AppxPackage (most reliable)
+                Probe("appx", lambda: self._probe_output_contains(self.APPX_PROBE_SCRIPT, 5, "Microsoft.YourPhone")),
+                # Method 3: Check if process is running
+                Probe("process", lambda: self._probe_output_contains(self.PROCESS_PROBE_SCRIPT, 3, process_name)),
+                # Method 4: Try to verify URI scheme is registered
+                Probe("uri", lambda: self._probe_output_contains(self.URI_PROBE_SCRIPT, 3, "True")),
+            ]
+            result = await race_probes(probes, self.INSTALL_CHECK_DEADLINE)
+            self.phone_link_installed = result.winner is not None
+            return self.phone_link_installed
         except Exception as e:
-            print(f"Error checking Phone Link installation: {e}")
+            logger.warning("Error checking Phone Link installation: %s", e, exc_info=True)
+            REGISTRY.inc("errors_total", operation="phone_link_installed")
             self.phone_link_installed = False
             return False
     
+    async def _probe_output_contains(self, script: str, timeout: float, needle: str) -> bool:
+        """Run a probe script and check its output for a marker (case-insensitive)"""
+        result = await self.runner.run_async(script, timeout)
+        return needle.lower() in result.stdout.lower()
+    
     def install_phone_link(self) -> bool:
         """Attempt to install Windows Phone Link via Microsoft Store"""
         try:
             # Try to open Microsoft Store to Phone Link page
             store_uri = f"ms-windows-store://pdp/?ProductId=9NMPJ99TJBHZ"
-            subprocess.Popen(["start", store_uri], shell=True)
-            return True
+            # The user is about to install it, so the cached "not installed" is stale
+            self.invalidate_status("phone_link_installed")
+            return self.dialer.submit(store_uri).result(self.LAUNCH_TIMEOUT)
         except Exception as e:
-            print(f"Error opening Microsoft Store: {e}")
+            logger.warning("Error opening Microsoft Store: %s", e, exc_info=True)
+            REGISTRY.inc("errors_total", operation="install_phone_link")
             return False
     
     def launch_phone_link(self) -> bool:
         """Launch Windows Phone Link application"""
         try:
-            subprocess.Popen(["start", self.PHONE_LINK_URI], shell=True)
-            return True
+            return self.dialer.submit(self.PHONE_LINK_URI).result(self.LAUNCH_TIMEOUT)
         except Exception as e:
-            print(f"Error launching Phone Link: {e}")
+            logger.warning("Error launching Phone Link: %s", e, exc_info=True)
+            REGISTRY.inc("errors_total", operation="launch_phone_link")
             return False
     
-    def check_bluetooth_connection(self) -> bool:
+    def start_supervisor(self, on_change: Optional[Callable[[bool], None]] = None) -> Optional["PhoneLinkSupervisor"]:
+        """Keep Phone Link warm: start it now and when a phone connects
+        
+        A Phone Link that exits is only restarted right away if
+        AI_CALL_ASSISTANT_RESTART_PHONE_LINK=1; otherwise the user may have closed it on
+        purpose. Returns None where the host process cannot be watched (outside Windows).
+        """
+        if self.supervisor is None:
+            from phone_link_supervisor import PhoneLinkSupervisor, default_process_watcher
+            watcher = self.process_watcher if self.process_watcher is not None else default_process_watcher()
+            if watcher is None:
+                return None
+            self.supervisor = PhoneLinkSupervisor(
+                watcher, self._warm_start_phone_link,
+                restart_on_exit=os.environ.get("AI_CALL_ASSISTANT_RESTART_PHONE_LINK") == "1"
+            )
+            self.supervisor.on_change = on_change
+            self.devices.listeners.append(self._prewarm_on_connect)
+            self.supervisor.start()
+        return self.supervisor
+    
+    def _warm_start_phone_link(self) -> bool:
+        """Launch Phone Link for the supervisor
+        
+        Each start has its own dialer key: a launch moments ago may have started the
+        host that just exited, so it must not be merged with this one.
+        """
+        try:
+            key = f"warm-start:{self.supervisor.launches}"
+            return self.dialer.submit(self.PHONE_LINK_URI, key=key).result(self.LAUNCH_TIMEOUT)
+        except Exception as e:
+            logger.warning("Error starting Phone Link: %s", e, exc_info=True)
+            REGISTRY.inc("errors_total", operation="warm_start_phone_link")
+            return False
+    
+    def _prewarm_on_connect(self, changes: List[DeviceChange]):
+        if any(change.kind == "connected" for change in changes):
+            self.supervisor.prewarm()
+    
+    def device_inventory(self, force: bool = False) -> List[List[str]]:
+        """Bluetooth and USB devices from the latest enumeration (cached)"""
+        return self.status_cache.get_or_probe("inventory", lambda: run_sync(self.device_inventory_async()), force)
+    
+    async def device_inventory_async(self) -> List[List[str]]:
+        """Enumerate devices once and update the device registry
+        
+        Raises RuntimeError if PowerShell fails, so a failed pass never reads as every
+        device being unplugged.
+        """
+        with REGISTRY.time("probe_duration_seconds", outcome="miss", probe="inventory") as timing:
+            result = await self.runner.run_async(INVENTORY_SCRIPT, timeout=self.INVENTORY_TIMEOUT)
+            if result.returncode != 0:
+                timing.outcome = "timeout" if result.timed_out else "error"
+                raise RuntimeError(f"Device inventory failed: {result.stderr.strip() or result.returncode}")
+            snapshot = parse_inventory(result.stdout)
+            self.devices.apply(snapshot)
+            if self.devices.connection()[0]:
+                timing.outcome = "hit"
+        records = [list(record) for record in snapshot.values()]
+        # Lets check_usb_connection and friends reuse this pass
+        self.status_cache.set("inventory", records)
+        return records
+    
+    def check_bluetooth_connection(self, force: bool = False) -> bool:
         """Check if Bluetooth is enabled and a device is connected"""
         try:
-            # Use PowerShell to check Bluetooth status
-            ps_command = """
-            $adapters = Get-PnpDevice -Class Bluetooth | Where-Object {$_.Status -eq 'OK'}
-            if ($adapters) {
-                $devices = Get-PnpDevice -Class Bluetooth | Where-Object {$_.FriendlyName -like '*Phone*' -or $_.FriendlyName -like '*Mobile*'}
-                if ($devices) { Write-Output 'CONNECTED' } else { Write-Output 'ENABLED' }
-            } else {
-                Write-Output 'DISABLED'
-            }
-            """
-            result = subprocess.run(
-                ["powershell", "-Command", ps_command],
-                capture_output=True,
-                text=True,
-                timeout=5
-            )
-            output = result.stdout.strip()
-            return "CONNECTED" in output or "ENABLED" in output
+            self.device_inventory(force)
         except Exception as e:
-            print(f"Error checking Bluetooth: {e}")
+            logger.warning("Error checking Bluetooth: %s", e, exc_info=True)
+            REGISTRY.inc("errors_total", operation="bluetooth")
             return False
+        return bool(self.devices.connected_phones(BLUETOOTH)) or self.devices.bluetooth_enabled
     
-    def check_usb_connection(self) -> bool:
+    def check_usb_connection(self, force: bool = False) -> bool:
         """Check if phone is connected via USB"""
         try:
-            # Check for Android devices or iPhone via USB
-            ps_command = """
-            Get-PnpDevice | Where-Object {
-                ($_.Class -eq 'USB' -or $_.Class -eq 'WPD') -and 
-                ($_.FriendlyName -like '*Android*' -or $_.FriendlyName -like '*iPhone*' -or $_.FriendlyName -like '*Phone*')
-            } | Where-Object {$_.Status -eq 'OK'} | Select-Object -First 1
-            """
-            result = subprocess.run(
-                ["powershell", "-Command", ps_command],
-                capture_output=True,
-                text=True,
-                timeout=5
-            )
-            return len(result.stdout.strip()) > 0
+            self.device_inventory(force)
         except Exception as e:
-            print(f"Error checking USB connection: {e}")
+            logger.warning("Error checking USB connection: %s", e, exc_info=True)
+            REGISTRY.inc("errors_total", operation="usb")
             return False
+        return bool(self.devices.connected_phones(USB))
     
-    def detect_phone_connection(self) -> Tuple[bool, Optional[str]]:
+    def detect_phone_connection(self, force: bool = False) -> Tuple[bool, Optional[str]]:
         """Detect if phone is connected via USB or Bluetooth"""
-        usb_connected = self.check_usb_connection()
-        bluetooth_connected = self.check_bluetooth_connection()
-        
-        if usb_connected:
-            self.phone_connected = True
-            self.connection_type = "USB"
-            return True, "USB"
-        elif bluetooth_connected:
-            self.phone_connected = True
-            self.connection_type = "Bluetooth"
-            return True, "Bluetooth"
-        else:
-            self.phone_connected = False
-            self.connection_type = None
-            return False, None
+        # Cached as a list so the value round-trips unchanged through the JSON snapshot
+        connected, connection_type = self.status_cache.get_or_probe(
+            "connection", lambda: list(run_sync(self.detect_phone_connection_async())), force
+        )
+        self.phone_connected = connected
+        self.connection_type = connection_type
+        return connected, connection_type
+    
+    async def detect_phone_connection_async(self, deadline: Optional[float] = None) -> Tuple[bool, Optional[str]]:
+        """One device inventory pass; USB is preferred when both are present"""
+        try:
+            await asyncio.wait_for(
+                self.device_inventory_async(), deadline if deadline is not None else self.DETECTION_DEADLINE
+            )
+            connected, connection_type = self.devices.connection()
+        except Exception as e:
+            logger.warning("Error detecting phone connection: %s", e, exc_info=True)
+            REGISTRY.inc("errors_total", operation="connection")
+            connected, connection_type = False, None
+        self.phone_connected = connected
+        self.connection_type = connection_type
+        return self.phone_connected, self.connection_type
+    
+    def contact_source(self) -> Optional["ContactSource"]:
+        """Phone Link's contact database, or the export named in AI_CALL_ASSISTANT_CONTACTS"""
+        from contact_sync import find_contact_source
+        return find_contact_source()
+    
+    def contact_sync(self, store: ContactStore, **callbacks) -> Optional["ContactSync"]:
+        """A background sync from the contact source into store; None if there is no source"""
+        from contact_sync import ContactSync
+        source = self.contact_source()
+        if source is None:
+            return None
+        return ContactSync(store, source, normalizer=self.normalizer, **callbacks)
+    
+    def import_contacts(self, path: str, schedule, **callbacks) -> "ContactImport":
+        """Stream a vCard or CSV export into the contacts; schedule is Tk's after()"""
+        from contact_import import ContactImport
+        contact_import = ContactImport(path, self.contacts, schedule, normalizer=self.normalizer, **callbacks)
+        contact_import.start()
+        return contact_import
     
     def get_contacts_via_people_api(self) -> List[Dict]:
-        """Get contacts using Windows People API (if available)"""
+        """Read all contacts from Phone Link's local database (if available)"""
         contacts = []
         try:
-            # Try using Windows Runtime API via Python
-            # This requires pythonnet or similar, which is complex
-            # For now, we'll use a simpler approach: try to access Phone Link's data
-            # or use the People app URI
-            
-            # Alternative: Use Windows Contacts API via COM
-            # This is a simplified version - full implementation would require more Windows API knowledge
-            pass
+            source = self.contact_source()
+            if source is not None:
+                contacts = [
+                    {"name": c.name, "phones": [{"label": label, "number": number} for label, number in c.phones]}
+                    for c in source.read()
+                ]
         except Exception as e:
-            print(f"Error getting contacts: {e}")
+            logger.warning("Error getting contacts: %s", e, exc_info=True)
+            REGISTRY.inc("errors_total", operation="contacts")
         
         return contacts
     
-    def make_call(self, phone_number: str) -> bool:
-        """Initiate a call using Phone Link"""
+    def load_contacts(self) -> List[Tuple[str, List[Phone]]]:
+        """Fetch contacts and normalize them to E.164 in one batch"""
+        contacts = self.get_contacts_via_people_api()
+        records = ((c.get("name") or "Unknown", phones_from_dict(c)) for c in contacts)
+        return self.normalizer.normalize_contacts(records)
+    
+    def dial_number(self, phone_number: str) -> str:
+        """Number as it is dialed: E.164 when it parses, otherwise the digits as typed"""
+        return self.normalizer.normalize(phone_number) or self.normalizer.key(phone_number)
+    
+    def queue_call(self, phone_number: str, contact_name: Optional[str] = None) -> Optional[Future]:
+        """Queue a call without waiting; the future resolves to True once it is launched
+        
+        Text with letters is tried as a command ("call mom mobile") first. Returns None
+        if it names no contact and has no number to dial. A repeat of a call just
+        placed shares its future.
+        """
+        from call_history import NUMBER
+        from call_resolver import has_number, is_command
+        if is_command(phone_number) and self.normalizer.normalize(phone_number) is None:
+            # Words rather than a (vanity) number: "call mom mobile"
+            future = self.queue_command(phone_number)
+            if future is not None or not has_number(phone_number):
+                return future
+            # Names nobody but has digits, e.g. "555-0100 ext 12": dial them as before
+        clean_number = self.dial_number(phone_number)
+        if not clean_number:
+            return None
+        return self._record_call(self.dialer.dial(clean_number), NUMBER, clean_number, contact_name)
+    
+    def resolve_command(self, text: str) -> Optional["Resolution"]:
+        """Contact and number meant by a command such as "ring Jon Smyth at work" """
+        return self.resolver.resolve(text)
+    
+    def queue_command(self, text: str) -> Optional[Future]:
+        """Queue the call a natural-language command asks for; None if it matches nobody"""
+        from call_resolver import parse_command
+        parsed = parse_command(text)
+        if parsed.number is not None:
+            return self.queue_call(parsed.number)
+        resolution = self.resolve_command(text)
+        if resolution is None:
+            return None
+        if resolution.number is None:
+            return self.queue_contact_call(resolution.contact.name)
+        return self.queue_call(resolution.number, resolution.contact.name)
+    
+    def queue_contact_call(self, contact_name: str) -> Future:
+        """Queue a call to a contact by name, for contacts without a number"""
+        from call_history import CONTACT
+        return self._record_call(self.dialer.dial_contact(contact_name), CONTACT, contact_name, contact_name)
+    
+    def _record_call(self, future: Future, kind: str, target: str, contact_name: Optional[str]) -> Future:
+        """Add the call to the history once the dialer has launched it (or failed to)"""
+        with self._recorded_lock:
+            if future in self._recorded_calls:
+                return future  # A repeat merged into a call that is already recorded
+            self._recorded_calls.add(future)
+        started = time.time()
+        requested = time.perf_counter()
+        if self.supervisor is not None:
+            self.supervisor.time_dial_window(requested)
+        
+        def on_done(done: Future):
+            if done.cancelled() or done.exception() is not None:
+                outcome = "error"
+            else:
+                outcome = "dispatched" if done.result() else "failed"
+            self.history.record(target, outcome, time.perf_counter() - requested,
+                                contact=contact_name, kind=kind, started=started)
+        
+        future.add_done_callback(on_done)
+        return future
+    
+    def make_call(self, phone_number: str, contact_name: Optional[str] = None) -> bool:
+        """Initiate a call using Phone Link; phone_number may also be a command like "call mom" """
         try:
-            # Remove any non-digit characters except +
-            clean_number = ''.join(c for c in phone_number if c.isdigit() or c == '+')
-            if not clean_number:
+            future = self.queue_call(phone_number, contact_name)
+            if future is None:
                 return False
-            
-            # Use Phone Link URI scheme to make call
-            call_uri = f"{self.PHONE_CALL_URI}?PhoneNumber={clean_number}"
-            subprocess.Popen(["start", call_uri], shell=True)
-            return True
+            return future.result(self.LAUNCH_TIMEOUT)
         except Exception as e:
-            print(f"Error making call: {e}")
+            logger.warning("Error making call: %s", e, exc_info=True)
+            REGISTRY.inc("errors_total", operation="make_call")
             return False
     
     def make_call_to_contact(self, contact_name: str) -> bool:
         """Initiate a call to a contact by name"""
         # Phone Link URI scheme supports contact names
         try:
-            call_uri = f"{self.PHONE_CALL_URI}?ContactName={contact_name}"
-            subprocess.Popen(["start", call_uri], shell=True)
-            return True
+            return self.queue_contact_call(contact_name).result(self.LAUNCH_TIMEOUT)
         except Exception as e:
-            print(f"Error calling contact: {e}")
+            logger.warning("Error calling contact: %s", e, exc_info=True)
+            REGISTRY.inc("errors_total", operation="make_call_to_contact")
             return False
 
 
 class CallAssistantApp:
     """Main application class"""
     
-    def __init__(self, root):
+    # Most rows a search shows; an empty search lists every contact
+    CONTACT_FILTER_LIMIT = 2000
+    # How often the metrics line in the status area is refreshed
+    METRICS_REFRESH_MS = 2000
+    
+    def __init__(self, root, phone_manager: Optional[PhoneLinkManager] = None):
         self.root = root
         self.root.title("AI Call Assistant - v1.0")
         self.root.geometry("800x600")
         
-        self.phone_manager = PhoneLinkManager()
-        self.contacts = []
+        self.phone_manager = phone_manager if phone_manager is not None else PhoneLinkManager()
+        # Shared with the manager, which resolves "call <name>" commands against it
+        self.contact_store = self.phone_manager.contacts
         self.monitoring = False
+        self.device_monitor: Optional[DeviceMonitor] = None
+        self.contact_sync: Optional["ContactSync"] = None
+        self.contact_import: Optional["ContactImport"] = None
+        self.import_view_refreshed = 0.0
+        
+        # Every PhoneLinkManager call runs on the worker; results come back on the Tk thread
+        self.dispatcher = UiDispatcher(self.root)
+        self.worker = ProbeWorker(self.dispatcher)
+        self.frame_monitor = FrameLatencyMonitor(self.root)
+        # log() is safe from any thread; the widget is updated in batches by LogView
+        self.log_pipeline = LogPipeline(log_path=default_data_dir() / "logs" / "ai-call-assistant.log")
         
+        self.root.protocol("WM_DELETE_WINDOW", self.on_close)
         self.setup_ui()
-        self.check_initial_setup()
+        self.log_view = LogView(self.root, self.log_text, self.log_pipeline)
+        self.log_view.start()
+        self.dispatcher.start()
+        self.frame_monitor.start()
+        self.metrics_job = None
+        self.update_metrics_summary()
+        self.show_last_known_status()
+        self.device_listener = lambda changes: self.dispatcher.call_soon(self.on_device_changes, changes)
+        self.phone_manager.devices.listeners.append(self.device_listener)
         
-        # Start monitoring thread
+        # PowerShell warm-up, probes and monitoring wait until the window is on screen
+        self.first_paint_binding = self.root.bind("<Map>", self.on_first_map, add="+")
+    
+    def on_first_map(self, event):
+        """The main window was mapped; start background work once it has been drawn"""
+        if event.widget is not self.root or self.first_paint_binding is None:
+            return
+        self.root.unbind("<Map>", self.first_paint_binding)
+        self.first_paint_binding = None
+        # Redraws are idle callbacks queued ahead of this one
+        self.root.after_idle(self.on_first_paint)
+    
+    def on_first_paint(self):
+        STARTUP.mark("first_paint")
+        self.phone_manager.runner.warm_up()
+        self.open_call_history()
+        self.check_initial_setup()
         self.start_monitoring()
+        self.start_contact_sync()
+    
+    def record_first_status(self):
+        """Log the startup breakdown once the first connection status is confirmed"""
+        if "first_status" in STARTUP.marks:
+            return
+        STARTUP.mark("first_status")
+        for phase, seconds in STARTUP.breakdown().items():
+            REGISTRY.set_gauge("startup_seconds", seconds, phase=phase)
+        self.log(f"Startup: {STARTUP.format()}")
     
     def setup_ui(self):
         """Setup the user interface"""
@@ -280,11 +566,15 @@ class CallAssistantApp:
         self.phone_link_label = ttk.Label(status_frame, text="Phone Link: Checking...", font=("Arial", 9))
         self.phone_link_label.grid(row=2, column=0, sticky=tk.W, pady=2)
         
+        # Live probe timings and outcomes
+        self.metrics_label = ttk.Label(status_frame, text="", font=("Arial", 8), foreground="gray")
+        self.metrics_label.grid(row=3, column=0, sticky=tk.W, pady=2)
+        
         # Buttons
         button_frame = ttk.Frame(main_frame)
         button_frame.grid(row=1, column=0, columnspan=2, sticky=(tk.W, tk.E), pady=10)
         
-        self.refresh_btn = ttk.Button(button_frame, text="Refresh Status", command=self.refresh_status)
+        self.refresh_btn = ttk.Button(button_frame, text="Refresh Status", command=lambda: self.refresh_status(force=True))
         self.refresh_btn.grid(row=0, column=0, padx=5)
         
         self.launch_phone_link_btn = ttk.Button(button_frame, text="Launch Phone Link", command=self.launch_phone_link)
@@ -293,39 +583,68 @@ class CallAssistantApp:
         self.install_phone_link_btn = ttk.Button(button_frame, text="Install Phone Link", command=self.install_phone_link)
         self.install_phone_link_btn.grid(row=0, column=2, padx=5)
         
+        self.export_metrics_btn = ttk.Button(button_frame, text="Export Metrics", command=self.export_metrics)
+        self.export_metrics_btn.grid(row=0, column=3, padx=5)
+        
         # Contacts section
         contacts_frame = ttk.LabelFrame(main_frame, text="Contacts", padding="10")
         contacts_frame.grid(row=2, column=0, columnspan=2, sticky=(tk.W, tk.E, tk.N, tk.S), pady=5)
         
-        # Contacts list
-        contacts_list_frame = ttk.Frame(contacts_frame)
-        contacts_list_frame.grid(row=0, column=0, columnspan=2, sticky=(tk.W, tk.E, tk.N, tk.S))
+        # Search box; filtering is debounced so typing never waits on the list
+        ttk.Label(contacts_frame, text="Search:").grid(row=0, column=0, sticky=tk.W)
+        self.contact_filter = tk.StringVar()
+        self.contact_filter.trace_add("write", lambda *args: self.schedule_contact_filter())
+        self.contact_filter_entry = ttk.Entry(contacts_frame, textvariable=self.contact_filter)
+        self.contact_filter_entry.grid(row=0, column=1, sticky=(tk.W, tk.E), pady=(0, 5))
+        self.contact_filter_job = None
         
-        scrollbar = ttk.Scrollbar(contacts_list_frame)
-        scrollbar.pack(side=tk.RIGHT, fill=tk.Y)
-        
-        self.contacts_listbox = tk.Listbox(contacts_list_frame, yscrollcommand=scrollbar.set, height=10)
-        self.contacts_listbox.pack(side=tk.LEFT, fill=tk.BOTH, expand=True)
-        scrollbar.config(command=self.contacts_listbox.yview)
+        # Contacts list (virtualized: only visible rows are drawn)
+        self.contacts_view = VirtualContactList(contacts_frame, render=self.render_contact_row)
+        self.contacts_view.grid(row=1, column=0, columnspan=2, sticky=(tk.W, tk.E, tk.N, tk.S))
         
         # Bind double-click to call
-        self.contacts_listbox.bind('<Double-1>', self.on_contact_double_click)
+        self.contacts_view.canvas.bind('<Double-1>', self.on_contact_double_click)
+        self.contacts_view.canvas.bind('<Return>', lambda e: self.call_contact(self.contacts_view.selected_id()))
         
         # Load contacts button
         load_contacts_btn = ttk.Button(contacts_frame, text="Load Contacts", command=self.load_contacts)
-        load_contacts_btn.grid(row=1, column=0, pady=5)
+        load_contacts_btn.grid(row=2, column=0, pady=5, sticky=tk.W)
+        
+        # Import a vCard or CSV export; the same button cancels a running import
+        self.import_btn = ttk.Button(contacts_frame, text="Import...", command=self.import_contacts)
+        self.import_btn.grid(row=2, column=1, pady=5, sticky=tk.W)
+        
+        self.contacts_count_label = ttk.Label(contacts_frame, text="", font=("Arial", 9))
+        self.contacts_count_label.grid(row=2, column=1, sticky=tk.E)
         
         # Make call section
         call_frame = ttk.LabelFrame(main_frame, text="Make Call", padding="10")
         call_frame.grid(row=3, column=0, columnspan=2, sticky=(tk.W, tk.E), pady=5)
         
-        ttk.Label(call_frame, text="Phone Number:").grid(row=0, column=0, sticky=tk.W, padx=5)
-        self.phone_entry = ttk.Entry(call_frame, width=20)
+        ttk.Label(call_frame, text="Number or name:").grid(row=0, column=0, sticky=tk.W, padx=5)
+        # Accepts numbers and commands such as "call mom mobile"; the match is previewed as you type
+        self.phone_text = tk.StringVar()
+        self.phone_text.trace_add("write", lambda *args: self.preview_call_target())
+        self.phone_entry = ttk.Entry(call_frame, width=28, textvariable=self.phone_text)
         self.phone_entry.grid(row=0, column=1, padx=5)
+        self.phone_entry.bind("<Return>", lambda e: self.make_call())
         
         call_btn = ttk.Button(call_frame, text="Call", command=self.make_call)
         call_btn.grid(row=0, column=2, padx=5)
         
+        self.call_target_label = ttk.Label(call_frame, text="", font=("Arial", 9), foreground="gray")
+        self.call_target_label.grid(row=0, column=3, sticky=tk.W, padx=5)
+        
+        # Quick dial: redial plus the most called numbers and contacts, from the history's cached list
+        quick_dial_frame = ttk.Frame(call_frame)
+        quick_dial_frame.grid(row=1, column=0, columnspan=4, sticky=tk.W, pady=(5, 0))
+        self.redial_btn = ttk.Button(quick_dial_frame, text="Redial", command=self.redial, state=tk.DISABLED)
+        self.redial_btn.grid(row=0, column=0, padx=5)
+        self.quick_dial_buttons = [
+            ttk.Button(quick_dial_frame, width=14) for _ in range(self.phone_manager.QUICK_DIAL_SIZE)
+        ]
+        self.quick_dial_entries: Tuple["QuickDialEntry", ...] = ()
+        
         # Log section
         log_frame = ttk.LabelFrame(main_frame, text="Log", padding="10")
         log_frame.grid(row=4, column=0, columnspan=2, sticky=(tk.W, tk.E, tk.N, tk.S), pady=5)
@@ -339,25 +658,39 @@ class CallAssistantApp:
         main_frame.columnconfigure(0, weight=1)
         main_frame.rowconfigure(2, weight=1)
         main_frame.rowconfigure(4, weight=1)
-        contacts_frame.columnconfigure(0, weight=1)
-        contacts_frame.rowconfigure(0, weight=1)
+        contacts_frame.columnconfigure(1, weight=1)
+        contacts_frame.rowconfigure(1, weight=1)
     
     def log(self, message: str):
-        """Add message to log"""
-        self.log_text.insert(tk.END, f"[{time.strftime('%H:%M:%S')}] {message}\n")
-        self.log_text.see(tk.END)
-        self.root.update_idletasks()
+        """Add message to log (safe to call from any thread)"""
+        self.log_pipeline.log(message)
+    
+    def show_last_known_status(self):
+        """Show the status saved by the previous run until the checks confirm it"""
+        last_known = self.phone_manager.last_known_status()
+        if "phone_link_installed" in last_known:
+            self.show_phone_link_status(last_known["phone_link_installed"], confirmed=False)
+        if "connection" in last_known:
+            connected, connection_type = last_known["connection"]
+            self.show_connection_status(connected, connection_type, confirmed=False)
     
     def check_initial_setup(self):
-        """Check initial setup and update UI"""
+        """Confirm the Phone Link and connection status in the background"""
         self.log("Checking Phone Link installation...")
-        phone_link_installed = self.phone_manager.check_phone_link_installed()
-        
+        self.worker.submit(
+            "phone_link_installed",
+            self.phone_manager.check_phone_link_installed,
+            self.on_phone_link_checked
+        )
+        self.refresh_status()
+    
+    def on_phone_link_checked(self, phone_link_installed: bool):
+        """Apply a confirmed Phone Link installation check to the UI"""
+        self.show_phone_link_status(phone_link_installed)
         if phone_link_installed:
-            self.phone_link_label.config(text="Phone Link: Installed ✓", foreground="green")
             self.log("Phone Link is installed")
+            self.start_phone_link_supervisor()
         else:
-            self.phone_link_label.config(text="Phone Link: Not Installed ✗", foreground="red")
             self.log("Phone Link is not installed")
             messagebox.showwarning(
                 "Phone Link Not Found",
@@ -365,33 +698,86 @@ class CallAssistantApp:
                 "Click 'Install Phone Link' to open Microsoft Store and install it.\n\n"
                 "Phone Link is required for this application to work."
             )
-        
-        self.refresh_status()
     
-    def refresh_status(self):
-        """Refresh connection status"""
+    def start_phone_link_supervisor(self):
+        """Pre-warm Phone Link so the first call does not wait for it to start"""
+        if self.phone_manager.supervisor is not None:
+            return
+        supervisor = self.phone_manager.start_supervisor(
+            on_change=lambda running: self.dispatcher.call_soon(self.log, self.describe_phone_link_state(running))
+        )
+        if supervisor is not None:
+            self.log("Keeping Phone Link warm in the background")
+    
+    def describe_phone_link_state(self, running: bool) -> str:
+        """Log line for a supervisor change; called on the supervisor thread, after it decided"""
+        supervisor = self.phone_manager.supervisor
+        if running:
+            return "Phone Link is running"
+        if supervisor is not None and supervisor.paused:
+            return "Phone Link exited; it will be started again when a phone connects"
+        return "Phone Link exited; restarting it"
+    
+    def show_phone_link_status(self, phone_link_installed: bool, confirmed: bool = True):
+        """Update the Phone Link label; unconfirmed values come from the last run"""
+        suffix = "" if confirmed else " (last known)"
+        if phone_link_installed:
+            self.phone_link_label.config(text=f"Phone Link: Installed ✓{suffix}", foreground="green")
+        else:
+            self.phone_link_label.config(text=f"Phone Link: Not Installed ✗{suffix}", foreground="red")
+    
+    def refresh_status(self, force: bool = False):
+        """Refresh connection status in the background"""
         self.log("Checking phone connection...")
-        connected, connection_type = self.phone_manager.detect_phone_connection()
+        mark = self.frame_monitor.mark()
+        started = time.perf_counter()
+        
+        def on_result(status):
+            self.on_connection_checked(*status)
+            self.log(
+                f"Connection check took {time.perf_counter() - started:.2f}s "
+                f"(worst UI frame delay {self.frame_monitor.max_since(mark):.0f} ms)"
+            )
         
+        self.worker.submit(
+            "connection",
+            lambda: self.phone_manager.detect_phone_connection(force=force),
+            on_result
+        )
+    
+    def on_connection_checked(self, connected: bool, connection_type: Optional[str]):
+        """Apply a confirmed connection check to the UI"""
+        self.show_connection_status(connected, connection_type)
+        self.record_first_status()
+        if connected:
+            self.log(f"Phone detected via {connection_type}")
+        else:
+            self.log("No phone connection detected")
+    
+    def show_connection_status(self, connected: bool, connection_type: Optional[str], confirmed: bool = True):
+        """Update the connection labels; unconfirmed values come from the last run"""
+        suffix = "" if confirmed else " (last known)"
         if connected:
             self.connection_label.config(
-                text=f"Phone: Connected via {connection_type} ✓",
+                text=f"Phone: Connected via {connection_type} ✓{suffix}",
                 foreground="green"
             )
             self.status_label.config(text="Status: Ready", foreground="green")
-            self.log(f"Phone detected via {connection_type}")
         else:
             self.connection_label.config(
-                text="Phone: Not Connected ✗",
+                text=f"Phone: Not Connected ✗{suffix}",
                 foreground="red"
             )
             self.status_label.config(text="Status: Waiting for phone...", foreground="orange")
-            self.log("No phone connection detected")
     
     def launch_phone_link(self):
         """Launch Windows Phone Link"""
         self.log("Launching Phone Link...")
-        if self.phone_manager.launch_phone_link():
+        self.worker.submit("launch_phone_link", self.phone_manager.launch_phone_link, self.on_phone_link_launched)
+    
+    def on_phone_link_launched(self, success: bool):
+        """Report the result of launching Phone Link"""
+        if success:
             self.log("Phone Link launched successfully")
             messagebox.showinfo("Success", "Phone Link has been launched.\n\nPlease pair your phone if not already done.")
         else:
@@ -401,7 +787,11 @@ class CallAssistantApp:
     def install_phone_link(self):
         """Install Windows Phone Link"""
         self.log("Opening Microsoft Store to install Phone Link...")
-        if self.phone_manager.install_phone_link():
+        self.worker.submit("install_phone_link", self.phone_manager.install_phone_link, self.on_store_opened)
+    
+    def on_store_opened(self, success: bool):
+        """Report the result of opening the Microsoft Store"""
+        if success:
             self.log("Microsoft Store opened")
             messagebox.showinfo(
                 "Install Phone Link",
@@ -414,20 +804,42 @@ class CallAssistantApp:
             messagebox.showerror("Error", "Failed to open Microsoft Store.")
     
     def load_contacts(self):
-        """Load contacts (placeholder - will be enhanced)"""
+        """Sync contacts from Phone Link's database, or load them once if there is none"""
+        if self.contact_sync is not None:
+            self.log("Checking Phone Link contacts for changes...")
+            self.contact_sync.trigger()
+            return
         self.log("Loading contacts...")
-        # For now, we'll show a message that contacts need to be accessed via Phone Link
-        # Full contact access requires more complex Windows API integration
-        self.contacts_listbox.delete(0, tk.END)
+        self.contacts_view.clear()
         self.log("Note: Full contact access requires Phone Link to be running and phone to be paired.")
         self.log("For now, you can make calls by entering phone numbers directly.")
         
-        # Try to get contacts via People API (if available)
-        contacts = self.phone_manager.get_contacts_via_people_api()
+        self.worker.submit("load_contacts", self.phone_manager.load_contacts, self.on_contacts_loaded)
+    
+    def start_contact_sync(self):
+        """Mirror Phone Link's contacts into the list; later checks apply only changes"""
+        self.contact_sync = self.phone_manager.contact_sync(
+            self.contact_store,
+            on_change=lambda result: self.dispatcher.call_soon(self.on_contacts_synced, result),
+            on_error=lambda error: self.log(f"Contact sync failed: {error}"),
+        )
+        if self.contact_sync is not None:
+            self.log(f"Syncing contacts from {self.contact_sync.source.path}")
+            self.contact_sync.start()
+    
+    def on_contacts_synced(self, result: "SyncResult"):
+        self.apply_contact_filter()
+        self.refresh_call_resolver()
+        self.log(f"Contacts synced: {result.describe()}")
+    
+    def on_contacts_loaded(self, contacts: List[Tuple[str, List[Phone]]]):
+        """Show contacts fetched in the background"""
         if contacts:
-            for contact in contacts:
-                self.contacts_listbox.insert(tk.END, contact.get('name', 'Unknown'))
-            self.log(f"Loaded {len(contacts)} contacts")
+            self.contact_store.clear()
+            self.contact_store.add_many(contacts)
+            self.apply_contact_filter()
+            self.refresh_call_resolver()
+            self.log(f"Loaded {len(self.contact_store)} contacts")
         else:
             self.log("Could not access contacts directly. Use Phone Link to view contacts.")
             messagebox.showinfo(
@@ -437,62 +849,361 @@ class CallAssistantApp:
                 "This feature will be enhanced in future versions."
             )
     
+    def import_contacts(self):
+        """Import a contacts export in the background, or cancel the import in progress"""
+        if self.contact_import is not None and not self.contact_import.finished:
+            self.contact_import.cancel()
+            return
+        path = filedialog.askopenfilename(
+            title="Import contacts",
+            filetypes=[("Contacts", "*.vcf *.vcard *.csv"), ("vCard", "*.vcf *.vcard"), ("CSV", "*.csv"),
+                       ("All files", "*.*")]
+        )
+        if not path:
+            return
+        self.log(f"Importing contacts from {path}")
+        try:
+            self.contact_import = self.phone_manager.import_contacts(
+                path, self.root.after, on_progress=self.on_import_progress, on_done=self.on_import_done
+            )
+        except OSError as e:
+            self.log(f"Could not import {path}: {e}")
+            return
+        self.import_view_refreshed = time.perf_counter()
+        self.import_btn.config(text="Cancel Import")
+    
+    def on_import_progress(self, progress: "ImportProgress"):
+        """Called on the Tk thread after each batch; the list is re-filtered at most once a second"""
+        self.contacts_count_label.config(text=progress.describe())
+        if time.perf_counter() - self.import_view_refreshed >= 1.0:
+            self.import_view_refreshed = time.perf_counter()
+            self.apply_contact_filter()
+    
+    def on_import_done(self, progress: "ImportProgress"):
+        self.import_btn.config(text="Import...")
+        self.apply_contact_filter()
+        self.refresh_call_resolver()
+        self.log(progress.describe())
+    
+    def handle_launch_args(self, args: List[str]):
+        """Bring the window forward and dial the number or tel: link given on a command line
+
+        Called with this launch's arguments and, through the instance server, with
+        those of every later launch.
+        """
+        self.root.deiconify()
+        self.root.lift()
+        self.root.focus_force()
+        from single_instance import dial_target
+        target = dial_target(args)
+        if target:
+            self.log(f"Opened with {target}")
+            self.phone_text.set(target)
+            self.make_call()
+    
+    def render_contact_row(self, contact_id: int) -> str:
+        """Text of one contacts list row"""
+        contact = self.contact_store.get(contact_id)
+        if contact is None:
+            return ""
+        number = contact.primary_number
+        return f"{contact.name}    {number}" if number else contact.name
+    
+    def schedule_contact_filter(self, delay_ms: int = 150):
+        """Re-filter the contacts list once typing pauses"""
+        if self.contact_filter_job is not None:
+            self.root.after_cancel(self.contact_filter_job)
+        self.contact_filter_job = self.root.after(delay_ms, self.apply_contact_filter)
+    
+    def apply_contact_filter(self):
+        """Show contacts matching the search box, or all contacts when it is empty"""
+        self.contact_filter_job = None
+        query = self.contact_filter.get().strip()
+        if query:
+            ids = [contact.id for contact in self.contact_store.search(query, limit=self.CONTACT_FILTER_LIMIT)]
+        else:
+            ids = self.contact_store.ids_by_name()
+        total = len(self.contact_store)
+        self.contacts_view.set_rows(
+            ids,
+            on_loaded=lambda shown: self.contacts_count_label.config(
+                text=f"{shown} of {total} contacts" if query else f"{total} contacts"
+            )
+        )
+    
     def on_contact_double_click(self, event):
         """Handle double-click on contact"""
-        selection = self.contacts_listbox.curselection()
-        if selection:
-            contact_name = self.contacts_listbox.get(selection[0])
-            self.log(f"Calling {contact_name}...")
-            if self.phone_manager.make_call_to_contact(contact_name):
-                self.log(f"Call initiated to {contact_name}")
-            else:
-                self.log(f"Failed to call {contact_name}")
-                messagebox.showerror("Error", f"Failed to call {contact_name}")
+        self.call_contact(self.contacts_view.contact_id_at(event.y))
+    
+    def call_contact(self, contact_id: Optional[int]):
+        """Call a contact from the list by id"""
+        contact = self.contact_store.get(contact_id) if contact_id is not None else None
+        if contact is None:
+            return
+        contact_name = contact.name
+        number = contact.primary_number
+        self.log(f"Calling {contact_name}...")
+        if number:
+            call = lambda: self.phone_manager.make_call(number, contact_name)
+        else:
+            call = lambda: self.phone_manager.make_call_to_contact(contact_name)
+        # Keyed by contact, so a double-click while the call is starting is merged
+        self.worker.submit(
+            f"call-contact:{contact_id}",
+            call,
+            lambda success: self.on_contact_call_started(contact_name, success)
+        )
+    
+    def on_contact_call_started(self, contact_name: str, success: bool):
+        """Report the result of calling a contact"""
+        if success:
+            self.log(f"Call initiated to {contact_name}")
+        else:
+            self.log(f"Failed to call {contact_name}")
+            messagebox.showerror("Error", f"Failed to call {contact_name}")
     
     def make_call(self):
         """Make a call to the entered phone number"""
         phone_number = self.phone_entry.get().strip()
         if not phone_number:
-            messagebox.showwarning("Warning", "Please enter a phone number")
+            messagebox.showwarning("Warning", "Please enter a phone number or a name")
             return
         
         self.log(f"Calling {phone_number}...")
-        if self.phone_manager.make_call(phone_number):
+        self.worker.submit(
+            f"call:{phone_number}",
+            lambda: self.phone_manager.make_call(phone_number),
+            lambda success: self.on_call_started(phone_number, success)
+        )
+    
+    def preview_call_target(self):
+        """Show who a typed command would call; memoized, so cheap on every keystroke"""
+        text = self.phone_text.get().strip()
+        from call_resolver import has_number, is_command
+        resolver = self.phone_manager.resolver
+        if not is_command(text) or not resolver.ready:
+            self.call_target_label.config(text="")
+            return
+        resolution = resolver.resolve(text)
+        if resolution is not None:
+            self.call_target_label.config(text=f"→ {resolution.describe()}")
+        else:
+            # Text that names nobody is still dialed if it has a number
+            self.call_target_label.config(text="" if has_number(text) else "No matching contact")
+    
+    def refresh_call_resolver(self):
+        """Rebuild the name index in the background after the contacts change"""
+        self.worker.submit("resolver-index", self.phone_manager.resolver.refresh, lambda _: self.preview_call_target())
+    
+    def on_call_started(self, phone_number: str, success: bool):
+        """Report the result of calling a number"""
+        if success:
             self.log(f"Call initiated to {phone_number}")
             messagebox.showinfo("Call", f"Calling {phone_number}...\n\nPhone Link should open to handle the call.")
         else:
             self.log(f"Failed to call {phone_number}")
             messagebox.showerror("Error", f"Failed to call {phone_number}")
     
+    def open_call_history(self):
+        """Open the history's database in the background, then show quick dial"""
+        self.worker.submit("history", lambda: self.phone_manager.history, self.on_call_history_open)
+    
+    def on_call_history_open(self, history: "CallHistory"):
+        # Repaint quick dial after each history commit, not on every redraw
+        history.on_change = lambda: self.dispatcher.call_soon(self.render_quick_dial)
+        self.render_quick_dial()
+    
+    def render_quick_dial(self):
+        """Show the history's precomputed quick-dial list; no database access"""
+        history = self.phone_manager.history
+        last_call = history.last_call()
+        if last_call is not None:
+            self.redial_btn.config(state=tk.NORMAL, text=f"Redial {last_call.label}")
+        entries = history.quick_dial()
+        if entries == self.quick_dial_entries:
+            return
+        self.quick_dial_entries = entries
+        for column, button in enumerate(self.quick_dial_buttons, start=1):
+            if column <= len(entries):
+                entry = entries[column - 1]
+                button.config(text=entry.label, command=lambda entry=entry: self.quick_dial(entry))
+                button.grid(row=0, column=column, padx=2)
+            else:
+                button.grid_remove()
+    
+    def redial(self):
+        """Call the most recent number or contact again"""
+        last_call = self.phone_manager.history.last_call()
+        if last_call is not None:
+            self.place_history_call(last_call.kind, last_call.target, last_call.contact)
+    
+    def quick_dial(self, entry: "QuickDialEntry"):
+        self.place_history_call(entry.kind, entry.target, entry.contact)
+    
+    def place_history_call(self, kind: str, target: str, contact_name: Optional[str]):
+        from call_history import CONTACT
+        label = contact_name or target
+        self.log(f"Calling {label}...")
+        if kind == CONTACT:
+            call = lambda: self.phone_manager.make_call_to_contact(target)
+        else:
+            call = lambda: self.phone_manager.make_call(target, contact_name)
+        self.worker.submit(f"call:{target}", call, lambda success: self.on_contact_call_started(label, success))
+    
     def start_monitoring(self):
         """Start background monitoring of phone connection"""
         self.monitoring = True
-        
-        def monitor():
-            while self.monitoring:
-                time.sleep(5)  # Check every 5 seconds
-                if self.monitoring:
-                    connected, connection_type = self.phone_manager.detect_phone_connection()
-                    current_text = self.connection_label.cget("text")
-                    expected_text = f"Phone: Connected via {connection_type} ✓" if connected else "Phone: Not Connected ✗"
-                    
-                    if current_text != expected_text:
-                        self.root.after(0, self.refresh_status)
-        
-        monitor_thread = threading.Thread(target=monitor, daemon=True)
-        monitor_thread.start()
+        # Re-probe only when Windows reports a device change; poll adaptively otherwise
+        event_source = WmiDeviceEventSource() if sys.platform == "win32" else None
+        self.device_monitor = DeviceMonitor(
+            # Shares the worker's in-flight request if a refresh is already probing
+            probe=lambda: tuple(self.worker.submit(
+                "connection", lambda: self.phone_manager.detect_phone_connection(force=True)
+            ).result()),
+            on_change=lambda status: self.dispatcher.call_soon(self.on_monitored_change, *status),
+            event_source=event_source,
+            on_event=self.on_device_event
+        )
+        self.device_monitor.start()
+        self.log(f"Monitoring phone connection ({self.device_monitor.mode})")
+    
+    def on_device_event(self, event):
+        """Called on the monitor thread for every device notification"""
+        if event.kind == "lost":
+            self.log("Device notifications stopped; falling back to polling")
+    
+    def on_device_changes(self, changes: List[DeviceChange]):
+        """Log phones plugged in, paired or going out of range, one line each"""
+        for line in DeviceRegistry.describe(changes):
+            self.log(f"Device: {line}")
+    
+    def on_monitored_change(self, connected: bool, connection_type: Optional[str]):
+        """Apply a monitor result if it differs from what is displayed"""
+        current_text = self.connection_label.cget("text")
+        expected_text = f"Phone: Connected via {connection_type} ✓" if connected else "Phone: Not Connected ✗"
+        if self.monitoring and current_text != expected_text:
+            self.on_connection_checked(connected, connection_type)
+    
+    def update_metrics_summary(self):
+        """Refresh the metrics line in the status area"""
+        self.metrics_label.config(text=REGISTRY.summary())
+        self.metrics_job = self.root.after(self.METRICS_REFRESH_MS, self.update_metrics_summary)
+    
+    def export_metrics(self):
+        """Write the metrics as JSON and Prometheus text to the data directory"""
+        self.worker.submit(
+            "export_metrics",
+            lambda: REGISTRY.dump(default_data_dir() / "metrics"),
+            self.on_metrics_exported,
+            lambda error: self.log(f"Failed to export metrics: {error}")
+        )
+    
+    def on_metrics_exported(self, paths):
+        json_path, prometheus_path = paths
+        self.log(f"Metrics written to {json_path} and {prometheus_path}")
+    
+    def on_close(self):
+        """Stop background work and close the window"""
+        self.monitoring = False
+        if self.phone_manager.history_open:
+            self.phone_manager.history.on_change = None
+        self.phone_manager.devices.listeners.remove(self.device_listener)
+        if self.metrics_job is not None:
+            self.root.after_cancel(self.metrics_job)
+        if self.device_monitor is not None:
+            self.device_monitor.stop()
+        if self.contact_sync is not None:
+            self.contact_sync.stop()
+        if self.contact_import is not None:
+            self.contact_import.cancel()
+        if self.phone_manager.supervisor is not None:
+            self.phone_manager.supervisor.on_change = None
+        self.frame_monitor.stop()
+        self.dispatcher.stop()
+        self.worker.shutdown()
+        self.log_view.stop()
+        self.log_pipeline.close()
+        self.phone_manager.close()
+        self.root.destroy()
+
+
+def run_headless(host: Optional[str] = None, port: Optional[int] = None):
+    """Serve the local dial API without a window until interrupted"""
+    from dial_service import DEFAULT_HOST, DEFAULT_PORT, DialService, load_or_create_token, run_service
+    
+    host = host if host is not None else DEFAULT_HOST
+    port = port if port is not None else DEFAULT_PORT
+    
+    log_pipeline = LogPipeline(log_path=default_data_dir() / "logs" / "ai-call-assistant.log")
+    manager = PhoneLinkManager()
+    manager.runner.warm_up()
+    if manager.check_phone_link_installed():
+        manager.start_supervisor()
+    token_path = default_data_dir() / "api_token"
+    service = DialService(manager, load_or_create_token(token_path), host=host, port=port)
+    
+    def on_started(bound_host: str, bound_port: int):
+        log_pipeline.log(f"Dial API listening on http://{bound_host}:{bound_port}")
+        print(f"Dial API listening on http://{bound_host}:{bound_port}")
+        print(f"Bearer token: {token_path}")
+    
+    try:
+        asyncio.run(run_service(service, on_started))
+    except KeyboardInterrupt:
+        pass
+    finally:
+        manager.close()
+        log_pipeline.close()
 
 
-def main():
+def main(argv: Optional[List[str]] = None):
     """Main entry point"""
+    import argparse
+    
+    parser = argparse.ArgumentParser(description="AI Call Assistant")
+    parser.add_argument("--headless", action="store_true",
+                        help="run without a window and serve the local dial API")
+    # Left unset here so only a headless run imports dial_service for its defaults
+    parser.add_argument("--host", help="loopback address for the dial API")
+    parser.add_argument("--port", type=int, help="port for the dial API")
+    parser.add_argument("target", nargs="?",
+                        help="number, tel: link or 'call <name>' command to dial (passed on to a running window)")
+    args = parser.parse_args(argv)
+    
     # Check if running on Windows
-    if platform.system() != "Windows":
+    if sys.platform != "win32":
         print("This application is designed for Windows only.")
         sys.exit(1)
     
+    if args.headless:
+        run_headless(args.host, args.port)
+        return
+    
+    from single_instance import InstanceServer, claim_or_forward
+    
+    launch_args = sys.argv[1:] if argv is None else list(argv)
+    try:
+        lock = INSTANCE_LOCK if INSTANCE_LOCK is not None else claim_or_forward(launch_args)
+    except TimeoutError as e:
+        print(f"AI Call Assistant is already running but did not respond: {e}")
+        sys.exit(1)
+    if lock is None:
+        return  # Handed to the running window
+    
     root = tk.Tk()
     app = CallAssistantApp(root)
-    root.mainloop()
+    server = InstanceServer(lambda forwarded: app.dispatcher.call_soon(app.handle_launch_args, forwarded))
+    try:
+        server.start()
+    except OSError as e:
+        app.log(f"Single-instance listener unavailable: {e}")
+    if args.target:
+        root.after_idle(app.handle_launch_args, launch_args)
+    try:
+        root.mainloop()
+    finally:
+        server.stop()
+        lock.release()
 
 
 if __name__ == "__main__":
@@ -0,0 +1,229 @@
+"""
+In-process metrics: counters, gauges and timing histograms.
+
+Probes, PowerShell commands and call dispatches record into the module-level
+REGISTRY with a small set of labels. Probe outcomes are "hit" (the probe found what
+it looks for), "miss", "timeout", "error" or "cancelled" (another probe answered
+first). The registry can be dumped as JSON or in the Prometheus text exposition
+format, and summary() gives a one-line digest for the status bar.
+"""
+
+import json
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Deque, Dict, Iterator, List, Optional, Tuple
+
+# Seconds; covers a cached lookup up to a probe hitting its timeout
+DEFAULT_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+METRIC_PREFIX = "ai_call_assistant_"
+
+LabelKey = Tuple[Tuple[str, str], ...]
+
+
+def _label_key(labels: Dict[str, object]) -> LabelKey:
+    return tuple(sorted((name, str(value)) for name, value in labels.items()))
+
+
+class Histogram:
+    """Cumulative bucket counts plus a window of recent samples for percentiles"""
+
+    __slots__ = ("buckets", "counts", "count", "sum", "recent")
+
+    def __init__(self, buckets: Tuple[float, ...] = DEFAULT_BUCKETS, window: int = 256):
+        self.buckets = buckets
+        self.counts = [0] * len(buckets)
+        self.count = 0
+        self.sum = 0.0
+        self.recent: Deque[float] = deque(maxlen=window)
+
+    def observe(self, value: float):
+        self.count += 1
+        self.sum += value
+        self.recent.append(value)
+        for i, bound in enumerate(self.buckets):
+            if value <= bound:
+                self.counts[i] += 1
+
+    def percentile(self, pct: float) -> float:
+        ordered = sorted(self.recent)
+        if not ordered:
+            return 0.0
+        return ordered[min(len(ordered) - 1, int(len(ordered) * pct / 100.0))]
+
+
+class _Timing:
+    """Handed out by MetricsRegistry.time(); set outcome before the block ends"""
+
+    __slots__ = ("outcome",)
+
+    def __init__(self, outcome: str):
+        self.outcome = outcome
+
+
+class MetricsRegistry:
+    """Thread-safe store of labelled counters, gauges and histograms"""
+
+    def __init__(self, buckets: Tuple[float, ...] = DEFAULT_BUCKETS):
+        self.buckets = buckets
+        self._counters: Dict[str, Dict[LabelKey, float]] = {}
+        self._gauges: Dict[str, Dict[LabelKey, float]] = {}
+        self._histograms: Dict[str, Dict[LabelKey, Histogram]] = {}
+        self._last: Dict[str, Dict[LabelKey, str]] = {}  # Last outcome per histogram series
+        self._lock = threading.Lock()
+
+    def inc(self, name: str, amount: float = 1.0, **labels):
+        key = _label_key(labels)
+        with self._lock:
+            series = self._counters.setdefault(name, {})
+            series[key] = series.get(key, 0.0) + amount
+
+    def set_gauge(self, name: str, value: float, **labels):
+        with self._lock:
+            self._gauges.setdefault(name, {})[_label_key(labels)] = value
+
+    def observe(self, name: str, seconds: float, outcome: Optional[str] = None, **labels):
+        """Record a duration; the outcome becomes a label of the series"""
+        if outcome is not None:
+            labels["outcome"] = outcome
+        key = _label_key(labels)
+        with self._lock:
+            series = self._histograms.setdefault(name, {})
+            histogram = series.get(key)
+            if histogram is None:
+                histogram = series[key] = Histogram(self.buckets)
+            histogram.observe(seconds)
+            if outcome is not None:
+                base = _label_key({k: v for k, v in labels.items() if k != "outcome"})
+                self._last.setdefault(name, {})[base] = outcome
+
+    @contextmanager
+    def time(self, name: str, outcome: str = "ok", **labels) -> Iterator[_Timing]:
+        """Time a block; an exception escaping it records outcome "error" """
+        timing = _Timing(outcome)
+        started = time.perf_counter()
+        try:
+            yield timing
+        except BaseException:
+            timing.outcome = "error"
+            raise
+        finally:
+            self.observe(name, time.perf_counter() - started, timing.outcome, **labels)
+
+    def reset(self):
+        with self._lock:
+            self._counters.clear()
+            self._gauges.clear()
+            self._histograms.clear()
+            self._last.clear()
+
+    # -- Export ---------------------------------------------------------------
+
+    def snapshot(self) -> Dict:
+        """Plain-data copy of every series, suitable for JSON"""
+        with self._lock:
+            counters = {
+                name: [{"labels": dict(key), "value": value} for key, value in series.items()]
+                for name, series in self._counters.items()
+            }
+            gauges = {
+                name: [{"labels": dict(key), "value": value} for key, value in series.items()]
+                for name, series in self._gauges.items()
+            }
+            histograms = {
+                name: [
+                    {
+                        "labels": dict(key),
+                        "count": h.count,
+                        "sum": h.sum,
+                        "buckets": {str(bound): count for bound, count in zip(h.buckets, h.counts)},
+                        "p50": h.percentile(50),
+                        "p95": h.percentile(95),
+                    }
+                    for key, h in series.items()
+                ]
+                for name, series in self._histograms.items()
+            }
+        return {"timestamp": time.time(), "counters": counters, "gauges": gauges, "histograms": histograms}
+
+    def to_json(self) -> str:
+        return json.dumps(self.snapshot(), indent=2)
+
+    def dump(self, directory: Path) -> Tuple[Path, Path]:
+        """Write metrics.json and metrics.prom into directory; returns both paths"""
+        directory.mkdir(parents=True, exist_ok=True)
+        json_path = directory / "metrics.json"
+        prometheus_path = directory / "metrics.prom"
+        json_path.write_text(self.to_json(), encoding="utf-8")
+        prometheus_path.write_text(self.to_prometheus(), encoding="utf-8")
+        return json_path, prometheus_path
+
+    def to_prometheus(self) -> str:
+        """Prometheus text exposition format (version 0.0.4)"""
+        lines: List[str] = []
+        snapshot = self.snapshot()
+        for name, series in sorted(snapshot["counters"].items()):
+            metric = METRIC_PREFIX + name
+            lines.append(f"# TYPE {metric} counter")
+            lines.extend(f"{metric}{_format_labels(s['labels'])} {_format_value(s['value'])}" for s in series)
+        for name, series in sorted(snapshot["gauges"].items()):
+            metric = METRIC_PREFIX + name
+            lines.append(f"# TYPE {metric} gauge")
+            lines.extend(f"{metric}{_format_labels(s['labels'])} {_format_value(s['value'])}" for s in series)
+        for name, series in sorted(snapshot["histograms"].items()):
+            metric = METRIC_PREFIX + name
+            lines.append(f"# TYPE {metric} histogram")
+            for s in series:
+                for bound, count in s["buckets"].items():
+                    lines.append(f"{metric}_bucket{_format_labels(s['labels'], le=bound)} {count}")
+                lines.append(f"{metric}_bucket{_format_labels(s['labels'], le='+Inf')} {s['count']}")
+                lines.append(f"{metric}_sum{_format_labels(s['labels'])} {_format_value(s['sum'])}")
+                lines.append(f"{metric}_count{_format_labels(s['labels'])} {s['count']}")
+        return "\n".join(lines) + "\n"
+
+    def summary(self) -> str:
+        """One line for the status bar: each probe's last outcome and median time,
+        PowerShell command and spawn counts, and calls dispatched"""
+        with self._lock:
+            probes = self._histograms.get("probe_duration_seconds", {})
+            last = self._last.get("probe_duration_seconds", {})
+            medians: Dict[str, List[float]] = {}
+            for key, histogram in probes.items():
+                probe = dict(key).get("probe", "?")
+                medians.setdefault(probe, []).extend(histogram.recent)
+            parts = []
+            for key, outcome in sorted(last.items()):
+                probe = dict(key).get("probe", "?")
+                samples = sorted(medians.get(probe, ()))
+                median_ms = samples[len(samples) // 2] * 1000.0 if samples else 0.0
+                parts.append(f"{probe} {median_ms:.0f}ms {outcome}")
+            commands = sum(h.count for h in self._histograms.get("powershell_command_seconds", {}).values())
+            failed = sum(
+                h.count for key, h in self._histograms.get("powershell_command_seconds", {}).items()
+                if dict(key).get("outcome") != "ok"
+            )
+            spawns = sum(self._counters.get("process_spawns_total", {}).values())
+            calls = sum(h.count for h in self._histograms.get("call_dispatch_seconds", {}).values())
+        text = ", ".join(parts) if parts else "no probes yet"
+        return f"{text} | {commands} commands ({failed} failed), {int(spawns)} spawns | {calls} calls"
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _format_labels(labels: Dict[str, str], **extra) -> str:
+    labels = dict(labels, **extra)
+    if not labels:
+        return ""
+    return "{" + ",".join(f'{name}="{_escape(str(value))}"' for name, value in sorted(labels.items())) + "}"
+
+
+def _format_value(value: float) -> str:
+    return str(int(value)) if float(value).is_integer() else repr(float(value))
+
+
+# Shared by every component unless one is given its own registry
+REGISTRY = MetricsRegistry()
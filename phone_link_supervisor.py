@@ -0,0 +1,476 @@
+"""
+Phone Link warm-start supervisor.
+
+The first call after boot used to wait for PhoneExperienceHost.exe to cold-start
+behind the ms-phone-call: URI. The supervisor starts Phone Link when the app
+starts or a phone connects, so the host is already running when a call is
+placed. If the host exits, it is not started again until the next phone connects:
+the user may have closed Phone Link on purpose. Restarting right away is opt-in
+(restart_on_exit).
+
+The host is found with one Toolhelp process snapshot, with no tasklist or
+PowerShell spawn. The supervisor then waits on the process handle, so watching a
+running host costs nothing until it exits. Restarts back off, and stop after a
+few in a row, so a Phone Link that keeps crashing is not relaunched in a loop.
+
+Calls are also timed from the request to the first new visible window of the
+host process (the dial window), labelled by whether the host was already running.
+"""
+
+import logging
+import sys
+import threading
+import time
+from collections import deque
+from typing import Callable, Deque, List, Optional, Set
+
+from dialer import UriLauncher
+from log_pipeline import LOGGER_NAME
+from metrics import REGISTRY, MetricsRegistry
+
+logger = logging.getLogger(LOGGER_NAME)
+
+PHONE_LINK_EXE = "PhoneExperienceHost.exe"
+WARM = "warm"
+COLD = "cold"
+
+
+class HostProcess:
+    """A running process; wait() returns True once it has exited"""
+
+    pid: int
+
+    def wait(self, timeout: float) -> bool:
+        raise NotImplementedError
+
+    def close(self):
+        """Release the handle"""
+
+
+class ProcessWatcher:
+    """Finds a process by executable name and lists its visible windows"""
+
+    def find(self, exe_name: str) -> Optional[HostProcess]:
+        raise NotImplementedError
+
+    def windows(self, pid: int) -> Set[int]:
+        """Visible top-level windows owned by the process"""
+        raise NotImplementedError
+
+
+class _Win32Process(HostProcess):
+    WAIT_TIMEOUT = 0x00000102
+
+    def __init__(self, kernel32, pid: int, handle):
+        self._kernel32 = kernel32
+        self.pid = pid
+        self._handle = handle
+
+    def wait(self, timeout: float) -> bool:
+        if self._handle is None:
+            return True
+        # Anything but WAIT_TIMEOUT (signalled, or a handle that can no longer be waited on) counts as exited
+        return self._kernel32.WaitForSingleObject(self._handle, int(timeout * 1000)) != self.WAIT_TIMEOUT
+
+    def close(self):
+        if self._handle is not None:
+            self._kernel32.CloseHandle(self._handle)
+            self._handle = None
+
+
+class Win32ProcessWatcher(ProcessWatcher):
+    """Toolhelp snapshot to find the process, a SYNCHRONIZE handle to wait on it"""
+
+    TH32CS_SNAPPROCESS = 0x00000002
+    SYNCHRONIZE = 0x00100000
+    PROCESS_QUERY_LIMITED_INFORMATION = 0x00001000
+
+    def __init__(self):
+        import ctypes
+        from ctypes import wintypes
+
+        class PROCESSENTRY32W(ctypes.Structure):
+            _fields_ = [
+                ("dwSize", wintypes.DWORD),
+                ("cntUsage", wintypes.DWORD),
+                ("th32ProcessID", wintypes.DWORD),
+                ("th32DefaultHeapID", ctypes.c_size_t),
+                ("th32ModuleID", wintypes.DWORD),
+                ("cntThreads", wintypes.DWORD),
+                ("th32ParentProcessID", wintypes.DWORD),
+                ("pcPriClassBase", wintypes.LONG),
+                ("dwFlags", wintypes.DWORD),
+                ("szExeFile", wintypes.WCHAR * 260),
+            ]
+
+        self._ctypes = ctypes
+        self._entry_type = PROCESSENTRY32W
+        self._kernel32 = ctypes.windll.kernel32
+        self._user32 = ctypes.windll.user32
+        k32 = self._kernel32
+        k32.CreateToolhelp32Snapshot.argtypes = [wintypes.DWORD, wintypes.DWORD]
+        k32.CreateToolhelp32Snapshot.restype = wintypes.HANDLE
+        k32.Process32FirstW.argtypes = [wintypes.HANDLE, ctypes.POINTER(PROCESSENTRY32W)]
+        k32.Process32FirstW.restype = wintypes.BOOL
+        k32.Process32NextW.argtypes = [wintypes.HANDLE, ctypes.POINTER(PROCESSENTRY32W)]
+        k32.Process32NextW.restype = wintypes.BOOL
+        k32.OpenProcess.argtypes = [wintypes.DWORD, wintypes.BOOL, wintypes.DWORD]
+        k32.OpenProcess.restype = wintypes.HANDLE
+        k32.WaitForSingleObject.argtypes = [wintypes.HANDLE, wintypes.DWORD]
+        k32.WaitForSingleObject.restype = wintypes.DWORD
+        k32.CloseHandle.argtypes = [wintypes.HANDLE]
+        self._enum_proc_type = ctypes.WINFUNCTYPE(wintypes.BOOL, wintypes.HWND, wintypes.LPARAM)
+        self._user32.EnumWindows.argtypes = [self._enum_proc_type, wintypes.LPARAM]
+        self._user32.GetWindowThreadProcessId.argtypes = [wintypes.HWND, ctypes.POINTER(wintypes.DWORD)]
+        self._user32.IsWindowVisible.argtypes = [wintypes.HWND]
+        self._wintypes = wintypes
+
+    def find(self, exe_name: str) -> Optional[HostProcess]:
+        snapshot = self._kernel32.CreateToolhelp32Snapshot(self.TH32CS_SNAPPROCESS, 0)
+        if not snapshot or snapshot == self._ctypes.c_void_p(-1).value:  # INVALID_HANDLE_VALUE
+            return None
+        pid = None
+        try:
+            entry = self._entry_type()
+            entry.dwSize = self._ctypes.sizeof(entry)
+            found = self._kernel32.Process32FirstW(snapshot, self._ctypes.byref(entry))
+            while found:
+                if entry.szExeFile.lower() == exe_name.lower():
+                    pid = entry.th32ProcessID
+                    break
+                found = self._kernel32.Process32NextW(snapshot, self._ctypes.byref(entry))
+        finally:
+            self._kernel32.CloseHandle(snapshot)
+        if pid is None:
+            return None
+        handle = self._kernel32.OpenProcess(self.SYNCHRONIZE | self.PROCESS_QUERY_LIMITED_INFORMATION, False, pid)
+        if not handle:
+            return None  # Exited since the snapshot, or not accessible
+        return _Win32Process(self._kernel32, pid, handle)
+
+    def windows(self, pid: int) -> Set[int]:
+        found: Set[int] = set()
+        owner = self._wintypes.DWORD()
+
+        def visit(hwnd, _):
+            self._user32.GetWindowThreadProcessId(hwnd, self._ctypes.byref(owner))
+            if owner.value == pid and self._user32.IsWindowVisible(hwnd):
+                found.add(hwnd)
+            return True
+
+        self._user32.EnumWindows(self._enum_proc_type(visit), 0)
+        return found
+
+
+class _FakeProcess(HostProcess):
+    def __init__(self, pid: int, exited: threading.Event):
+        self.pid = pid
+        self._exited = exited
+
+    def wait(self, timeout: float) -> bool:
+        return self._exited.wait(timeout)
+
+
+class FakePhoneLinkHost(ProcessWatcher, UriLauncher):
+    """Simulated Phone Link, for tests and benchmarks
+
+    Acts as the URI launcher as well as the process watcher. Any Phone Link URI
+    starts the host if it is not running; it appears cold_start seconds later.
+    A call URI opens a dial window window_delay seconds after the host is up.
+    """
+
+    def __init__(self, cold_start: float = 2.0, window_delay: float = 0.2, running: bool = False,
+                 clock: Callable[[], float] = time.monotonic):
+        self.cold_start = cold_start
+        self.window_delay = window_delay
+        self.clock = clock
+        self.launched: List[str] = []
+        self.starts = 0
+        self._lock = threading.Lock()
+        self._pid = 1000
+        self._ready_at: Optional[float] = None
+        self._exited = threading.Event()
+        self._windows: List[tuple] = []  # (appears at, window id)
+        if running:
+            self._start(ready_at=clock())
+
+    def _start(self, ready_at: float):
+        self._pid += 1
+        self._ready_at = ready_at
+        self._exited = threading.Event()
+        self._windows = []
+        self.starts += 1
+
+    def launch(self, uri: str):
+        """UriLauncher.launch: activation in the host, so no child process is returned"""
+        with self._lock:
+            now = self.clock()
+            self.launched.append(uri)
+            if self._ready_at is None:
+                self._start(now + self.cold_start)
+            if uri.startswith("ms-phone-call:"):
+                self._windows.append((max(now, self._ready_at) + self.window_delay, len(self.launched)))
+        return None
+
+    def kill(self):
+        """The host exits, as if it crashed or was ended in Task Manager"""
+        with self._lock:
+            self._ready_at = None
+            self._exited.set()
+
+    def find(self, exe_name: str) -> Optional[HostProcess]:
+        with self._lock:
+            if self._ready_at is None or self.clock() < self._ready_at:
+                return None
+            return _FakeProcess(self._pid, self._exited)
+
+    def windows(self, pid: int) -> Set[int]:
+        with self._lock:
+            if pid != self._pid or self._ready_at is None:
+                return set()
+            now = self.clock()
+            return {window for appears_at, window in self._windows if appears_at <= now}
+
+
+def default_process_watcher() -> Optional[ProcessWatcher]:
+    if sys.platform == "win32":
+        try:
+            return Win32ProcessWatcher()
+        except (AttributeError, OSError):
+            return None
+    return None
+
+
+class PhoneLinkSupervisor:
+    """Keeps the Phone Link host running and times the dial window
+
+    launch starts Phone Link (e.g. by opening the ms-phone: URI) and returns
+    whether that succeeded. A host that exits is left alone until the next prewarm(),
+    unless restart_on_exit is set. A host that fails to start, or with
+    restart_on_exit exits before staying up for stable_after seconds, is retried
+    with a growing backoff; after max_restarts of those in a row, restarting pauses
+    until the next prewarm(). on_change(running) is called once the supervisor has
+    decided what to do, so paused tells whether an exit will be followed by a restart.
+    """
+
+    def __init__(self, watcher: ProcessWatcher, launch: Callable[[], bool], exe_name: str = PHONE_LINK_EXE,
+                 start_timeout: float = 30.0, poll_interval: float = 0.25, min_backoff: float = 2.0,
+                 max_backoff: float = 120.0, max_restarts: int = 5, stable_after: float = 600.0,
+                 window_timeout: float = 15.0, restart_on_exit: bool = False, clock: Callable[[], float] = time.monotonic,
+                 metrics: Optional[MetricsRegistry] = None):
+        self.watcher = watcher
+        self.launch = launch
+        self.exe_name = exe_name
+        self.start_timeout = start_timeout
+        self.poll_interval = poll_interval
+        self.min_backoff = min_backoff
+        self.max_backoff = max_backoff
+        self.max_restarts = max_restarts
+        self.stable_after = stable_after
+        self.window_timeout = window_timeout
+        self.restart_on_exit = restart_on_exit
+        self.clock = clock
+        self.metrics = metrics if metrics is not None else REGISTRY
+        self.on_change: Optional[Callable[[bool], None]] = None  # Called from the supervisor thread
+
+        self._lock = threading.Lock()
+        self._wake = threading.Event()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._process: Optional[HostProcess] = None
+        self._restarts_in_a_row = 0
+        self._backoff = min_backoff
+        self._paused = False
+        self._timing_dial = False
+        self.launches = 0
+        self.exits = 0
+        self.dial_windows: Deque[tuple] = deque(maxlen=200)  # (warm or cold, seconds)
+
+    # -- Control --------------------------------------------------------------
+
+    def start(self):
+        """Start supervising; Phone Link is launched right away if it is not running"""
+        with self._lock:
+            if self._thread is not None:
+                return
+            self._thread = threading.Thread(target=self._run, name="phone-link-supervisor", daemon=True)
+            self._thread.start()
+
+    def prewarm(self):
+        """Make sure Phone Link is running soon, e.g. because a phone just connected
+
+        Also resumes restarting after it was paused.
+        """
+        with self._lock:
+            self._paused = False
+            self._restarts_in_a_row = 0
+            self._backoff = self.min_backoff
+        self._wake.set()
+
+    def stop(self):
+        self._stop.set()
+        self._wake.set()
+        if self._thread is not None and self._thread is not threading.current_thread():
+            self._thread.join(5.0)
+
+    @property
+    def running(self) -> bool:
+        return self._process is not None
+
+    @property
+    def pid(self) -> Optional[int]:
+        process = self._process
+        return process.pid if process is not None else None
+
+    @property
+    def paused(self) -> bool:
+        return self._paused
+
+    # -- Supervision ----------------------------------------------------------
+
+    def _run(self):
+        while not self._stop.is_set():
+            process = self.watcher.find(self.exe_name)
+            if process is None and not self._paused:
+                process = self._launch_and_wait()
+                if process is None:
+                    self._count_failure(f"{self.exe_name} did not start")
+            if process is not None:
+                stable = self._watch(process)
+                if self._stop.is_set():
+                    return
+                if not self.restart_on_exit:
+                    self._pause(f"{self.exe_name} exited")
+                elif not stable:
+                    self._count_failure(f"{self.exe_name} exited")
+                self._notify(False)
+                self._wake.clear()  # A prewarm() while it was running is moot
+            # Wait before restarting; prewarm() cuts the wait short. While paused, only
+            # look now and then for a host started some other way.
+            with self._lock:
+                delay = self.max_backoff if self._paused else self._backoff
+            self._wake.wait(delay)
+            self._wake.clear()
+
+    def _count_failure(self, reason: str):
+        """Back off after a host that did not start or did not stay up; pause after too many"""
+        with self._lock:
+            self._restarts_in_a_row += 1
+            self._backoff = min(self.min_backoff * 2 ** (self._restarts_in_a_row - 1), self.max_backoff)
+            if self._restarts_in_a_row >= self.max_restarts and not self._paused:
+                self._paused = True
+                logger.warning("%s %d times in a row; not restarting it until a phone connects", reason, self._restarts_in_a_row)
+
+    def _pause(self, reason: str):
+        """Leave Phone Link closed until the next prewarm(); the user may have quit it"""
+        with self._lock:
+            self._paused = True
+        logger.info("%s; not restarting it until a phone connects", reason)
+
+    def _launch_and_wait(self) -> Optional[HostProcess]:
+        """Launch Phone Link and wait for the host process to appear"""
+        started = time.perf_counter()
+        self.launches += 1
+        try:
+            launched = self.launch()
+        except Exception as e:
+            logger.warning("Error starting Phone Link: %s", e, exc_info=True)
+            launched = False
+        process = None
+        if launched:
+            deadline = self.clock() + self.start_timeout
+            while process is None and self.clock() < deadline and not self._stop.is_set():
+                if self._stop.wait(self.poll_interval):
+                    break
+                process = self.watcher.find(self.exe_name)
+        outcome = "ok" if process is not None else "error"
+        self.metrics.observe("phone_link_start_seconds", time.perf_counter() - started, outcome)
+        return process
+
+    def _watch(self, process: HostProcess) -> bool:
+        """Block on the process handle until the host exits or the supervisor stops
+
+        Returns True if the host stayed up for stable_after seconds.
+        """
+        up_since = self.clock()
+        stable = False
+        with self._lock:
+            self._process = process
+        self._notify(True)
+        try:
+            while not process.wait(1.0):
+                if self._stop.is_set():
+                    return stable
+                if not stable and self.clock() - up_since >= self.stable_after:
+                    stable = True
+                    with self._lock:
+                        self._restarts_in_a_row = 0
+                        self._backoff = self.min_backoff
+        finally:
+            with self._lock:
+                self._process = None
+            process.close()
+        self.exits += 1
+        self.metrics.inc("phone_link_exits_total")
+        logger.info("%s exited after %.0fs", self.exe_name, self.clock() - up_since)
+        return stable
+
+    def _notify(self, running: bool):
+        if self.on_change is not None:
+            self.on_change(running)
+
+    # -- Dial window latency --------------------------------------------------
+
+    def time_dial_window(self, requested: Optional[float] = None):
+        """Time a call from its request to the dial window appearing, in the background
+
+        requested is a time.perf_counter() value, by default now. Call this before
+        the call URI is launched, so the windows already open can be told apart
+        from the new one. One call is timed at a time; others are not measured.
+        """
+        requested = time.perf_counter() if requested is None else requested
+        with self._lock:
+            if self._timing_dial:
+                return
+            self._timing_dial = True
+        try:
+            pid = self.pid
+            if pid is None:
+                # Not supervised (yet); the host may still be running
+                found = self.watcher.find(self.exe_name)
+                if found is not None:
+                    pid = found.pid
+                    found.close()
+            before = self.watcher.windows(pid) if pid is not None else set()
+        except OSError:
+            pid, before = None, set()
+        start = WARM if pid is not None else COLD
+        threading.Thread(
+            target=self._wait_for_dial_window, args=(requested, start, before),
+            name="dial-window", daemon=True
+        ).start()
+
+    def _wait_for_dial_window(self, requested: float, start: str, before: Set[int]):
+        try:
+            deadline = requested + self.window_timeout
+            while time.perf_counter() < deadline and not self._stop.is_set():
+                process = self._process
+                pid = process.pid if process is not None else None
+                if pid is None:
+                    # Cold start: the supervisor has not seen the host yet
+                    found = self.watcher.find(self.exe_name)
+                    pid = found.pid if found is not None else None
+                    if found is not None:
+                        found.close()
+                if pid is not None and self.watcher.windows(pid) - before:
+                    seconds = time.perf_counter() - requested
+                    self.dial_windows.append((start, seconds))
+                    self.metrics.observe("dial_window_seconds", seconds, "ok", start=start)
+                    return
+                time.sleep(0.05)
+            self.metrics.observe("dial_window_seconds", time.perf_counter() - requested, "timeout", start=start)
+        except OSError as e:
+            logger.warning("Error timing the dial window: %s", e)
+        finally:
+            with self._lock:
+                self._timing_dial = False
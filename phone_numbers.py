@@ -0,0 +1,236 @@
+"""
+Phone number normalization to E.164.
+
+Numbers typed by the user or imported from contacts come in many spellings:
+"(312) 555-0100", "1-312-555-0100", "+1 312 555 0100 ext. 12", "011 44 20 7946 0958".
+PhoneNumberNormalizer turns them into one canonical E.164 key ("+13125550100") using a
+configurable default region for national numbers. Results are memoized with an LRU
+cache, so it is cheap enough for keystroke handlers, and normalize_contacts() cleans
+and de-duplicates a whole imported contact set in one pass.
+"""
+
+import locale
+import os
+import re
+from functools import lru_cache
+from typing import Dict, Iterable, List, NamedTuple, Optional, Sequence, Tuple
+
+from contact_store import Phone, normalize_name
+
+
+class RegionInfo(NamedTuple):
+    calling_code: str
+    trunk_prefix: str           # Dropped from national numbers ("0" in most of Europe)
+    international_prefix: str   # Dialed before a country code ("011" in NANP, "00" elsewhere)
+    national_lengths: Tuple[int, ...]  # Valid national significant number lengths
+
+
+REGIONS: Dict[str, RegionInfo] = {
+    "US": RegionInfo("1", "1", "011", (10,)),
+    "CA": RegionInfo("1", "1", "011", (10,)),
+    "GB": RegionInfo("44", "0", "00", (9, 10)),
+    "IE": RegionInfo("353", "0", "00", (7, 8, 9)),
+    "DE": RegionInfo("49", "0", "00", (6, 7, 8, 9, 10, 11)),
+    "FR": RegionInfo("33", "0", "00", (9,)),
+    "ES": RegionInfo("34", "", "00", (9,)),
+    "IT": RegionInfo("39", "", "00", (6, 7, 8, 9, 10, 11)),  # Italian landlines keep their 0
+    "NL": RegionInfo("31", "0", "00", (9,)),
+    "BE": RegionInfo("32", "0", "00", (8, 9)),
+    "CH": RegionInfo("41", "0", "00", (9,)),
+    "AT": RegionInfo("43", "0", "00", (7, 8, 9, 10, 11, 12, 13)),
+    "SE": RegionInfo("46", "0", "00", (7, 8, 9)),
+    "NO": RegionInfo("47", "", "00", (8,)),
+    "DK": RegionInfo("45", "", "00", (8,)),
+    "PL": RegionInfo("48", "", "00", (9,)),
+    "UA": RegionInfo("380", "0", "00", (9,)),
+    "RU": RegionInfo("7", "8", "810", (10,)),
+    "IL": RegionInfo("972", "0", "00", (8, 9)),
+    "IN": RegionInfo("91", "0", "00", (10,)),
+    "CN": RegionInfo("86", "0", "00", (7, 8, 9, 10, 11)),
+    "JP": RegionInfo("81", "0", "010", (9, 10)),
+    "KR": RegionInfo("82", "0", "00", (8, 9, 10)),
+    "AU": RegionInfo("61", "0", "0011", (9,)),
+    "NZ": RegionInfo("64", "0", "00", (8, 9, 10)),
+    "MX": RegionInfo("52", "", "00", (10,)),
+    "BR": RegionInfo("55", "0", "00", (10, 11)),
+    "AR": RegionInfo("54", "0", "00", (10, 11)),
+    "ZA": RegionInfo("27", "0", "00", (9,)),
+}
+
+DEFAULT_REGION = "US"
+REGION_ENV_VAR = "AI_CALL_ASSISTANT_REGION"
+
+# E.164 allows at most 15 digits including the country code
+MAX_E164_DIGITS = 15
+MIN_E164_DIGITS = 8
+
+_EXTENSION = re.compile(r"\s*(?:;\s*ext=|(?:ext\.?|extension|x|#)\s*)(\d{1,7})\s*$", re.IGNORECASE)
+_ALLOWED = re.compile(r"^[\d\s().\-/+A-Za-z]*$")
+_KEYPAD = str.maketrans(
+    "ABCDEFGHIJKLMNOPQRSTUVWXYZabcdefghijklmnopqrstuvwxyz",
+    "2223334445556667777888999922233344455566677778889999"
+)
+_NON_DIGITS = re.compile(r"\D+")
+_LETTERS = re.compile(r"[A-Za-z]")
+
+
+class PhoneNumber(NamedTuple):
+    """A parsed number: canonical E.164 form plus any extension"""
+    e164: str
+    extension: Optional[str] = None
+
+
+def default_region() -> str:
+    """Region from the environment override, else the user's locale, else US"""
+    configured = os.environ.get(REGION_ENV_VAR, "").strip().upper()
+    if configured in REGIONS:
+        return configured
+    try:
+        language_code = locale.getlocale()[0] or ""
+    except ValueError:
+        language_code = ""
+    # "en_US" on most systems; Windows may report "English_United States" instead
+    parts = re.split(r"[_-]", language_code)
+    if len(parts) > 1 and parts[1].upper()[:2] in REGIONS and len(parts[1]) == 2:
+        return parts[1].upper()
+    return DEFAULT_REGION
+
+
+class PhoneNumberNormalizer:
+    """Parses free-form numbers into E.164 with a memoizing LRU cache"""
+
+    def __init__(self, region: Optional[str] = None, cache_size: int = 8192):
+        region = (region or default_region()).upper()
+        if region not in REGIONS:
+            raise ValueError(f"Unsupported region: {region}")
+        self.region = region
+        self._info = REGIONS[region]
+        # Longest codes first, so "380" wins over a hypothetical "38"
+        self._calling_codes = sorted({info.calling_code for info in REGIONS.values()}, key=len, reverse=True)
+        self._regions_by_code: Dict[str, List[RegionInfo]] = {}
+        for info in REGIONS.values():
+            self._regions_by_code.setdefault(info.calling_code, []).append(info)
+        self._parse_cached = lru_cache(maxsize=cache_size)(self._parse)
+
+    def parse(self, raw: str) -> Optional[PhoneNumber]:
+        """Parse a number, or return None if it cannot be a dialable E.164 number"""
+        if not raw:
+            return None
+        return self._parse_cached(raw)
+
+    def normalize(self, raw: str) -> Optional[str]:
+        """E.164 string for raw, or None"""
+        parsed = self.parse(raw)
+        return parsed.e164 if parsed is not None else None
+
+    def key(self, raw: str) -> str:
+        """Lookup key: E.164 when parseable, otherwise the bare digits
+
+        Short codes and partial numbers still get a stable key this way.
+        """
+        parsed = self.parse(raw)
+        if parsed is not None:
+            return parsed.e164
+        return _NON_DIGITS.sub("", raw or "")
+
+    def cache_info(self):
+        return self._parse_cached.cache_info()
+
+    def _parse(self, raw: str) -> Optional[PhoneNumber]:
+        text = raw.strip()
+        extension = None
+        match = _EXTENSION.search(text)
+        if match:
+            extension = match.group(1)
+            text = text[:match.start()]
+        if not _ALLOWED.match(text):
+            return None
+
+        international = text.startswith("+")
+        if _LETTERS.search(text):
+            # Vanity numbers such as 1-800-FLOWERS; words without digits are not numbers
+            if sum(c.isdigit() for c in text) < 3:
+                return None
+            text = text.translate(_KEYPAD)
+        digits = _NON_DIGITS.sub("", text)
+        if not digits:
+            return None
+
+        info = self._info
+        if not international and digits.startswith(info.international_prefix):
+            international = True
+            digits = digits[len(info.international_prefix):]
+        elif not international and info.international_prefix != "00" and digits.startswith("00"):
+            # "00" is understood as the international prefix almost everywhere
+            international = True
+            digits = digits[2:]
+
+        if international:
+            if not MIN_E164_DIGITS <= len(digits) <= MAX_E164_DIGITS:
+                return None
+            return PhoneNumber(self._international_e164(digits), extension)
+
+        # National number in the default region
+        if info.trunk_prefix and digits.startswith(info.trunk_prefix) \
+                and len(digits) - len(info.trunk_prefix) in info.national_lengths:
+            digits = digits[len(info.trunk_prefix):]
+        if len(digits) not in info.national_lengths:
+            return None
+        return PhoneNumber(f"+{info.calling_code}{digits}", extension)
+
+    def _international_e164(self, digits: str) -> str:
+        """E.164 for digits that start with a country code, dropping a trunk prefix
+        written after a known country code (e.g. +44 (0)20 ...)"""
+        for code in self._calling_codes:
+            if digits.startswith(code):
+                rest = digits[len(code):]
+                for info in self._regions_by_code[code]:
+                    if info.trunk_prefix and rest.startswith(info.trunk_prefix) \
+                            and len(rest) - len(info.trunk_prefix) in info.national_lengths \
+                            and len(rest) not in info.national_lengths:
+                        rest = rest[len(info.trunk_prefix):]
+                        break
+                return f"+{code}{rest}"
+        return "+" + digits
+
+    def normalize_many(self, numbers: Iterable[str]) -> List[Optional[str]]:
+        """Normalize a batch of numbers"""
+        parse = self.parse
+        return [p.e164 if p is not None else None for p in map(parse, numbers)]
+
+    def normalize_contacts(self, records: Iterable[Tuple[str, Sequence[Phone]]]) -> List[Tuple[str, List[Phone]]]:
+        """Normalize and de-duplicate an imported contact set in one pass
+
+        Numbers become E.164 (unparseable ones are kept as typed) and repeats within
+        a contact are dropped. Contacts with the same name that share a number, or
+        that both have no numbers, are merged into the first one seen.
+        """
+        merged: List[Tuple[str, List[Phone], set]] = []
+        by_name: Dict[str, List[int]] = {}
+        for name, phones in records:
+            normalized: List[Tuple[str, Phone]] = []  # (key, (label, number))
+            keys = set()
+            for label, number in phones:
+                key = self.key(number)
+                if not key or key in keys:
+                    continue
+                keys.add(key)
+                normalized.append((key, (label, self.normalize(number) or number.strip())))
+
+            name_key = normalize_name(name)
+            target = None
+            for index in by_name.get(name_key, ()):
+                existing_keys = merged[index][2]
+                if (existing_keys & keys) or (not existing_keys and not keys):
+                    target = index
+                    break
+            if target is None:
+                by_name.setdefault(name_key, []).append(len(merged))
+                merged.append((name, [phone for _, phone in normalized], keys))
+                continue
+            _, existing_phones, existing_keys = merged[target]
+            for key, phone in normalized:
+                if key not in existing_keys:
+                    existing_keys.add(key)
+                    existing_phones.append(phone)
+        return [(name, phones) for name, phones, _ in merged]
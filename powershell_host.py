@@ -0,0 +1,406 @@
+"""
+Command runners used by PhoneLinkManager to execute PowerShell probes.
+
+Starting powershell.exe costs hundreds of milliseconds, so the default runner keeps a
+small pool of long-lived PowerShell hosts that read scripts from stdin and answer with
+one JSON line per script on stdout. Every probe goes through the CommandRunner
+interface, which lets tests and benchmarks swap in FakeCommandRunner on any platform.
+"""
+
+import asyncio
+import base64
+import json
+import logging
+import queue
+import random
+import subprocess
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, List, NamedTuple, Optional, Tuple, Union
+
+from log_pipeline import LOGGER_NAME
+from metrics import REGISTRY, MetricsRegistry
+
+logger = logging.getLogger(LOGGER_NAME)
+
+POWERSHELL = "powershell"
+POWERSHELL_ARGS = ["-NoLogo", "-NoProfile", "-NonInteractive", "-ExecutionPolicy", "Bypass"]
+
+# Least time worth handing a host: one that times out is killed and restarted cold
+MIN_HOST_TIMEOUT = 0.05
+
+# Hide the console window of child processes when running from the --windowed exe
+CREATE_NO_WINDOW = getattr(subprocess, "CREATE_NO_WINDOW", 0)
+
+# Read-eval-print loop executed by every persistent host. Each request is a JSON line
+# {"id": n, "script": "..."}; each response is a JSON line {"id": n, "rc": 0, "stdout": "..."}.
+HOST_SCRIPT = r"""
+[Console]::InputEncoding = New-Object System.Text.UTF8Encoding $false
+[Console]::OutputEncoding = New-Object System.Text.UTF8Encoding $false
+$ProgressPreference = 'SilentlyContinue'
+while ($true) {
+    $line = [Console]::In.ReadLine()
+    if ($null -eq $line) { break }
+    $request = $line | ConvertFrom-Json
+    $rc = 0
+    try {
+        $output = & ([ScriptBlock]::Create($request.script)) 2>$null | Out-String
+    } catch {
+        $rc = 1
+        $output = $_ | Out-String
+    }
+    $response = @{ id = $request.id; rc = $rc; stdout = $output } | ConvertTo-Json -Compress
+    [Console]::Out.WriteLine($response)
+    [Console]::Out.Flush()
+}
+"""
+
+
+class CommandResult(NamedTuple):
+    """Outcome of a single script execution"""
+    returncode: int
+    stdout: str
+    stderr: str = ""
+    timed_out: bool = False
+
+
+# Blocking runners are awaited through this shared executor rather than the loop's
+# default one, so asyncio.run() never waits for a cancelled probe to finish
+_BLOCKING_EXECUTOR = ThreadPoolExecutor(max_workers=8, thread_name_prefix="probe")
+
+
+def _timeout_result(script_timeout: float) -> CommandResult:
+    return CommandResult(-1, "", f"Timed out after {script_timeout:.1f}s", timed_out=True)
+
+
+def _record_command(metrics: MetricsRegistry, runner: str, started: float, result: CommandResult) -> CommandResult:
+    """Record a command's duration and outcome (ok, error or timeout); returns result"""
+    outcome = "timeout" if result.timed_out else ("ok" if result.returncode == 0 else "error")
+    metrics.observe("powershell_command_seconds", time.perf_counter() - started, outcome, runner=runner)
+    return result
+
+
+class CommandRunner:
+    """Interface for executing PowerShell scripts"""
+
+    metrics: MetricsRegistry = REGISTRY
+
+    def run(self, script: str, timeout: float) -> CommandResult:
+        """Execute a script and return its result; never raises on timeout"""
+        raise NotImplementedError
+
+    async def run_async(self, script: str, timeout: float) -> CommandResult:
+        """Awaitable variant of run(); cancelling it abandons the result"""
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(_BLOCKING_EXECUTOR, self.run, script, timeout)
+
+    def warm_up(self):
+        """Start any backing processes ahead of the first probe"""
+        pass
+
+    def close(self):
+        """Release any processes owned by the runner"""
+        pass
+
+
+class SubprocessRunner(CommandRunner):
+    """Runs every script in a fresh powershell process"""
+
+    def run(self, script: str, timeout: float) -> CommandResult:
+        started = time.perf_counter()
+        self.metrics.inc("process_spawns_total", kind="powershell")
+        try:
+            result = subprocess.run(
+                [POWERSHELL] + POWERSHELL_ARGS + ["-Command", script],
+                capture_output=True,
+                text=True,
+                timeout=timeout,
+                creationflags=CREATE_NO_WINDOW
+            )
+            return _record_command(
+                self.metrics, "subprocess", started, CommandResult(result.returncode, result.stdout, result.stderr)
+            )
+        except subprocess.TimeoutExpired:
+            return _record_command(self.metrics, "subprocess", started, _timeout_result(timeout))
+
+    async def run_async(self, script: str, timeout: float) -> CommandResult:
+        started = time.perf_counter()
+        self.metrics.inc("process_spawns_total", kind="powershell")
+        process = await asyncio.create_subprocess_exec(
+            POWERSHELL, *POWERSHELL_ARGS, "-Command", script,
+            stdout=asyncio.subprocess.PIPE,
+            stderr=asyncio.subprocess.PIPE,
+            creationflags=CREATE_NO_WINDOW
+        )
+        try:
+            stdout, stderr = await asyncio.wait_for(process.communicate(), timeout)
+        except asyncio.TimeoutError:
+            await self._kill(process)
+            return _record_command(self.metrics, "subprocess", started, _timeout_result(timeout))
+        except asyncio.CancelledError:
+            # A slower probe lost the race; do not leave powershell running
+            await self._kill(process)
+            raise
+        return _record_command(self.metrics, "subprocess", started, CommandResult(
+            process.returncode,
+            stdout.decode(errors="replace"),
+            stderr.decode(errors="replace")
+        ))
+
+    @staticmethod
+    async def _kill(process: asyncio.subprocess.Process):
+        try:
+            process.kill()
+        except ProcessLookupError:
+            return
+        await process.wait()
+
+
+class PowerShellHost:
+    """A single long-lived PowerShell process that executes scripts sent over stdin"""
+
+    def __init__(self, metrics: Optional[MetricsRegistry] = None):
+        self.metrics = metrics if metrics is not None else REGISTRY
+        self._process: Optional[subprocess.Popen] = None
+        self._responses: "queue.Queue[Optional[str]]" = queue.Queue()
+        self._lock = threading.Lock()
+        self._next_id = 0
+        self._started = False
+        self.restarts = 0
+
+    @property
+    def alive(self) -> bool:
+        return self._process is not None and self._process.poll() is None
+
+    def start(self):
+        """Start the host process if it is not already running"""
+        with self._lock:
+            self._start()
+
+    def _start(self):
+        # Callers hold _lock
+        if self.alive:
+            return
+        self._kill()
+        if self._started:
+            self.restarts += 1
+            self.metrics.inc("powershell_host_restarts_total")
+        self._started = True
+        self.metrics.inc("process_spawns_total", kind="powershell_host")
+        encoded = base64.b64encode(HOST_SCRIPT.encode("utf-16-le")).decode("ascii")
+        self._process = subprocess.Popen(
+            [POWERSHELL] + POWERSHELL_ARGS + ["-EncodedCommand", encoded],
+            stdin=subprocess.PIPE,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.DEVNULL,
+            text=True,
+            encoding="utf-8",
+            bufsize=1,
+            creationflags=CREATE_NO_WINDOW
+        )
+        # A fresh queue per process so a late line from a killed host is never misread
+        self._responses = queue.Queue()
+        reader = threading.Thread(
+            target=self._read_responses,
+            args=(self._process, self._responses),
+            daemon=True
+        )
+        reader.start()
+
+    @staticmethod
+    def _read_responses(process: subprocess.Popen, responses: "queue.Queue[Optional[str]]"):
+        try:
+            for line in process.stdout:
+                responses.put(line)
+        except (OSError, ValueError):
+            pass
+        responses.put(None)  # EOF - the host exited
+
+    def run(self, script: str, timeout: float) -> CommandResult:
+        """Execute a script, restarting the host once if it has crashed"""
+        started = time.perf_counter()
+        with self._lock:
+            for attempt in range(2):
+                self._start()
+                try:
+                    return _record_command(self.metrics, "host", started, self._execute(script, timeout))
+                except (OSError, EOFError, ValueError) as e:
+                    # Host crashed or its pipes broke; restart and retry once
+                    self._kill()
+                    if attempt == 1:
+                        return _record_command(
+                            self.metrics, "host", started, CommandResult(-1, "", f"PowerShell host failed: {e}")
+                        )
+        return _record_command(self.metrics, "host", started, CommandResult(-1, "", "PowerShell host unavailable"))
+
+    def _execute(self, script: str, timeout: float) -> CommandResult:
+        self._next_id += 1
+        request_id = self._next_id
+        request = json.dumps({"id": request_id, "script": script})
+        self._process.stdin.write(request + "\n")
+        self._process.stdin.flush()
+
+        deadline = time.monotonic() + timeout
+        while True:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                # A running pipeline cannot be interrupted over stdin; kill and restart lazily
+                self._kill()
+                return _timeout_result(timeout)
+            try:
+                line = self._responses.get(timeout=remaining)
+            except queue.Empty:
+                continue
+            if line is None:
+                raise EOFError("PowerShell host exited")
+            try:
+                response = json.loads(line)
+            except ValueError:
+                continue  # Stray output that is not part of the protocol
+            if response.get("id") != request_id:
+                continue
+            return CommandResult(int(response.get("rc", 0)), response.get("stdout") or "")
+
+    def _kill(self):
+        process, self._process = self._process, None
+        if process is None:
+            return
+        try:
+            process.kill()
+            process.wait(timeout=1)
+        except (OSError, subprocess.TimeoutExpired):
+            pass
+        for stream in (process.stdin, process.stdout):
+            try:
+                stream.close()
+            except (OSError, ValueError):
+                pass
+
+    def close(self):
+        """Stop the host process"""
+        with self._lock:
+            self._kill()
+
+
+class PowerShellPool(CommandRunner):
+    """Small pool of persistent PowerShell hosts shared by all probes"""
+
+    def __init__(self, size: int = 3, host_factory: Callable[[], PowerShellHost] = PowerShellHost):
+        self.size = size
+        self._hosts: List[PowerShellHost] = [host_factory() for _ in range(size)]
+        self._idle: "queue.LifoQueue[PowerShellHost]" = queue.LifoQueue()
+        for host in self._hosts:
+            self._idle.put(host)
+
+    @property
+    def restarts(self) -> int:
+        return sum(host.restarts for host in self._hosts)
+
+    def warm_up(self):
+        """Start all hosts in the background so the first probe does not pay the cold start"""
+        def start_all():
+            for host in self._hosts:
+                try:
+                    host.start()
+                except OSError as e:
+                    logger.warning("Error starting PowerShell host: %s", e)
+        threading.Thread(target=start_all, daemon=True).start()
+
+    def run(self, script: str, timeout: float) -> CommandResult:
+        """Execute a script on the next free host; waiting for one counts against timeout"""
+        started = time.perf_counter()
+        deadline = time.monotonic() + timeout
+        try:
+            host = self._idle.get(timeout=timeout)
+        except queue.Empty:
+            # Every host is stuck on a slower script; report it like a probe timeout
+            return _record_command(self.metrics, "pool", started, _timeout_result(timeout))
+        remaining = deadline - time.monotonic()
+        if remaining < MIN_HOST_TIMEOUT:
+            # The wait used up the timeout; keep the host warm rather than time it out at once
+            self._idle.put(host)
+            return _record_command(self.metrics, "pool", started, _timeout_result(timeout))
+        try:
+            return host.run(script, remaining)
+        except OSError as e:
+            return CommandResult(-1, "", f"PowerShell unavailable: {e}")
+        finally:
+            # LIFO keeps the most recently used (warm) host at the front
+            self._idle.put(host)
+
+    def close(self):
+        for host in self._hosts:
+            host.close()
+
+
+FakeResponse = Union[CommandResult, str, Callable[[str], CommandResult]]
+
+
+class FakeCommandRunner(CommandRunner):
+    """Scripted runner for tests and benchmarks on machines without Windows
+
+    Responses are matched by substring against the script; the first match wins.
+    A response may be a CommandResult, a plain stdout string, or a callable that
+    receives the script and returns a CommandResult (or raises).
+
+    Each command takes latency seconds plus up to jitter more; failure_rate and
+    timeout_rate are the fractions of commands that fail or hang until their timeout.
+    """
+
+    def __init__(self, responses: Optional[Dict[str, FakeResponse]] = None,
+                 latency: float = 0.0, default: Optional[CommandResult] = None,
+                 jitter: float = 0.0, failure_rate: float = 0.0, timeout_rate: float = 0.0,
+                 seed: int = 0):
+        self.responses: Dict[str, FakeResponse] = dict(responses or {})
+        self.latency = latency
+        self.default = default if default is not None else CommandResult(0, "")
+        self.jitter = jitter
+        self.failure_rate = failure_rate
+        self.timeout_rate = timeout_rate
+        self.calls: List[str] = []
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()
+
+    @property
+    def call_count(self) -> int:
+        return len(self.calls)
+
+    def set_response(self, pattern: str, response: FakeResponse):
+        self.responses[pattern] = response
+
+    def _plan(self, script: str, timeout: float) -> Tuple[float, Optional[CommandResult]]:
+        """Record the call; returns how long it takes and, for a failure, its result"""
+        with self._lock:
+            self.calls.append(script)
+            latency = self.latency + (self._random.uniform(0, self.jitter) if self.jitter else 0.0)
+            roll = self._random.random() if self.failure_rate or self.timeout_rate else 1.0
+        if latency > timeout or roll < self.timeout_rate:
+            return timeout, _timeout_result(timeout)
+        if roll < self.timeout_rate + self.failure_rate:
+            return latency, CommandResult(1, "", "Fake command failure")
+        return latency, None
+
+    def run(self, script: str, timeout: float) -> CommandResult:
+        started = time.perf_counter()
+        latency, failure = self._plan(script, timeout)
+        if latency:
+            time.sleep(latency)
+        return _record_command(self.metrics, "fake", started, failure if failure is not None else self._respond(script))
+
+    async def run_async(self, script: str, timeout: float) -> CommandResult:
+        started = time.perf_counter()
+        latency, failure = self._plan(script, timeout)
+        if latency:
+            await asyncio.sleep(latency)
+        return _record_command(self.metrics, "fake", started, failure if failure is not None else self._respond(script))
+
+    def _respond(self, script: str) -> CommandResult:
+        for pattern, response in list(self.responses.items()):
+            if pattern in script:
+                if callable(response):
+                    return response(script)
+                if isinstance(response, str):
+                    return CommandResult(0, response)
+                return response
+        return self.default
@@ -0,0 +1,251 @@
+"""
+Single-instance mode with argument handoff.
+
+The first launch takes a per-user lock, a named mutex on Windows or an flock()ed
+file elsewhere, and holds it until it exits. It listens on a loopback socket and
+writes the port, its pid and a random token to an endpoint file in the data
+directory. A later launch finds the lock taken, sends its command line (for example
+a tel: link to dial) over that socket and exits. A click on a phone number then
+costs one local connection instead of a cold start of the whole app.
+
+The lock is released by the OS when its holder dies, so a held lock always means a
+live instance. That instance may still be starting, though, and the endpoint file
+may be left over from one that crashed, so the sender retries until a deadline.
+"""
+
+import hmac
+import json
+import os
+import secrets
+import socket
+import sys
+import threading
+import time
+from pathlib import Path
+from typing import Callable, List, Optional, Sequence, Tuple
+from urllib.parse import unquote
+
+from metrics import REGISTRY, MetricsRegistry
+from status_cache import default_data_dir
+
+INSTANCE_NAME = "AI-Call-Assistant"
+LOOPBACK = "127.0.0.1"
+# Link schemes the app is registered for; the rest of the link is the number
+CALL_SCHEMES = ("tel:", "callto:")
+
+HANDOFF_TIMEOUT = 5.0
+_RETRY_INTERVAL = 0.02
+_ACCEPT_POLL = 0.5
+_MAX_MESSAGE = 64 * 1024
+
+
+def dial_target(args: Sequence[str]) -> Optional[str]:
+    """The number or command to dial from a command line, if any
+
+    The first argument that is not an option counts. A tel: or callto: link is
+    reduced to its number, without parameters such as ";phone-context=".
+    """
+    for arg in args:
+        if arg.startswith("-"):
+            continue
+        text = arg.strip()
+        if text.lower().startswith(CALL_SCHEMES):
+            text = text.split(":", 1)[1].lstrip("/")
+            text = unquote(text.split(";", 1)[0].split("?", 1)[0]).strip()
+        return text or None
+    return None
+
+
+class InstanceLock:
+    """Per-user lock held by the running instance for its whole lifetime"""
+
+    def __init__(self, name: str = INSTANCE_NAME, directory: Optional[Path] = None):
+        self.name = name
+        self.directory = Path(directory) if directory is not None else default_data_dir()
+        self.path = self.directory / f"{name}.lock"
+        self._handle = None
+
+    @property
+    def held(self) -> bool:
+        return self._handle is not None
+
+    def acquire(self) -> bool:
+        """True if this process now holds the lock; never blocks"""
+        if self._handle is None:
+            self._handle = self._create_mutex() if sys.platform == "win32" else self._lock_file()
+        return self._handle is not None
+
+    def release(self):
+        handle, self._handle = self._handle, None
+        if handle is None:
+            return
+        if sys.platform == "win32":
+            import ctypes
+            ctypes.windll.kernel32.CloseHandle(handle)
+        else:
+            os.close(handle)  # Also drops the flock
+
+    def _create_mutex(self):
+        import ctypes
+        from ctypes import wintypes
+
+        ERROR_ALREADY_EXISTS = 183
+        kernel32 = ctypes.WinDLL("kernel32", use_last_error=True)
+        kernel32.CreateMutexW.restype = wintypes.HANDLE
+        kernel32.CreateMutexW.argtypes = [ctypes.c_void_p, wintypes.BOOL, wintypes.LPCWSTR]
+        # Local\ scopes the name to the logon session, so each signed-in user gets an instance
+        handle = kernel32.CreateMutexW(None, False, f"Local\\{self.name}")
+        if not handle:
+            raise ctypes.WinError(ctypes.get_last_error())
+        if ctypes.get_last_error() == ERROR_ALREADY_EXISTS:
+            kernel32.CloseHandle(handle)
+            return None
+        return handle
+
+    def _lock_file(self) -> Optional[int]:
+        import fcntl
+
+        self.directory.mkdir(parents=True, exist_ok=True)
+        fd = os.open(self.path, os.O_RDWR | os.O_CREAT, 0o600)
+        try:
+            fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except OSError:
+            os.close(fd)
+            return None
+        return fd
+
+
+def endpoint_path(name: str = INSTANCE_NAME, directory: Optional[Path] = None) -> Path:
+    return (Path(directory) if directory is not None else default_data_dir()) / f"{name}.endpoint"
+
+
+def read_endpoint(path: Path) -> Tuple[int, int, str]:
+    """(port, pid, token) of the running instance; raises OSError or ValueError"""
+    data = json.loads(path.read_text(encoding="utf-8"))
+    return int(data["port"]), int(data["pid"]), str(data["token"])
+
+
+class InstanceServer:
+    """Loopback listener of the running instance
+
+    on_args receives each later launch's arguments on the server thread, after the
+    sender has been told they arrived, so it never waits on the handler.
+    """
+
+    def __init__(self, on_args: Callable[[List[str]], None], name: str = INSTANCE_NAME,
+                 directory: Optional[Path] = None, metrics: Optional[MetricsRegistry] = None):
+        self.on_args = on_args
+        self.endpoint_path = endpoint_path(name, directory)
+        self.metrics = metrics if metrics is not None else REGISTRY
+        self.token = secrets.token_urlsafe(16)
+        self.port: Optional[int] = None
+        self._socket: Optional[socket.socket] = None
+        self._thread: Optional[threading.Thread] = None
+        self._stop = threading.Event()
+
+    def start(self) -> int:
+        """Listen and publish the endpoint; returns the port"""
+        listener = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+        listener.bind((LOOPBACK, 0))
+        listener.listen(8)
+        # accept() wakes up now and then to notice stop()
+        listener.settimeout(_ACCEPT_POLL)
+        self._socket = listener
+        self.port = listener.getsockname()[1]
+        self._write_endpoint()
+        self._thread = threading.Thread(target=self._serve, name="instance-server", daemon=True)
+        self._thread.start()
+        return self.port
+
+    def stop(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(_ACCEPT_POLL * 2)
+        if self._socket is not None:
+            self._socket.close()
+        try:
+            self.endpoint_path.unlink()
+        except OSError:
+            pass
+
+    def _write_endpoint(self):
+        """Replace the endpoint file in one step, so a sender never reads half of it"""
+        self.endpoint_path.parent.mkdir(parents=True, exist_ok=True)
+        temporary = self.endpoint_path.with_name(f"{self.endpoint_path.name}.{os.getpid()}.tmp")
+        fd = os.open(temporary, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            json.dump({"port": self.port, "pid": os.getpid(), "token": self.token}, f)
+        os.replace(temporary, self.endpoint_path)
+
+    def _serve(self):
+        while not self._stop.is_set():
+            try:
+                connection, _ = self._socket.accept()
+            except socket.timeout:
+                continue
+            except OSError:
+                break
+            with connection:
+                args = self._receive(connection)
+            if args is not None:
+                try:
+                    self.on_args(args)
+                except Exception:
+                    self.metrics.inc("instance_handoffs_total", outcome="handler_error")
+
+    def _receive(self, connection: socket.socket) -> Optional[List[str]]:
+        connection.settimeout(HANDOFF_TIMEOUT)
+        try:
+            with connection.makefile("rb") as reader:
+                message = json.loads(reader.readline(_MAX_MESSAGE))
+            if not isinstance(message, dict) or not hmac.compare_digest(str(message.get("token", "")), self.token):
+                connection.sendall(b"denied\n")
+                self.metrics.inc("instance_handoffs_total", outcome="denied")
+                return None
+            args = [str(arg) for arg in message.get("args", [])]
+            connection.sendall(b"ok\n")
+        except (OSError, ValueError):
+            self.metrics.inc("instance_handoffs_total", outcome="error")
+            return None
+        self.metrics.inc("instance_handoffs_total", outcome="ok")
+        return args
+
+
+def forward_args(args: Sequence[str], name: str = INSTANCE_NAME, directory: Optional[Path] = None,
+                 timeout: float = HANDOFF_TIMEOUT) -> bool:
+    """Hand args to the running instance; False if it did not take them within timeout"""
+    path = endpoint_path(name, directory)
+    deadline = time.monotonic() + timeout
+    while True:
+        try:
+            port, pid, token = read_endpoint(path)
+            message = json.dumps({"token": token, "args": list(args)})
+            remaining = max(deadline - time.monotonic(), _RETRY_INTERVAL)
+            with socket.create_connection((LOOPBACK, port), timeout=remaining) as connection:
+                if sys.platform == "win32":
+                    # Windows only lets the foreground process give the window focus away
+                    import ctypes
+                    ctypes.windll.user32.AllowSetForegroundWindow(pid)
+                connection.sendall(message.encode("utf-8") + b"\n")
+                with connection.makefile("rb") as reader:
+                    if reader.readline(64).strip() == b"ok":
+                        return True
+        except (OSError, ValueError, KeyError):
+            pass  # Not listening yet, or a stale endpoint from an instance that crashed
+        if time.monotonic() >= deadline:
+            return False
+        time.sleep(_RETRY_INTERVAL)
+
+
+def claim_or_forward(args: Sequence[str], name: str = INSTANCE_NAME, directory: Optional[Path] = None,
+                     timeout: float = HANDOFF_TIMEOUT) -> Optional[InstanceLock]:
+    """The held lock if this launch is the running instance, or None once args were handed off
+
+    Raises TimeoutError if another instance holds the lock but does not take the args.
+    """
+    lock = InstanceLock(name, directory)
+    if lock.acquire():
+        return lock
+    if forward_args(args, name, directory, timeout):
+        return None
+    raise TimeoutError(f"The running instance did not answer within {timeout:.0f} s")
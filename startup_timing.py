@@ -0,0 +1,115 @@
+"""
+Startup time breakdown.
+
+Imported first by main.py, so the module's own import time marks the moment the
+application code starts running. Together with the process creation time reported
+by the OS, later marks split startup into phases:
+
+    bundle_extraction  onefile bootloader start -> this process created (0 for onedir)
+    interpreter        process created -> main.py starts executing
+    imports            main.py starts -> all modules imported
+    first_paint        imports done -> first frame of the window drawn
+    first_status       first paint -> first confirmed connection status
+"""
+
+import os
+import sys
+import time
+from typing import Dict, Optional
+
+MODULE_STARTED = time.time()
+
+
+def process_start_time(pid: Optional[int] = None) -> Optional[float]:
+    """Creation time of a process (default: this one) as a Unix timestamp, if known"""
+    pid = os.getpid() if pid is None else pid
+    try:
+        if sys.platform == "win32":
+            return _windows_process_start_time(pid)
+        if os.path.exists(f"/proc/{pid}/stat"):
+            return _proc_start_time(pid)
+    except (OSError, ValueError):
+        # Unknown start time: the phases that need it are left out
+        return None
+    return None
+
+
+def _windows_process_start_time(pid: int) -> Optional[float]:
+    import ctypes
+    from ctypes import wintypes
+
+    PROCESS_QUERY_LIMITED_INFORMATION = 0x1000
+    kernel32 = ctypes.windll.kernel32
+    kernel32.OpenProcess.restype = wintypes.HANDLE
+    handle = kernel32.OpenProcess(PROCESS_QUERY_LIMITED_INFORMATION, False, pid)
+    if not handle:
+        return None
+    try:
+        creation, exited, kernel, user = (wintypes.FILETIME() for _ in range(4))
+        if not kernel32.GetProcessTimes(handle, ctypes.byref(creation), ctypes.byref(exited),
+                                        ctypes.byref(kernel), ctypes.byref(user)):
+            return None
+    finally:
+        kernel32.CloseHandle(handle)
+    # FILETIME counts 100 ns intervals since 1601-01-01
+    ticks = (creation.dwHighDateTime << 32) | creation.dwLowDateTime
+    return ticks / 10_000_000 - 11_644_473_600
+
+
+def _proc_start_time(pid: int) -> float:
+    with open(f"/proc/{pid}/stat", encoding="ascii") as f:
+        # The command name may contain spaces; fields resume after its closing paren
+        fields = f.read().rsplit(")", 1)[1].split()
+    started_after_boot = int(fields[19]) / os.sysconf("SC_CLK_TCK")  # Field 22 of the full line
+    # Relative to uptime rather than /proc/stat btime, which only has whole seconds
+    with open("/proc/uptime", encoding="ascii") as f:
+        uptime = float(f.read().split()[0])
+    return time.time() - uptime + started_after_boot
+
+
+def is_onefile_bundle() -> bool:
+    """True in a PyInstaller --onefile build, which runs from a temporary _MEI directory"""
+    bundle_dir = getattr(sys, "_MEIPASS", None)
+    return bool(getattr(sys, "frozen", False) and bundle_dir
+                and os.path.basename(bundle_dir.rstrip("\\/")).startswith("_MEI"))
+
+
+class StartupTimer:
+    """Collects startup marks and turns them into per-phase durations"""
+
+    def __init__(self, started: float = MODULE_STARTED):
+        self.marks: Dict[str, float] = {"main": started}
+
+    def mark(self, name: str, when: Optional[float] = None):
+        """Record the first time a milestone is reached; later calls are ignored"""
+        self.marks.setdefault(name, time.time() if when is None else when)
+
+    def breakdown(self) -> Dict[str, float]:
+        """Seconds spent in each phase reached so far, plus the total"""
+        marks = dict(self.marks)
+        process_started = process_start_time()
+        if process_started is not None:
+            marks["process"] = min(process_started, marks["main"])
+            marks["bundle"] = marks["process"]
+            if is_onefile_bundle():
+                # The onefile bootloader extracts the archive, then starts this process
+                parent_started = process_start_time(os.getppid())
+                if parent_started is not None and parent_started <= marks["process"]:
+                    marks["bundle"] = parent_started
+
+        order = [("bundle_extraction", "bundle", "process"), ("interpreter", "process", "main"),
+                 ("imports", "main", "imports"), ("first_paint", "imports", "first_paint"),
+                 ("first_status", "first_paint", "first_status")]
+        phases = {
+            phase: marks[end] - marks[start]
+            for phase, start, end in order if start in marks and end in marks
+        }
+        reached = [name for name in ("first_status", "first_paint", "imports", "main") if name in marks]
+        phases["total"] = marks[reached[0]] - marks.get("bundle", marks["main"])
+        return phases
+
+    def format(self) -> str:
+        return ", ".join(f"{phase} {seconds * 1000:.0f} ms" for phase, seconds in self.breakdown().items())
+
+
+STARTUP = StartupTimer()
@@ -0,0 +1,169 @@
+"""
+TTL cache for Phone Link status probes with a persisted warm-start snapshot.
+
+Every probe result is cached under its own key with its own time-to-live. Concurrent
+callers asking for the same stale key share one in-flight probe instead of each
+spawning their own. The last known value of every key is written to disk so the UI
+can show it immediately at the next launch while a background refresh confirms it.
+"""
+
+import json
+import logging
+import os
+import threading
+import time
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterable, Optional
+
+from log_pipeline import LOGGER_NAME
+from metrics import REGISTRY, MetricsRegistry
+
+logger = logging.getLogger(LOGGER_NAME)
+
+APP_DIR_NAME = "AI Call Assistant"
+
+_MISSING = object()
+
+
+def default_data_dir() -> Path:
+    """Per-user directory for application state"""
+    base = os.environ.get("LOCALAPPDATA")
+    if base:
+        return Path(base) / APP_DIR_NAME
+    return Path.home() / ".ai-call-assistant"
+
+
+def default_snapshot_path() -> Path:
+    return default_data_dir() / "status.json"
+
+
+class _InFlight:
+    """A probe that is currently running; other callers wait on it"""
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.value: Any = None
+        self.error: Optional[BaseException] = None
+
+
+class StatusCache:
+    """Thread-safe per-key TTL cache with single-flight loading
+
+    Keys in transient are cached in memory only: they are left out of the snapshot
+    and of last_known(), e.g. raw probe data that changes often and means nothing
+    at the next launch.
+    """
+
+    def __init__(self, ttls: Dict[str, float], snapshot_path: Optional[Path] = None,
+                 default_ttl: float = 0.0, clock: Callable[[], float] = time.monotonic,
+                 metrics: Optional[MetricsRegistry] = None, transient: Iterable[str] = ()):
+        self.ttls = dict(ttls)
+        self.transient = frozenset(transient)
+        self.metrics = metrics if metrics is not None else REGISTRY
+        self.default_ttl = default_ttl
+        self.snapshot_path = snapshot_path
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._save_lock = threading.Lock()
+        self._entries: Dict[str, tuple] = {}  # key -> (value, expires_at)
+        self._in_flight: Dict[str, _InFlight] = {}
+        self._last_known: Dict[str, Any] = self._read_snapshot()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key: str, default: Any = None) -> Any:
+        """Return the cached value if it is still fresh"""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[1] > self._clock():
+                return entry[0]
+        return default
+
+    def set(self, key: str, value: Any):
+        """Store a fresh value and persist it if it changed (unless the key is transient)"""
+        ttl = self.ttls.get(key, self.default_ttl)
+        with self._lock:
+            self._entries[key] = (value, self._clock() + ttl)
+            if key in self.transient:
+                return
+            changed = self._last_known.get(key, _MISSING) != value
+            self._last_known[key] = value
+        if changed:
+            self.save_snapshot()
+
+    def invalidate(self, key: Optional[str] = None):
+        """Expire one key, or every key when no key is given"""
+        with self._lock:
+            if key is None:
+                self._entries.clear()
+            else:
+                self._entries.pop(key, None)
+
+    def get_or_probe(self, key: str, probe: Callable[[], Any], force: bool = False) -> Any:
+        """Return a fresh cached value, running the probe at most once for all waiters"""
+        with self._lock:
+            if not force:
+                entry = self._entries.get(key)
+                if entry is not None and entry[1] > self._clock():
+                    self.hits += 1
+                    self.metrics.inc("status_cache_lookups_total", key=key, outcome="hit")
+                    return entry[0]
+            in_flight = self._in_flight.get(key)
+            owner = in_flight is None
+            if owner:
+                in_flight = _InFlight()
+                self._in_flight[key] = in_flight
+                self.misses += 1
+        self.metrics.inc("status_cache_lookups_total", key=key, outcome="miss" if owner else "shared")
+
+        if not owner:
+            # Someone is already probing this key; share their result
+            in_flight.done.wait()
+            if in_flight.error is not None:
+                raise in_flight.error
+            return in_flight.value
+
+        try:
+            in_flight.value = probe()
+            self.set(key, in_flight.value)
+            return in_flight.value
+        except BaseException as e:
+            in_flight.error = e
+            raise
+        finally:
+            with self._lock:
+                self._in_flight.pop(key, None)
+            in_flight.done.set()
+
+    def last_known(self) -> Dict[str, Any]:
+        """Most recent value of every key, including values loaded from disk"""
+        with self._lock:
+            return dict(self._last_known)
+
+    def _read_snapshot(self) -> Dict[str, Any]:
+        if self.snapshot_path is None:
+            return {}
+        try:
+            with open(self.snapshot_path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+            # Snapshots written before a key became transient may still hold it
+            return {key: value for key, value in dict(data.get("values", {})).items() if key not in self.transient}
+        except (OSError, ValueError, AttributeError):
+            return {}
+
+    def save_snapshot(self):
+        """Write the last known values to disk atomically"""
+        if self.snapshot_path is None:
+            return
+        with self._lock:
+            data = {"saved_at": time.time(), "values": dict(self._last_known)}
+        try:
+            with self._save_lock:
+                self.snapshot_path.parent.mkdir(parents=True, exist_ok=True)
+                tmp_path = self.snapshot_path.with_suffix(".tmp")
+                with open(tmp_path, "w", encoding="utf-8") as f:
+                    json.dump(data, f)
+                os.replace(tmp_path, self.snapshot_path)
+        except (OSError, TypeError) as e:
+            logger.warning("Error saving status snapshot: %s", e)
+
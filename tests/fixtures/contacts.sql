@@ -0,0 +1,15 @@
+-- A small contacts database in Phone Link's schema (contact_sync.PHONE_LINK_SCHEMA)
+CREATE TABLE contact (contact_id INTEGER PRIMARY KEY, display_name TEXT);
+CREATE TABLE phonenumber (contact_id INTEGER, phone_number TEXT, phone_number_type INTEGER);
+
+INSERT INTO contact VALUES (1, 'Ada Lovelace');
+INSERT INTO contact VALUES (2, 'Grace Hopper');
+INSERT INTO contact VALUES (3, 'Alan Turing');
+INSERT INTO contact VALUES (4, NULL);
+INSERT INTO contact VALUES (5, 'No Number');
+
+INSERT INTO phonenumber VALUES (1, '+13125550101', 2);
+INSERT INTO phonenumber VALUES (2, '+13125550102', 2);
+INSERT INTO phonenumber VALUES (2, '+13125550112', 3);
+INSERT INTO phonenumber VALUES (3, '+442079460103', 1);
+INSERT INTO phonenumber VALUES (4, '+13125550104', 99);
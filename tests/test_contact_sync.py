@@ -0,0 +1,162 @@
+import shutil
+import sqlite3
+from pathlib import Path
+
+import pytest
+
+from contact_store import ContactStore
+from contact_sync import ContactSync, SourceContact, SqliteContactSource, VCardContactSource, iter_vcards
+from metrics import MetricsRegistry
+
+FIXTURES = Path(__file__).parent / "fixtures"
+
+
+@pytest.fixture
+def contacts_db(tmp_path) -> Path:
+    path = tmp_path / "contacts.db"
+    db = sqlite3.connect(path)
+    db.executescript((FIXTURES / "contacts.sql").read_text(encoding="utf-8"))
+    db.close()
+    return path
+
+
+@pytest.fixture
+def contacts_vcf(tmp_path) -> Path:
+    return Path(shutil.copy(FIXTURES / "contacts.vcf", tmp_path / "contacts.vcf"))
+
+
+def sync_into(store: ContactStore, source) -> ContactSync:
+    return ContactSync(store, source, metrics=MetricsRegistry())
+
+
+def by_name(store: ContactStore):
+    return {contact.name: list(contact.phones) for contact in store}
+
+
+def execute(path: Path, *statements: str):
+    db = sqlite3.connect(path)
+    with db:
+        for statement in statements:
+            db.execute(statement)
+    db.close()
+
+
+def test_sqlite_source_reads_contacts_with_their_numbers(contacts_db):
+    contacts = list(SqliteContactSource(contacts_db).read())
+    assert contacts == [
+        SourceContact("1", "Ada Lovelace", (("mobile", "+13125550101"),)),
+        SourceContact("2", "Grace Hopper", (("mobile", "+13125550102"), ("work", "+13125550112"))),
+        SourceContact("3", "Alan Turing", (("home", "+442079460103"),)),
+        SourceContact("4", "Unknown", (("other", "+13125550104"),)),
+        SourceContact("5", "No Number", ()),
+    ]
+
+
+def test_initial_sync_adds_every_contact(contacts_db):
+    store = ContactStore()
+    result = sync_into(store, SqliteContactSource(contacts_db)).refresh()
+    assert (result.added, result.updated, result.removed, result.unchanged) == (5, 0, 0, 0)
+    assert by_name(store)["Grace Hopper"] == [("mobile", "+13125550102"), ("work", "+13125550112")]
+
+
+def test_unchanged_source_is_not_read_again(contacts_db):
+    sync = sync_into(ContactStore(), SqliteContactSource(contacts_db))
+    sync.refresh()
+    result = sync.refresh()
+    assert result.skipped
+    assert not result.changed
+    forced = sync.refresh(force=True)
+    assert not forced.skipped
+    assert (forced.added, forced.updated, forced.removed, forced.unchanged) == (0, 0, 0, 5)
+
+
+def test_delta_applies_only_added_changed_and_deleted_contacts(contacts_db):
+    store = ContactStore()
+    sync = sync_into(store, SqliteContactSource(contacts_db))
+    sync.refresh()
+    ids = {contact.name: contact.id for contact in store}
+    execute(
+        contacts_db,
+        "UPDATE contact SET display_name = 'Ada King' WHERE contact_id = 1",
+        "UPDATE phonenumber SET phone_number = '+13125550199' WHERE contact_id = 3",
+        "DELETE FROM phonenumber WHERE contact_id = 5",
+        "DELETE FROM contact WHERE contact_id = 5",
+        "INSERT INTO contact VALUES (6, 'Katherine Johnson')",
+        "INSERT INTO phonenumber VALUES (6, '+13125550106', 2)",
+    )
+    # Forced: a same-size rewrite within the file system's mtime resolution looks unchanged
+    result = sync.refresh(force=True)
+    assert (result.added, result.updated, result.removed, result.unchanged) == (1, 2, 1, 2)
+    contacts = by_name(store)
+    assert "No Number" not in contacts and "Ada Lovelace" not in contacts
+    assert contacts["Katherine Johnson"] == [("mobile", "+13125550106")]
+    assert contacts["Alan Turing"] == [("home", "+13125550199")]
+    # Changed contacts keep their store ids, so the contacts list keeps its selection
+    assert store.find_by_name("Ada King")[0].id == ids["Ada Lovelace"]
+    assert len(store) == 5
+
+
+def test_contact_deleted_from_the_store_is_added_back_when_it_changes(contacts_db):
+    store = ContactStore()
+    sync = sync_into(store, SqliteContactSource(contacts_db))
+    sync.refresh()
+    store.delete(store.find_by_name("Alan Turing")[0].id)
+    execute(contacts_db, "UPDATE contact SET display_name = 'A. M. Turing' WHERE contact_id = 3")
+    result = sync.refresh(force=True)
+    assert result.added == 1
+    assert store.find_by_name("A. M. Turing")
+
+
+def test_missing_source_raises(tmp_path):
+    sync = sync_into(ContactStore(), SqliteContactSource(tmp_path / "missing.db"))
+    with pytest.raises(FileNotFoundError):
+        sync.refresh()
+
+
+def test_digest_covers_name_labels_and_numbers():
+    contact = SourceContact("1", "Ada", (("mobile", "+13125550101"),))
+    assert contact.digest() == SourceContact("9", "Ada", (("mobile", "+13125550101"),)).digest()
+    assert contact.digest() != SourceContact("1", "Ada", (("work", "+13125550101"),)).digest()
+    assert contact.digest() != SourceContact("1", "Ada", (("mobile", "+13125550102"),)).digest()
+    assert contact.digest() != SourceContact("1", "Ada L", (("mobile", "+13125550101"),)).digest()
+
+
+def test_vcard_parser_handles_versions_folding_and_types():
+    with open(FIXTURES / "contacts.vcf", encoding="utf-8", newline="") as f:
+        cards = list(iter_vcards(f))
+    assert cards == [
+        ("ada", "Ada Lovelace", (("mobile", "+1 312 555 0101"),)),
+        # vCard 2.1 bare types; no FN, so the name comes from N
+        (None, "Rear Admiral Grace Brewster Hopper", (("work", "+1 312 555 0112"), ("home", "+1 312 555 0102"))),
+        # Folded FN, grouped TEL with quoted types
+        ("turing", "Alan Turing", (("mobile", "+44 20 7946 0103"),)),
+        # vCard 4.0 tel: URI with parameters; escaped comma in FN
+        ("urn:uuid:4f1c", "Smith, Jane", (("work", "+1-312-555-0104"),)),
+        (None, "Front Desk", (("main", "+1 312 555 0105"),)),
+        (None, "Front Desk", (("fax", "+1 312 555 0106"),)),
+        # Nameless card shown under its number; the empty card is skipped
+        (None, "+1 312 555 0107", (("other", "+1 312 555 0107"),)),
+    ]
+
+
+def test_vcard_without_uid_is_identified_by_name_and_position(contacts_vcf):
+    ids = [contact.source_id for contact in VCardContactSource(contacts_vcf).read()]
+    assert "Front Desk#1" in ids and "Front Desk#2" in ids
+    assert len(ids) == len(set(ids))
+
+
+def test_vcard_delta(contacts_vcf):
+    store = ContactStore()
+    sync = sync_into(store, VCardContactSource(contacts_vcf))
+    assert sync.refresh().added == 7
+    text = contacts_vcf.read_text(encoding="utf-8")
+    text = text.replace("TEL;TYPE=CELL:+1 312 555 0101", "TEL;TYPE=CELL:+1 312 555 0199")
+    text = text.replace("BEGIN:VCARD\nVERSION:3.0\nTEL:+1 312 555 0107\nEND:VCARD\n", "")
+    text += "BEGIN:VCARD\nVERSION:3.0\nUID:new\nFN:New Contact\nTEL:+1 312 555 0108\nEND:VCARD\n"
+    contacts_vcf.write_text(text, encoding="utf-8")
+    result = sync.refresh()
+    assert (result.added, result.updated, result.removed, result.unchanged) == (1, 1, 1, 5)
+    contacts = by_name(store)
+    assert contacts["Ada Lovelace"] == [("mobile", "+1 312 555 0199")]
+    assert "+1 312 555 0107" not in contacts
+    assert "New Contact" in contacts
@@ -0,0 +1,56 @@
+import asyncio
+
+from detection import Probe, race_probes
+from metrics import MetricsRegistry
+
+
+def answer(value: bool, delay: float = 0.0):
+    async def run() -> bool:
+        await asyncio.sleep(delay)
+        return value
+    return run
+
+
+def race(probes, deadline: float = 5.0):
+    return asyncio.run(race_probes(probes, deadline, metrics=MetricsRegistry()))
+
+
+def test_fast_positive_does_not_wait_for_slow_probe_of_equal_priority():
+    result = race([Probe("slow", answer(True, 2.0)), Probe("fast", answer(True))])
+    assert result.winner == "fast"
+    assert result.elapsed < 0.5
+    assert "slow" not in result.results
+
+
+def test_positive_waits_for_better_priority():
+    result = race([Probe("preferred", answer(True, 0.2), priority=0), Probe("fallback", answer(True), priority=1)])
+    assert result.winner == "preferred"
+    assert result.elapsed >= 0.2
+
+
+def test_better_priority_negative_lets_positive_win():
+    result = race([Probe("preferred", answer(False, 0.05), priority=0), Probe("fallback", answer(True), priority=1)])
+    assert result.winner == "fallback"
+    assert result.results == {"preferred": False, "fallback": True}
+
+
+def test_all_negative():
+    result = race([Probe("a", answer(False)), Probe("b", answer(False, 0.05))])
+    assert result.winner is None
+    assert not result.timed_out
+
+
+def test_exception_counts_as_negative():
+    async def broken() -> bool:
+        raise OSError("PowerShell unavailable")
+    result = race([Probe("broken", broken), Probe("ok", answer(True), priority=1)])
+    assert result.winner == "ok"
+    assert result.results["broken"] is False
+
+
+def test_deadline_returns_best_positive_seen():
+    result = race([Probe("preferred", answer(True, 2.0), priority=0), Probe("fallback", answer(True), priority=1)],
+                  deadline=0.1)
+    assert result.timed_out
+    assert result.winner == "fallback"
+    assert result.elapsed < 0.5
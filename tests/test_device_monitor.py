@@ -0,0 +1,121 @@
+import random
+import threading
+import time
+
+import pytest
+
+from device_monitor import AdaptivePoller, DeviceMonitor, ScriptedEventSource
+
+DEBOUNCE = 0.05
+
+
+def wait_until(condition, timeout: float = 2.0) -> bool:
+    deadline = time.monotonic() + timeout
+    while not condition():
+        if time.monotonic() >= deadline:
+            return False
+        time.sleep(0.005)
+    return True
+
+
+class Probe:
+    """Counts calls and returns the current value, which a test may change"""
+
+    def __init__(self, value="usb"):
+        self.value = value
+        self.calls = 0
+        self.lock = threading.Lock()
+
+    def __call__(self):
+        with self.lock:
+            self.calls += 1
+        return self.value
+
+
+@pytest.fixture
+def monitored():
+    source = ScriptedEventSource()
+    probe = Probe()
+    changes = []
+    monitor = DeviceMonitor(probe, changes.append, event_source=source, debounce=DEBOUNCE, safety_interval=60.0)
+    monitor.start()
+    yield source, probe, changes, monitor
+    monitor.stop()
+
+
+def test_plug_triggers_exactly_one_reprobe(monitored):
+    source, probe, changes, monitor = monitored
+    assert monitor.mode == "events"
+    source.emit("arrival")
+    assert wait_until(lambda: probe.calls == 1)
+    time.sleep(DEBOUNCE * 4)
+    assert probe.calls == 1
+    assert changes == ["usb"]
+
+
+def test_burst_of_events_is_coalesced_into_one_probe(monitored):
+    source, probe, changes, monitor = monitored
+    for kind in ("removal", "change", "change", "arrival"):
+        source.emit(kind)
+    assert wait_until(lambda: probe.calls == 1)
+    time.sleep(DEBOUNCE * 4)
+    assert probe.calls == 1
+    assert monitor.event_count == 4
+
+
+def test_on_change_only_reports_new_values(monitored):
+    source, probe, changes, monitor = monitored
+    source.emit("arrival")
+    assert wait_until(lambda: probe.calls == 1)
+    source.emit("change")
+    assert wait_until(lambda: probe.calls == 2)
+    probe.value = None
+    source.emit("removal")
+    assert wait_until(lambda: probe.calls == 3)
+    assert changes == ["usb", None]
+
+
+def test_unavailable_source_falls_back_to_polling():
+    monitor = DeviceMonitor(Probe(), lambda value: None, event_source=ScriptedEventSource(available=False))
+    monitor.start()
+    try:
+        assert monitor.mode == "polling"
+    finally:
+        monitor.stop()
+
+
+def test_lost_source_switches_to_polling(monitored):
+    source, probe, changes, monitor = monitored
+    monitor.poller.interval = monitor.poller.max_interval
+    source.emit("lost")
+    assert monitor.mode == "polling"
+    assert monitor.poller.interval == monitor.poller.min_interval
+
+
+def test_polling_probes_without_events():
+    probe = Probe()
+    monitor = DeviceMonitor(probe, lambda value: None, poller=AdaptivePoller(min_interval=0.02, jitter=0.0))
+    monitor.start()
+    try:
+        assert wait_until(lambda: probe.calls >= 3)
+    finally:
+        monitor.stop()
+
+
+def test_poller_backs_off_while_unchanged_and_resets_on_change():
+    poller = AdaptivePoller(min_interval=2.0, max_interval=10.0, backoff=2.0, jitter=0.0)
+    intervals = []
+    for _ in range(4):
+        poller.unchanged()
+        intervals.append(poller.interval)
+    assert intervals == [4.0, 8.0, 10.0, 10.0]
+    poller.changed()
+    assert poller.interval == 2.0
+    assert poller.next_delay() == 2.0
+
+
+def test_poller_jitter_stays_within_bounds():
+    poller = AdaptivePoller(min_interval=10.0, jitter=0.1, rng=random.Random(1))
+    delays = [poller.next_delay() for _ in range(200)]
+    assert all(9.0 <= delay <= 11.0 for delay in delays)
+    assert len(set(delays)) > 1
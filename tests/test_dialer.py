@@ -0,0 +1,163 @@
+import threading
+import time
+
+import pytest
+
+from dialer import Dialer, FakeLauncher, call_uri, contact_call_uri
+from metrics import MetricsRegistry
+
+TIMEOUT = 2.0
+
+
+class TimedLauncher(FakeLauncher):
+    """FakeLauncher that also notes when each launch happened"""
+
+    def __init__(self, **kwargs):
+        super().__init__(**kwargs)
+        self.times = []
+
+    def launch(self, uri):
+        self.times.append(time.monotonic())
+        return super().launch(uri)
+
+
+class BrokenLauncher(FakeLauncher):
+    """Raises something other than OSError for the first launch only"""
+
+    def __init__(self):
+        super().__init__()
+        self.broken = True
+
+    def launch(self, uri):
+        if self.broken:
+            self.broken = False
+            raise ValueError("Malformed URI")
+        return super().launch(uri)
+
+
+@pytest.fixture
+def make_dialer():
+    dialers = []
+
+    def make(launcher=None, **kwargs):
+        kwargs.setdefault("min_interval", 0.0)
+        dialer = Dialer(launcher if launcher is not None else FakeLauncher(), metrics=MetricsRegistry(), **kwargs)
+        dialers.append(dialer)
+        return dialer
+
+    yield make
+    for dialer in dialers:
+        dialer.close()
+
+
+def test_uris_are_percent_encoded():
+    assert call_uri("+13125550100") == "ms-phone-call:?PhoneNumber=+13125550100"
+    assert contact_call_uri("Tom & Jerry #2") == "ms-phone-call:?ContactName=Tom%20%26%20Jerry%20%232"
+
+
+def test_launches_in_fifo_order(make_dialer):
+    launcher = FakeLauncher(latency=0.005)
+    dialer = make_dialer(launcher)
+    numbers = [f"+1312555{n:04d}" for n in range(10)]
+    futures = [dialer.dial(number) for number in numbers]
+    assert all(future.result(TIMEOUT) for future in futures)
+    assert launcher.launched == [call_uri(number) for number in numbers]
+
+
+def test_throughput(make_dialer):
+    launcher = FakeLauncher()
+    dialer = make_dialer(launcher)
+    started = time.perf_counter()
+    futures = [dialer.dial(f"+1312555{n:04d}") for n in range(500)]
+    assert all(future.result(TIMEOUT) for future in futures)
+    assert time.perf_counter() - started < TIMEOUT
+    assert dialer.stats()["dispatched"] == 500
+    assert dialer.depth == 0
+
+
+def test_repeat_of_pending_call_shares_its_future(make_dialer):
+    launcher = FakeLauncher(latency=0.1)
+    dialer = make_dialer(launcher)
+    first = dialer.dial("+13125550100")
+    second = dialer.dial("+13125550100")
+    assert second is first
+    assert first.result(TIMEOUT)
+    assert launcher.launched == [call_uri("+13125550100")]
+    assert dialer.deduped == 1
+
+
+def test_repeat_within_dedupe_window_is_merged(make_dialer):
+    launcher = FakeLauncher()
+    dialer = make_dialer(launcher, dedupe_window=60.0)
+    first = dialer.dial_contact("Mom")
+    assert first.result(TIMEOUT)
+    assert dialer.dial_contact("mom") is first
+    assert len(launcher.launched) == 1
+
+
+def test_repeat_after_dedupe_window_dials_again(make_dialer):
+    launcher = FakeLauncher()
+    dialer = make_dialer(launcher, dedupe_window=0.0)
+    assert dialer.dial("+13125550100").result(TIMEOUT)
+    assert dialer.dial("+13125550100").result(TIMEOUT)
+    assert len(launcher.launched) == 2
+
+
+def test_launches_are_spaced_by_min_interval(make_dialer):
+    launcher = TimedLauncher()
+    dialer = make_dialer(launcher, min_interval=0.05)
+    futures = [dialer.dial(f"+1312555{n:04d}") for n in range(4)]
+    assert all(future.result(TIMEOUT) for future in futures)
+    gaps = [later - earlier for earlier, later in zip(launcher.times, launcher.times[1:])]
+    assert len(gaps) == 3
+    assert all(gap >= 0.045 for gap in gaps)
+
+
+def test_failed_launch_resolves_false(make_dialer):
+    dialer = make_dialer(FakeLauncher(failure_rate=1.0))
+    assert dialer.dial("+13125550100").result(TIMEOUT) is False
+    assert dialer.failed == 1
+
+
+def test_launcher_that_raises_frees_the_key_and_keeps_serving(make_dialer):
+    launcher = BrokenLauncher()
+    dialer = make_dialer(launcher)
+    assert dialer.dial("+13125550100").result(TIMEOUT) is False
+    retry = dialer.dial("+13125550100")
+    assert retry.result(TIMEOUT) is True
+    assert launcher.launched == [call_uri("+13125550100")]
+    assert dialer.stats()["failed"] == 1
+    assert dialer.stats()["dispatched"] == 1
+
+
+def test_close_resolves_queued_calls_false(make_dialer):
+    launcher = FakeLauncher()
+    entered, release = threading.Event(), threading.Event()
+    launch = launcher.launch
+
+    def blocking_launch(uri):
+        entered.set()
+        release.wait(TIMEOUT)
+        return launch(uri)
+
+    launcher.launch = blocking_launch
+    dialer = make_dialer(launcher)
+    launching = dialer.dial("+13125550100")
+    queued = dialer.dial("+13125550101")
+    assert entered.wait(TIMEOUT)
+    dialer.close()
+    release.set()
+    assert queued.result(TIMEOUT) is False
+    assert launching.result(TIMEOUT) is True
+    with pytest.raises(RuntimeError):
+        dialer.dial("+13125550102")
+
+
+def test_exited_children_are_released(make_dialer):
+    launcher = FakeLauncher(child_lifetime=0.0)
+    dialer = make_dialer(launcher)
+    assert dialer.dial("+13125550100").result(TIMEOUT)
+    dialer.reaper.reap()
+    assert dialer.reaper.live == 0
+    assert dialer.reaper.reaped == 1
+    assert launcher.children[0].closed
@@ -0,0 +1,78 @@
+import threading
+import time
+
+from powershell_host import CommandResult, PowerShellPool
+
+
+class FakeHost:
+    """Stands in for PowerShellHost; each script takes delay seconds"""
+
+    def __init__(self, delay: float = 0.0):
+        self.delay = delay
+        self.restarts = 0
+        self.started = 0
+        self.timeouts = []
+
+    def start(self):
+        self.started += 1
+
+    def run(self, script: str, timeout: float) -> CommandResult:
+        self.timeouts.append(timeout)
+        time.sleep(self.delay)
+        return CommandResult(0, script)
+
+    def close(self):
+        pass
+
+
+def busy_pool(delay: float):
+    """A one-host pool whose host is busy for delay seconds from now"""
+    host = FakeHost(delay)
+    pool = PowerShellPool(size=1, host_factory=lambda: host)
+    busy = threading.Thread(target=pool.run, args=("busy", 5.0))
+    busy.start()
+    time.sleep(0.02)
+    return pool, host, busy
+
+
+def test_run_uses_idle_host():
+    host = FakeHost()
+    pool = PowerShellPool(size=1, host_factory=lambda: host)
+    assert pool.run("Get-Date", 1.0) == CommandResult(0, "Get-Date")
+    assert pool.run("Get-Date", 1.0).returncode == 0
+
+
+def test_run_times_out_when_no_host_frees_up():
+    pool, host, busy = busy_pool(0.5)
+    started = time.perf_counter()
+    result = pool.run("late", 0.1)
+    assert result.timed_out
+    assert time.perf_counter() - started < 0.4
+    busy.join()
+    assert pool.run("after", 1.0).returncode == 0
+
+
+def test_host_freed_at_the_deadline_is_not_handed_an_expired_timeout():
+    # Frees up within MIN_HOST_TIMEOUT of the late script's deadline
+    pool, host, busy = busy_pool(0.2)
+    result = pool.run("late", 0.2)
+    busy.join()
+    assert result.timed_out
+    # Only the busy script reached the host; the late one never ran with no time left
+    assert len(host.timeouts) == 1
+    assert pool.run("after", 1.0).returncode == 0
+
+
+def test_warm_up_starts_every_host():
+    hosts = []
+
+    def factory():
+        hosts.append(FakeHost())
+        return hosts[-1]
+
+    pool = PowerShellPool(size=3, host_factory=factory)
+    pool.warm_up()
+    deadline = time.monotonic() + 1.0
+    while any(host.started == 0 for host in hosts) and time.monotonic() < deadline:
+        time.sleep(0.01)
+    assert [host.started for host in hosts] == [1, 1, 1]
@@ -0,0 +1,104 @@
+import json
+import socket
+import threading
+import time
+
+import pytest
+
+from metrics import MetricsRegistry
+from single_instance import LOOPBACK, InstanceLock, InstanceServer, claim_or_forward, dial_target, read_endpoint
+
+NAME = "test-instance"
+
+
+def handoffs(metrics: MetricsRegistry):
+    series = metrics.snapshot()["counters"].get("instance_handoffs_total", [])
+    return {entry["labels"]["outcome"]: entry["value"] for entry in series}
+# A warm handoff is one loopback round trip; the repeat launch must not feel slower than a click
+HANDOFF_BOUND = 0.25
+
+
+@pytest.fixture
+def running(tmp_path):
+    """A running instance: the lock and a listening server, collecting forwarded args"""
+    lock = InstanceLock(NAME, tmp_path)
+    assert lock.acquire()
+    received = []
+    arrived = threading.Event()
+    metrics = MetricsRegistry()
+
+    def on_args(args):
+        received.append(args)
+        arrived.set()
+
+    server = InstanceServer(on_args, NAME, tmp_path, metrics=metrics)
+    server.start()
+    yield tmp_path, server, received, arrived, metrics
+    server.stop()
+    lock.release()
+
+
+def test_first_launch_claims_the_lock(tmp_path):
+    lock = claim_or_forward(["tel:+13125550100"], NAME, tmp_path, timeout=0.5)
+    try:
+        assert lock is not None and lock.held
+    finally:
+        lock.release()
+
+
+def test_repeat_launch_hands_its_args_to_the_running_instance(running):
+    directory, server, received, arrived, metrics = running
+    started = time.perf_counter()
+    assert claim_or_forward(["--flag", "tel:+13125550100"], NAME, directory) is None
+    elapsed = time.perf_counter() - started
+    assert arrived.wait(1.0)
+    assert received == [["--flag", "tel:+13125550100"]]
+    assert elapsed < HANDOFF_BOUND
+    assert handoffs(metrics) == {"ok": 1}
+
+
+def test_wrong_token_is_denied(running):
+    directory, server, received, arrived, metrics = running
+    port, _, _ = read_endpoint(server.endpoint_path)
+    with socket.create_connection((LOOPBACK, port), timeout=1.0) as connection:
+        connection.sendall(json.dumps({"token": "wrong", "args": ["tel:+13125550100"]}).encode() + b"\n")
+        with connection.makefile("rb") as reader:
+            assert reader.readline(64).strip() == b"denied"
+    assert not arrived.wait(0.1)
+    assert received == []
+    assert handoffs(metrics) == {"denied": 1}
+
+
+def test_unresponsive_instance_times_out(tmp_path):
+    lock = InstanceLock(NAME, tmp_path)
+    assert lock.acquire()
+    try:
+        started = time.perf_counter()
+        with pytest.raises(TimeoutError):
+            claim_or_forward(["tel:+13125550100"], NAME, tmp_path, timeout=0.2)
+        assert time.perf_counter() - started < 1.0
+    finally:
+        lock.release()
+
+
+def test_lock_is_free_again_after_release(tmp_path):
+    first = InstanceLock(NAME, tmp_path)
+    assert first.acquire()
+    assert not InstanceLock(NAME, tmp_path).acquire()
+    first.release()
+    second = InstanceLock(NAME, tmp_path)
+    assert second.acquire()
+    second.release()
+
+
+@pytest.mark.parametrize("args, target", [
+    (["tel:+1-312-555-0100"], "+1-312-555-0100"),
+    (["callto://+13125550100"], "+13125550100"),
+    (["TEL:+13125550100;phone-context=example.com"], "+13125550100"),
+    (["tel:%2B13125550100"], "+13125550100"),
+    (["--headless", "call mom"], "call mom"),
+    (["--headless"], None),
+    (["tel:"], None),
+])
+def test_dial_target(args, target):
+    assert dial_target(args) == target
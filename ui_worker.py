@@ -0,0 +1,165 @@
+"""
+Background execution for blocking work started from the Tk UI.
+
+Tk is single-threaded: widgets may only be touched from the thread running the
+mainloop. ProbeWorker runs PhoneLinkManager calls on a small thread pool and hands
+results back through UiDispatcher, which drains a thread-safe queue from a
+root.after() pump. Requests with the same key that overlap share one execution.
+FrameLatencyMonitor measures how late Tk timers fire, so UI stalls show up as numbers.
+"""
+
+import logging
+import queue
+import threading
+import time
+from collections import deque
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Any, Callable, Deque, Dict, Optional
+
+from log_pipeline import LOGGER_NAME
+
+logger = logging.getLogger(LOGGER_NAME)
+
+
+class UiDispatcher:
+    """Runs callables on the Tk thread; call_soon() is safe from any thread"""
+
+    def __init__(self, root, interval_ms: int = 16, budget: float = 0.008):
+        self.root = root
+        self.interval_ms = interval_ms
+        self.budget = budget  # Max seconds of callbacks per pump, so bursts cannot stall a frame
+        self._queue: "queue.SimpleQueue[tuple]" = queue.SimpleQueue()
+        self._running = False
+
+    def start(self):
+        self._running = True
+        self.root.after(self.interval_ms, self._pump)
+
+    def stop(self):
+        self._running = False
+
+    def call_soon(self, fn: Callable, *args):
+        self._queue.put((fn, args))
+
+    def _pump(self):
+        if not self._running:
+            return
+        deadline = time.perf_counter() + self.budget
+        while time.perf_counter() < deadline:
+            try:
+                fn, args = self._queue.get_nowait()
+            except queue.Empty:
+                break
+            try:
+                fn(*args)
+            except Exception as e:
+                logger.warning("Error in UI callback: %s", e, exc_info=True)
+        self.root.after(self.interval_ms, self._pump)
+
+
+class ProbeWorker:
+    """Executes blocking calls off the UI thread, merging duplicate in-flight requests"""
+
+    def __init__(self, dispatcher: UiDispatcher, max_workers: int = 4):
+        self.dispatcher = dispatcher
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="worker")
+        self._in_flight: Dict[str, Future] = {}
+        self._lock = threading.Lock()
+        self.submitted = 0
+        self.merged = 0
+
+    def submit(self, key: str, fn: Callable[[], Any],
+               on_result: Optional[Callable[[Any], None]] = None,
+               on_error: Optional[Callable[[BaseException], None]] = None) -> Future:
+        """Run fn in the background unless a request with the same key is already running
+
+        on_result/on_error are invoked on the Tk thread. The returned future can be
+        waited on from other background threads.
+        """
+        with self._lock:
+            future = self._in_flight.get(key)
+            if future is None:
+                future = self._executor.submit(self._run, key, fn)
+                self._in_flight[key] = future
+                self.submitted += 1
+            else:
+                self.merged += 1
+        if on_result is not None or on_error is not None:
+            future.add_done_callback(lambda f: self._deliver(f, on_result, on_error))
+        return future
+
+    def in_flight(self, key: str) -> bool:
+        with self._lock:
+            return key in self._in_flight
+
+    def _run(self, key: str, fn: Callable[[], Any]) -> Any:
+        try:
+            return fn()
+        finally:
+            with self._lock:
+                self._in_flight.pop(key, None)
+
+    def _deliver(self, future: Future, on_result, on_error):
+        error = future.exception()
+        if error is None:
+            if on_result is not None:
+                self.dispatcher.call_soon(on_result, future.result())
+        elif on_error is not None:
+            self.dispatcher.call_soon(on_error, error)
+        else:
+            logger.warning("Error in background task: %s", error, exc_info=error)
+
+    def shutdown(self):
+        self._executor.shutdown(wait=False)
+
+
+class FrameLatencyMonitor:
+    """Measures how late a repeating Tk timer fires, a proxy for frame latency"""
+
+    def __init__(self, root, interval_ms: int = 16, window: int = 600):
+        self.root = root
+        self.interval_ms = interval_ms
+        self.samples: Deque[float] = deque(maxlen=window)  # Lateness in milliseconds
+        self.ticks = 0
+        self._expected = 0.0
+        self._running = False
+
+    def start(self):
+        self._running = True
+        self._schedule()
+
+    def stop(self):
+        self._running = False
+
+    def _schedule(self):
+        self._expected = time.perf_counter() + self.interval_ms / 1000.0
+        self.root.after(self.interval_ms, self._tick)
+
+    def _tick(self):
+        if not self._running:
+            return
+        self.samples.append(max(0.0, (time.perf_counter() - self._expected) * 1000.0))
+        self.ticks += 1
+        self._schedule()
+
+    def mark(self) -> int:
+        """Tick count to pass to max_since() once an operation finishes"""
+        return self.ticks
+
+    def max_since(self, mark: int) -> float:
+        """Worst lateness (ms) recorded after mark, limited to the sample window"""
+        count = min(self.ticks - mark, len(self.samples))
+        if count <= 0:
+            return 0.0
+        return max(list(self.samples)[-count:])
+
+    def stats(self) -> Dict[str, float]:
+        """p50/p95/max lateness in milliseconds over the recent window"""
+        ordered = sorted(self.samples)
+        if not ordered:
+            return {"p50": 0.0, "p95": 0.0, "max": 0.0}
+        return {
+            "p50": ordered[len(ordered) // 2],
+            "p95": ordered[min(len(ordered) - 1, int(len(ordered) * 0.95))],
+            "max": ordered[-1],
+        }